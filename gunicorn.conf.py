@@ -0,0 +1,13 @@
+"""
+Gunicorn settings, read from the working directory by every `gunicorn` command of the Dockerfile
+and docker-compose.yml. The Django settings size the database connection pool from the same variables.
+"""
+
+import os
+
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+# Each thread holds at most one database connection, so a worker needs up to `threads` of them
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
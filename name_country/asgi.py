@@ -13,4 +13,26 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "name_country.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported once the app registry is ready
+from names.services.external_apis import aclose_clients  # noqa: E402
+
+
+async def lifespan(receive, send):
+    """ASGI lifespan protocol: close the pooled upstream clients of the server's event loop on shutdown."""
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await aclose_clients()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+    else:
+        await django_application(scope, receive, send)
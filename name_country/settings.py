@@ -44,6 +44,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
 
     "names",
 
@@ -52,6 +53,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "names.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -87,6 +89,13 @@ WSGI_APPLICATION = "name_country.wsgi.application"
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
 # Environment-based database configuration (PostgreSQL in Docker)
+# Connections are kept open for DB_CONN_MAX_AGE seconds and checked before reuse. Under ASGI every request
+# runs in a new thread, so persistent connections are off there: enable DB_POOL instead.
+# DB_POOL uses psycopg 3's pool (the `pool` extra); each process opens up to DB_POOL_MAX_SIZE connections,
+# by default one per gunicorn thread, so the server needs WEB_CONCURRENCY * GUNICORN_THREADS connections.
+DB_POOL = os.getenv("DB_POOL", "False") == "True"
+default_conn_max_age = 0 if DB_POOL or os.getenv("NAMES_ASYNC_VIEWS") == "True" else 60
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -95,9 +104,31 @@ DATABASES = {
         "PASSWORD": os.getenv("POSTGRES_PASSWORD", "postgres"),
         "HOST": os.getenv("DB_HOST", "db"),
         "PORT": os.getenv("DB_PORT", "5432"),
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", str(default_conn_max_age))),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {},
     }
 }
 
+if DB_POOL:
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+        "max_size": int(os.getenv("DB_POOL_MAX_SIZE", os.getenv("GUNICORN_THREADS", "4"))),
+        "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+    }
+
+# Read replica (streaming copy of default) for the reads the views mark as replica-safe, see names.db_router
+if os.getenv("DB_REPLICA_HOST"):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "OPTIONS": {**DATABASES["default"]["OPTIONS"]},
+        "HOST": os.getenv("DB_REPLICA_HOST"),
+        "PORT": os.getenv("DB_REPLICA_PORT", DATABASES["default"]["PORT"]),
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["names.db_router.ReplicaRouter"]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -140,10 +171,28 @@ STATIC_URL = "static/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# How API requests with a JWT are authenticated. Revoked tokens (manage.py revoke_token) are rejected in every mode.
+# "database" loads the user on every request, "cached" at most once per USER_CACHE_TTL seconds and worker,
+# "stateless" never: request.user is built from the token claims.
+NAMES_AUTH = {
+    "MODE": os.getenv("NAMES_AUTH_MODE", "cached"),
+    "USER_CACHE_TTL": float(os.getenv("NAMES_AUTH_USER_CACHE_TTL", "60")),
+    "USER_CACHE_MAX_SIZE": int(os.getenv("NAMES_AUTH_USER_CACHE_MAX_SIZE", "10000")),
+    "DENYLIST_CHECK_INTERVAL": float(os.getenv("NAMES_AUTH_DENYLIST_CHECK_INTERVAL", "5")),
+}
+NAMES_AUTH_CLASSES = {
+    "database": "names.authentication.DenylistJWTAuthentication",
+    "cached": "names.authentication.CachedJWTAuthentication",
+    "stateless": "names.authentication.StatelessJWTAuthentication",
+}
+
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
-    "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+    "DEFAULT_AUTHENTICATION_CLASSES": [NAMES_AUTH_CLASSES[NAMES_AUTH["MODE"]]],
+    # orjson-backed when the `fast` extra is installed
+    "DEFAULT_RENDERER_CLASSES": [
+        "names.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
     ],
 }
 
@@ -153,6 +202,116 @@ SPECTACULAR_SETTINGS = {
     "VERSION": "1.0.0",
 }
 
+# Name lookup
+# Names older than the soft TTL are refreshed. In "stale-while-revalidate" mode the stale
+# predictions are served while a refresh_worker refreshes them, up to the hard TTL (seconds).
+NAMES_REFRESH_MODE = os.getenv("NAMES_REFRESH_MODE", "sync")
+NAMES_SOFT_TTL = int(os.getenv("NAMES_SOFT_TTL", str(24 * 60 * 60)))
+NAMES_HARD_TTL = int(os.getenv("NAMES_HARD_TTL", str(7 * 24 * 60 * 60)))
+# A name nationalize.io has no data for is looked up again after this many seconds
+NAMES_NEGATIVE_TTL = int(os.getenv("NAMES_NEGATIVE_TTL", str(60 * 60)))
+NAMES_BATCH_MAX_SIZE = int(os.getenv("NAMES_BATCH_MAX_SIZE", "1000"))
+NAMES_BATCH_UPSTREAM_WORKERS = int(os.getenv("NAMES_BATCH_UPSTREAM_WORKERS", "4"))
+
+# HTTP caching of lookup responses: max-age is the rest of a name's soft TTL, ETags come from its refresh time.
+# PUBLIC lets shared caches (CDN, reverse proxy) store lookups and answer any client with them, without the
+# token check: enable it only behind a cache that authenticates requests itself.
+NAMES_HTTP_CACHE = {
+    "PUBLIC": os.getenv("NAMES_HTTP_CACHE_PUBLIC", "False") == "True",
+    "POPULAR_MAX_AGE": int(os.getenv("NAMES_HTTP_CACHE_POPULAR_MAX_AGE", "60")),
+}
+
+# Request counters are aggregated per process and written in one batch at most every
+# FLUSH_INTERVAL seconds, or as soon as MAX_PENDING distinct names are waiting
+NAMES_REQUEST_COUNTER = {
+    "FLUSH_INTERVAL": float(os.getenv("NAMES_REQUEST_COUNTER_FLUSH_INTERVAL", "5")),
+    "MAX_PENDING": int(os.getenv("NAMES_REQUEST_COUNTER_MAX_PENDING", "10000")),
+}
+
+# Prometheus metrics on /metrics, protected by a bearer token if METRICS_TOKEN is set.
+# Set PROMETHEUS_MULTIPROC_DIR to aggregate the metrics of all gunicorn workers.
+NAMES_METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+NAMES_SERVER_TIMING = os.getenv("NAMES_SERVER_TIMING", "True") == "True"
+
+# Route the lookup endpoints to async views. Enable when serving name_country.asgi with uvicorn workers.
+NAMES_ASYNC_VIEWS = os.getenv("NAMES_ASYNC_VIEWS", "False") == "True"
+
+# Serve GET /names/lookup/ from a file written by `manage.py export_snapshot` instead of the database
+# (edge and read-only nodes). The file is checked for a replacement every CHECK_INTERVAL seconds.
+NAMES_SNAPSHOT_PATH = os.getenv("NAMES_SNAPSHOT_PATH", "")
+NAMES_SNAPSHOT_CHECK_INTERVAL = float(os.getenv("NAMES_SNAPSHOT_CHECK_INTERVAL", "5"))
+
+# GET /names/suggest/ answers from an in-memory index over the MAX_NAMES most requested names with predictions,
+# rebuilt in the background every REFRESH_INTERVAL seconds
+NAMES_SUGGEST = {
+    "MAX_NAMES": int(os.getenv("NAMES_SUGGEST_MAX_NAMES", "100000")),
+    "REFRESH_INTERVAL": float(os.getenv("NAMES_SUGGEST_REFRESH_INTERVAL", "300")),
+}
+
+# Set to False once the Country table is preloaded with `manage.py load_countries`,
+# so that lookups never call REST Countries
+NAMES_FETCH_MISSING_COUNTRIES = os.getenv("NAMES_FETCH_MISSING_COUNTRIES", "True") == "True"
+
+# Seconds between checks of the Country table for changes by each worker's in-memory country registry
+NAMES_COUNTRY_REGISTRY_CHECK_INTERVAL = float(os.getenv("NAMES_COUNTRY_REGISTRY_CHECK_INTERVAL", "5"))
+
+# Upstream APIs, called through pooled keep-alive sessions (timeouts in seconds)
+NATIONALIZE_API_URL = os.getenv("NATIONALIZE_API_URL", "https://api.nationalize.io")
+RESTCOUNTRIES_API_URL = os.getenv("RESTCOUNTRIES_API_URL", "https://restcountries.com")
+UPSTREAM_HTTP = {
+    "CONNECT_TIMEOUT": float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "2")),
+    "READ_TIMEOUT": float(os.getenv("UPSTREAM_READ_TIMEOUT", "5")),
+    "POOL_MAXSIZE": int(os.getenv("UPSTREAM_POOL_MAXSIZE", "10")),
+    "MAX_RETRIES": int(os.getenv("UPSTREAM_MAX_RETRIES", "2")),
+    "BACKOFF_BASE": float(os.getenv("UPSTREAM_BACKOFF_BASE", "0.2")),
+    "BACKOFF_MAX": float(os.getenv("UPSTREAM_BACKOFF_MAX", "2")),
+    "BREAKER_FAILURE_THRESHOLD": int(os.getenv("UPSTREAM_BREAKER_FAILURE_THRESHOLD", "5")),
+    "BREAKER_RESET_TIMEOUT": float(os.getenv("UPSTREAM_BREAKER_RESET_TIMEOUT", "30")),
+}
+
+# "shared" is one Redis database for all workers when REDIS_URL is set (docker-compose runs one). Without it
+# both aliases are local-memory caches, which every process has its own copy of.
+REDIS_URL = os.getenv("REDIS_URL", "")
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "shared": (
+        {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": REDIS_URL}
+        if REDIS_URL
+        else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "shared"}
+    ),
+}
+
+# nationalize.io call budget, shared by all workers through the cache alias, which `check --deploy` requires
+# to be shared by the processes. RATE calls/s in bursts of BURST, of which background refreshes get
+# BACKGROUND_SHARE; they stop when RESERVE_RATIO of the daily quota is left.
+NATIONALIZE_QUOTA = {
+    "ALIAS": os.getenv("NATIONALIZE_QUOTA_CACHE_ALIAS", "shared"),
+    "RATE": float(os.getenv("NATIONALIZE_RATE", "0")),
+    "BURST": int(os.getenv("NATIONALIZE_BURST", "20")),
+    "BACKGROUND_SHARE": float(os.getenv("NATIONALIZE_BACKGROUND_SHARE", "0.5")),
+    "RESERVE_RATIO": float(os.getenv("NATIONALIZE_RESERVE_RATIO", "0.1")),
+}
+
+# Serialized lookup responses: per-process LRU plus an optional shared Django cache alias.
+# TTLs are in seconds and are additionally capped by the remaining 24h freshness of a name.
+# PROJECTION_MAX_SIZE bounds the per-process memo of fields= projections of rendered responses.
+NAMES_RESPONSE_CACHE = {
+    "PROJECTION_MAX_SIZE": int(os.getenv("NAMES_RESPONSE_CACHE_PROJECTION_MAX_SIZE", "4096")),
+    "LOCAL_MAX_SIZE": int(os.getenv("NAMES_RESPONSE_CACHE_LOCAL_MAX_SIZE", "10000")),
+    "LOCAL_TTL": int(os.getenv("NAMES_RESPONSE_CACHE_LOCAL_TTL", "60")),
+    "SHARED_ALIAS": os.getenv("NAMES_RESPONSE_CACHE_ALIAS", ""),
+    "SHARED_TTL": int(os.getenv("NAMES_RESPONSE_CACHE_SHARED_TTL", "3600")),
+}
+
+# 404 responses of names without data, kept in front of the database so junk names cost no queries.
+# Entries are small; TTLs are additionally capped by NAMES_NEGATIVE_TTL.
+NAMES_NEGATIVE_CACHE = {
+    "LOCAL_MAX_SIZE": int(os.getenv("NAMES_NEGATIVE_CACHE_LOCAL_MAX_SIZE", "50000")),
+    "LOCAL_TTL": int(os.getenv("NAMES_NEGATIVE_CACHE_LOCAL_TTL", "300")),
+    "SHARED_ALIAS": os.getenv("NAMES_RESPONSE_CACHE_ALIAS", ""),
+    "SHARED_TTL": int(os.getenv("NAMES_NEGATIVE_CACHE_SHARED_TTL", "3600")),
+}
+
 JAZZMIN_SETTINGS = {
     "site_title": "Name Country Admin",
     "site_header": "Name-Country API",
@@ -16,6 +16,8 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
 )
 
+from names.authentication import DenylistTokenRefreshSerializer
+
 
 @extend_schema(
     tags=["auth"],
@@ -38,6 +40,11 @@ class CustomTokenObtainPairView(TokenObtainPairView):
     pass
 
 
+class CustomTokenRefreshView(TokenRefreshView):
+    """Rejects refresh tokens revoked with the revoke_token command."""
+    serializer_class = DenylistTokenRefreshSerializer
+
+
 urlpatterns = [
     # Admin
     path("admin/", admin.site.urls),
@@ -47,7 +54,7 @@ urlpatterns = [
 
     # JWT authentication
     path("api/token/", CustomTokenObtainPairView.as_view(), name="token_obtain_pair"),
-    path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    path("api/token/refresh/", CustomTokenRefreshView.as_view(), name="token_refresh"),
 
     # API Schema & Docs
     path("schema/", SpectacularAPIView.as_view(), name="schema"),
@@ -1,11 +1,12 @@
 from django.contrib import admin
-from .models import Name, Country, NameCountryProbability
+from .models import Name, Country, NameCountryProbability, NameRefreshTask, RevokedToken
 
 
 @admin.register(Name)
 class NameAdmin(admin.ModelAdmin):
-    list_display = ("name", "request_count", "last_accessed_at")
-    search_fields = ("name",)
+    list_display = ("name", "request_count", "last_accessed_at", "refreshed_at")
+    # Prefix search, served by the UPPER(name) index instead of scanning every name
+    search_fields = ("^name",)
 
 
 @admin.register(Country)
@@ -17,4 +18,16 @@ class CountryAdmin(admin.ModelAdmin):
 @admin.register(NameCountryProbability)
 class NameCountryProbabilityAdmin(admin.ModelAdmin):
     list_display = ("name", "country", "probability")
-    search_fields = ("name__name", "country__alpha2_code")
+    search_fields = ("^name__name", "=country__alpha2_code")
+
+
+@admin.register(NameRefreshTask)
+class NameRefreshTaskAdmin(admin.ModelAdmin):
+    list_display = ("name", "enqueued_at")
+    search_fields = ("^name__name",)
+
+
+@admin.register(RevokedToken)
+class RevokedTokenAdmin(admin.ModelAdmin):
+    list_display = ("jti", "expires_at")
+    search_fields = ("=jti",)
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class NamesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "names"
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from . import checks, schema, signals  # noqa: F401
+        from names.services.metrics import install_query_hook
+
+        connection_created.connect(install_query_hook, dispatch_uid="names_query_metrics")
@@ -0,0 +1,198 @@
+from adrf.views import APIView
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+
+from .models import Name
+from .renderers import FastJSONRenderer
+from .serializers import (
+    NAME_BATCH_RESPONSE,
+    NAME_LOOKUP_RESPONSE,
+    LookupFormatSerializer,
+    NameBatchRequestSerializer,
+    compact_data,
+    name_data,
+)
+from names.services.async_lookup import afresh_refreshed_at, ais_servable_stale, arefresh_name, arefresh_names
+from names.services.cache import negative_cache, response_cache
+from names.services.lookup import is_fresh, remaining_ttl, names_with_predictions
+from names.services.counters import request_counter
+from names.services.http_cache import is_conditional, lookup_cache_headers, lookup_not_modified
+from names.services.metrics import timed
+from names.services.normalization import is_valid_name, normalize_name
+from names.services.refresh_queue import enqueue_refresh
+from names.views import (
+    FORMAT_PARAMETERS,
+    INVALID_NAME,
+    NO_DATA,
+    UPSTREAM_UNAVAILABLE,
+    ReplicaAuthenticationMixin,
+    partition_batch,
+)
+
+
+@sync_to_async
+def serialize(instance, fmt):
+    # In a worker thread: the country registry may have to reload from the database
+    with timed("serialize"):
+        return fmt.shape_name(instance)
+
+
+@sync_to_async
+def serialize_cached(name_obj):
+    """Full and compact result of a name, for NameLookupView.cached_response."""
+    with timed("serialize"):
+        return name_data(name_obj), compact_data(name_obj)
+
+
+@sync_to_async
+def serialize_results(names, fmt):
+    with timed("serialize"):
+        return fmt.shape_results(names)
+
+
+async def count_request(names) -> None:
+    """Async version of counters.count_request: a due flush runs in a worker thread."""
+    if request_counter.record(names):
+        await sync_to_async(request_counter.flush)()
+
+
+@extend_schema(
+    parameters=[
+        OpenApiParameter(name="name", required=True, type=str, location=OpenApiParameter.QUERY),
+        *FORMAT_PARAMETERS,
+    ],
+    responses=NAME_LOOKUP_RESPONSE,
+)
+class AsyncNameLookupView(ReplicaAuthenticationMixin, APIView):
+    """
+    GET /names/?name=<name>
+
+    Async counterpart of NameLookupView, used when the app is served over ASGI.
+    Upstream calls are awaited on the event loop instead of holding a worker thread.
+    """
+    permission_classes = [IsAuthenticated]
+
+    async def get(self, request):
+        name_param = request.query_params.get("name")
+        if not name_param:
+            return Response({"error": "Missing 'name' query parameter."}, status=status.HTTP_400_BAD_REQUEST)
+        name = normalize_name(name_param)
+        if not is_valid_name(name):
+            return Response(INVALID_NAME, status=status.HTTP_400_BAD_REQUEST)
+        fmt = LookupFormatSerializer(data=request.query_params)
+        if not fmt.is_valid():
+            return Response({"error": fmt.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        cached = await response_cache.aget(name)
+        if cached is not None:
+            await count_request([name])
+            version, payload, compact_payload = cached
+            response = lookup_not_modified(request, version)
+            if response is None:
+                body = fmt.shape_payload(payload, compact_payload)
+                response = lookup_cache_headers(HttpResponse(body, content_type="application/json"), version)
+            return response
+
+        payload = await negative_cache.aget(name)
+        if payload is not None:
+            return HttpResponse(payload, status=status.HTTP_404_NOT_FOUND, content_type="application/json")
+
+        if is_conditional(request):
+            refreshed_at = await afresh_refreshed_at(name)
+            response = lookup_not_modified(request, refreshed_at.timestamp()) if refreshed_at else None
+            if response is not None:
+                await count_request([name])
+                return response
+
+        name_obj, created = await names_with_predictions().aget_or_create(name=name)
+        await count_request([name_obj.name])
+
+        if not created and is_fresh(name_obj):
+            return await self.cached_response(name_obj, fmt)
+
+        if not created and await ais_servable_stale(name_obj):
+            await sync_to_async(enqueue_refresh)([name_obj])
+            return lookup_cache_headers(Response(await serialize(name_obj, fmt)), name_obj.refreshed_at.timestamp())
+
+        has_stale_data = not created and bool(name_obj.country_probabilities.all())
+        if await arefresh_name(name_obj, name, has_stale_data) is None:
+            if has_stale_data:
+                return lookup_cache_headers(Response(await serialize(name_obj, fmt)), name_obj.refreshed_at.timestamp())
+            return Response(UPSTREAM_UNAVAILABLE, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        return await self.cached_response(await names_with_predictions().aget(pk=name_obj.pk), fmt)
+
+    @staticmethod
+    async def cached_response(name_obj, fmt):
+        """Async version of NameLookupView.cached_response."""
+        if not name_obj.country_probabilities.all():
+            payload = FastJSONRenderer().render(NO_DATA)
+            await negative_cache.aset(name_obj.name, payload, ttl=remaining_ttl(name_obj))
+            return Response(NO_DATA, status=status.HTTP_404_NOT_FOUND)
+
+        data, compact = await serialize_cached(name_obj)
+        version = name_obj.refreshed_at.timestamp()
+        payload = FastJSONRenderer().render(data)
+        compact_payload = FastJSONRenderer().render(compact)
+        await response_cache.aset(name_obj.name, (version, payload, compact_payload), ttl=remaining_ttl(name_obj))
+        return lookup_cache_headers(Response(fmt.shape(data)), version)
+
+
+@extend_schema(request=NameBatchRequestSerializer, responses=NAME_BATCH_RESPONSE, parameters=FORMAT_PARAMETERS)
+class AsyncNameBatchLookupView(ReplicaAuthenticationMixin, APIView):
+    """
+    POST /names/batch/
+
+    Async counterpart of NameBatchLookupView. The nationalize.io chunks are requested concurrently.
+    """
+    permission_classes = [IsAuthenticated]
+
+    async def post(self, request):
+        serializer = NameBatchRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({"error": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        fmt = LookupFormatSerializer(data=request.query_params)
+        if not fmt.is_valid():
+            return Response({"error": fmt.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        keys = list(dict.fromkeys(serializer.validated_data["names"]))
+
+        names = {
+            n.name: n
+            async for n in names_with_predictions().filter(name__in=keys)
+        }
+        stale = [key for key in keys if key not in names or not is_fresh(names[key])]
+
+        revalidate = {key for key in stale if key in names and await ais_servable_stale(names[key])}
+        if revalidate:
+            await sync_to_async(enqueue_refresh)([names[key] for key in revalidate])
+            stale = [key for key in stale if key not in revalidate]
+
+        failed = set()
+        if stale:
+            missing = [key for key in stale if key not in names]
+            await Name.objects.abulk_create([Name(name=key) for key in missing], ignore_conflicts=True)
+            fetched = await arefresh_names([n async for n in Name.objects.filter(name__in=stale)])
+            failed = {key for key in stale if key not in fetched}
+
+            names.update([
+                (n.name, n)
+                async for n in names_with_predictions().filter(name__in=stale)
+            ])
+
+        await count_request(keys)
+
+        results, not_found, unavailable = partition_batch(keys, names, failed)
+        if unavailable and not results and not not_found:
+            return Response(UPSTREAM_UNAVAILABLE, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        return Response({
+            "results": await serialize_results(results, fmt),
+            "not_found": not_found,
+            "unavailable": unavailable,
+        })
@@ -0,0 +1,117 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication, JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from names.services.snapshot import snapshot_store
+from names.services.token_denylist import token_denylist
+
+
+class UserCache:
+    """
+    Process-wide cache of authenticated users by token user id, each kept for NAMES_AUTH["USER_CACHE_TTL"] seconds.
+    Users changed in this process are evicted by a signal; changes made elsewhere show after the TTL.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._users.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                return None
+            self._users.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, user) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._users[key] = (user, now + settings.NAMES_AUTH["USER_CACHE_TTL"])
+            self._users.move_to_end(key)
+            max_size = settings.NAMES_AUTH["USER_CACHE_MAX_SIZE"]
+            if len(self._users) > max_size:
+                # Make room from the expired users first, then from the least recently used
+                for expired in [cached for cached, (_, expires) in self._users.items() if expires <= now]:
+                    del self._users[expired]
+                while len(self._users) > max_size:
+                    self._users.popitem(last=False)
+
+    def evict(self, user_id) -> None:
+        with self._lock:
+            for key in [key for key in self._users if key[0] == str(user_id)]:
+                del self._users[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._users.clear()
+
+
+user_cache = UserCache()
+
+
+class DenylistJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that also rejects tokens revoked with the revoke_token command."""
+
+    def revoked_jtis(self):
+        """The jti claims of the revoked tokens."""
+        return token_denylist
+
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        if validated_token.get(api_settings.JTI_CLAIM) in self.revoked_jtis():
+            raise InvalidToken("Token has been revoked.")
+        return validated_token
+
+
+class CachedJWTAuthentication(DenylistJWTAuthentication):
+    """
+    Loads the user of a token from the database at most once per NAMES_AUTH["USER_CACHE_TTL"] seconds
+    and worker, instead of once per request.
+    """
+
+    def get_user(self, validated_token):
+        # Tokens issued before a password change carry another revoke claim and are checked again
+        key = (
+            str(validated_token.get(api_settings.USER_ID_CLAIM)),
+            validated_token.get(api_settings.REVOKE_TOKEN_CLAIM),
+        )
+        user = user_cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(key, user)
+        return user
+
+
+class StatelessJWTAuthentication(DenylistJWTAuthentication, JWTStatelessUserAuthentication):
+    """
+    Trusts the claims of a valid, not revoked token without loading the user: request.user is a TokenUser.
+    Deactivated users keep access until their access tokens expire, unless those are revoked.
+    """
+
+
+class SnapshotJWTAuthentication(StatelessJWTAuthentication):
+    """
+    Stateless authentication of snapshot nodes, which have no database: tokens are checked against the
+    revocations exported with the snapshot, so a revocation reaches them with the next export_snapshot.
+    """
+
+    def revoked_jtis(self):
+        snapshot = snapshot_store.get()
+        return snapshot.revoked_jtis if snapshot is not None else frozenset()
+
+
+class DenylistTokenRefreshSerializer(TokenRefreshSerializer):
+    """TokenRefreshSerializer that refuses to issue access tokens for a refresh token revoked with revoke_token."""
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        if refresh.get(api_settings.JTI_CLAIM) in token_denylist:
+            raise InvalidToken("Token has been revoked.")
+        return super().validate(attrs)
@@ -0,0 +1,54 @@
+import time
+
+from django.db import connection
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from names.authentication import (
+    CachedJWTAuthentication,
+    DenylistJWTAuthentication,
+    StatelessJWTAuthentication,
+    user_cache,
+)
+from names.services.token_denylist import token_denylist
+
+
+def authentication_variants() -> dict:
+    """Ways to authenticate a request with a JWT: the original backend first."""
+    return {
+        "JWTAuthentication": JWTAuthentication(),
+        "database (denylist)": DenylistJWTAuthentication(),
+        "cached": CachedJWTAuthentication(),
+        "stateless": StatelessJWTAuthentication(),
+    }
+
+
+def compare(user, requests: int = 1000, repeat: int = 5) -> dict:
+    """
+    Authenticate `requests` requests carrying an access token of `user` with each backend and return,
+    per backend, the best microseconds per request over `repeat` rounds and the queries per request.
+    """
+    factory = APIRequestFactory()
+    token = AccessToken.for_user(user)
+    request = Request(factory.get("/names/lookup/", HTTP_AUTHORIZATION=f"Bearer {token}"))
+    report = {}
+    for label, backend in authentication_variants().items():
+        user_cache.clear()
+        token_denylist.clear()
+        queries = []
+        with connection.execute_wrapper(lambda execute, *args: queries.append(None) or execute(*args)):
+            best = min(timed_round(backend, request, requests) for _ in range(repeat))
+        report[label] = {
+            "us_per_request": best / requests * 1e6,
+            "queries_per_request": len(queries) / (requests * repeat),
+        }
+    return report
+
+
+def timed_round(backend, request, requests: int) -> float:
+    started = time.perf_counter()
+    for _ in range(requests):
+        backend.authenticate(request)
+    return time.perf_counter() - started
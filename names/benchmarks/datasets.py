@@ -0,0 +1,85 @@
+import string
+from itertools import product
+
+from django.utils import timezone
+
+from names.models import Country, Name, NameCountryProbability
+from names.benchmarks.stub_upstream import SYNTHETIC_REGION, synthetic_country, synthetic_predictions
+from names.services.countries import upsert_countries
+
+
+# Every benchmark name starts with this prefix so that the data can be told apart and removed
+NAME_PREFIX = "bench-"
+
+MAX_COUNTRIES = 26 * 26
+
+
+def country_codes(count: int) -> list:
+    """The first `count` two-letter codes, AA, AB, ... ZZ."""
+    codes = ("".join(pair) for pair in product(string.ascii_uppercase, repeat=2))
+    return [code for _, code in zip(range(min(count, MAX_COUNTRIES)), codes)]
+
+
+def seeded_name(index: int) -> str:
+    return f"{NAME_PREFIX}{index}"
+
+
+def cold_name(run_id: str, index: int) -> str:
+    """A name that is not seeded, unique per benchmark run."""
+    return f"{NAME_PREFIX}cold-{run_id}-{index}"
+
+
+def real_countries(codes) -> list:
+    """The codes among `codes` that belong to countries not created by the benchmarks."""
+    return sorted(
+        Country.objects.filter(alpha2_code__in=codes)
+        .exclude(region=SYNTHETIC_REGION)
+        .values_list("alpha2_code", flat=True)
+    )
+
+
+def seed(name_count: int, country_count: int, chunk_size: int = 10000, progress=None, force: bool = False) -> None:
+    """
+    Insert `country_count` synthetic countries and `name_count` fresh names with predictions,
+    in bulk chunks of `chunk_size` names. Request counts follow a Zipf-like distribution
+    so that popular-names has a realistic head. Existing benchmark rows are kept.
+    Raises ValueError rather than overwrite real countries with the same codes, unless `force` is set.
+    """
+    codes = country_codes(country_count)
+    if not force and (real := real_countries(codes)):
+        raise ValueError(f"{len(real)} real countries would be overwritten: {', '.join(real[:10])}")
+    upsert_countries([synthetic_country(code) for code in codes])
+    country_ids = dict(Country.objects.filter(alpha2_code__in=codes).values_list("alpha2_code", "pk"))
+
+    now = timezone.now()
+    for start in range(0, name_count, chunk_size):
+        indexes = range(start, min(start + chunk_size, name_count))
+        Name.objects.bulk_create(
+            [
+                Name(name=seeded_name(i), refreshed_at=now, request_count=name_count // (i + 1))
+                for i in indexes
+            ],
+            ignore_conflicts=True,
+        )
+        names = Name.objects.filter(name__in=[seeded_name(i) for i in indexes]).values_list("name", "pk", "request_count")
+        NameCountryProbability.objects.bulk_create(
+            [
+                NameCountryProbability(
+                    name_id=pk,
+                    country_id=country_ids[entry["country_id"]],
+                    probability=entry["probability"],
+                    request_count=request_count,
+                )
+                for name, pk, request_count in names
+                for entry in synthetic_predictions(name, codes)
+            ],
+            ignore_conflicts=True,
+        )
+        if progress:
+            progress(indexes.stop)
+
+
+def clear() -> int:
+    """Delete every benchmark name and its predictions. Returns the number of names deleted."""
+    deleted, per_model = Name.objects.filter(name__startswith=NAME_PREFIX).delete()
+    return per_model.get(Name._meta.label, 0)
@@ -0,0 +1,56 @@
+import json
+
+from names.models import Country, Name, NameCountryProbability, NameRefreshTask
+from names.services.popularity import popular_names_queryset
+
+
+def hot_path_queries() -> dict:
+    """
+    The queries behind the lookup, batch, popular-names, refresh-queue and admin search paths,
+    built from rows sampled from the current database.
+    """
+    names = list(Name.objects.order_by("pk").values_list("name", "pk")[:100])
+    sample_name, sample_pk = names[0] if names else ("anna", 0)
+    country_pk = (
+        NameCountryProbability.objects.filter(name_id=sample_pk).values_list("country_id", flat=True).first()
+        or Country.objects.values_list("pk", flat=True).first()
+        or 0
+    )
+    return {
+        "lookup": Name.objects.filter(name=sample_name),
+        "predictions": NameCountryProbability.objects.filter(
+            name_id__in=[pk for _, pk in names[:1]]
+        ).only("id", "name_id", "country_id", "probability"),
+        "batch": Name.objects.filter(name__in=[name for name, _ in names]),
+        "popular-names": popular_names_queryset(country_pk).values_list("name__name", flat=True)[:5],
+        "popular-names-filtered": popular_names_queryset(country_pk, 0.3).values_list("name__name", flat=True)[:5],
+        "popular-names-deep-page": popular_names_queryset(country_pk).values_list("name__name", flat=True)[1000:1100],
+        "refresh-queue": NameRefreshTask.objects.order_by("enqueued_at").values_list("pk", "name_id")[:100],
+        "admin-name-search": Name.objects.filter(name__istartswith=sample_name).order_by()[:100],
+    }
+
+
+def plan_nodes(plan: dict):
+    """Yield every node of a JSON query plan, depth first."""
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def explain(queryset, analyze: bool = False) -> dict:
+    """Summarize the PostgreSQL plan of a queryset: scan nodes, indexes used and timings."""
+    options = {"analyze": True, "buffers": True} if analyze else {}
+    result = json.loads(queryset.explain(format="json", **options))[0]
+    nodes = list(plan_nodes(result["Plan"]))
+    scans = [
+        f"{node['Node Type']} on {node['Relation Name']}"
+        + (f" using {node['Index Name']}" if "Index Name" in node else "")
+        for node in nodes
+        if "Relation Name" in node
+    ]
+    return {
+        "scans": scans,
+        "seq_scan": any(node["Node Type"] == "Seq Scan" for node in nodes),
+        "total_cost": result["Plan"]["Total Cost"],
+        "execution_ms": result.get("Execution Time"),
+    }
@@ -0,0 +1,194 @@
+import json
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+
+import requests
+from django.db import connection
+from django.test import Client
+
+from names.benchmarks.datasets import cold_name, seeded_name
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def lookup(name: str) -> dict:
+    return {"method": "GET", "path": "/names/lookup/", "params": {"name": name}}
+
+
+def hot_requests(rng, count: int, name_count: int, country_codes: list, miss_ratio: float):
+    """Lookups of the most popular 1% of the seeded names, which are fresh and mostly cached."""
+    hot_size = max(1, name_count // 100)
+    return [lookup(seeded_name(rng.randrange(hot_size))) for _ in range(count)]
+
+
+def cold_requests(rng, count: int, name_count: int, country_codes: list, miss_ratio: float):
+    """Lookups of names never seen before, each one going to the upstream."""
+    run_id = uuid.uuid4().hex[:8]
+    return [lookup(cold_name(run_id, i)) for i in range(count)]
+
+
+def mixed_requests(rng, count: int, name_count: int, country_codes: list, miss_ratio: float):
+    """Lookups across all seeded names with a share of `miss_ratio` cold names."""
+    run_id = uuid.uuid4().hex[:8]
+    return [
+        lookup(cold_name(run_id, i)) if rng.random() < miss_ratio else lookup(seeded_name(rng.randrange(name_count)))
+        for i in range(count)
+    ]
+
+
+def popular_requests(rng, count: int, name_count: int, country_codes: list, miss_ratio: float):
+    """Popular names for random seeded countries."""
+    return [
+        {"method": "GET", "path": "/popular-names/", "params": {"country": rng.choice(country_codes)}}
+        for _ in range(count)
+    ]
+
+
+def batch_requests(rng, count: int, name_count: int, country_codes: list, miss_ratio: float):
+    """Batch lookups of 50 names each, with a share of `miss_ratio` cold names."""
+    run_id = uuid.uuid4().hex[:8]
+    return [
+        {
+            "method": "POST",
+            "path": "/names/batch/",
+            "body": {
+                "names": [
+                    cold_name(run_id, i * 50 + j) if rng.random() < miss_ratio else seeded_name(rng.randrange(name_count))
+                    for j in range(50)
+                ]
+            },
+        }
+        for i in range(count)
+    ]
+
+
+SCENARIOS = {
+    "hot": hot_requests,
+    "cold": cold_requests,
+    "mixed": mixed_requests,
+    "popular": popular_requests,
+    "batch": batch_requests,
+}
+
+
+def build_requests(
+    scenario: str, count: int, name_count: int, country_codes: list, miss_ratio: float = 0.1, seed: int = 0
+) -> list:
+    """Generate the requests of a scenario. The same seed always gives the same traffic."""
+    return SCENARIOS[scenario](random.Random(seed), count, name_count, country_codes, miss_ratio)
+
+
+def load_replay(path: str) -> list:
+    """
+    Read recorded traffic, one JSON object per line:
+    {"method": "GET", "path": "/names/lookup/", "params": {...}, "body": {...}}.
+    """
+    with open(path, encoding="utf-8") as source:
+        return [json.loads(line) for line in source if line.strip()]
+
+
+class InProcessTransport:
+    """Sends requests through the Django test client, so that database queries can be counted."""
+    counts_queries = True
+
+    def __init__(self, token: str):
+        self.client = Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def send(self, request: dict) -> int:
+        if request.get("method", "GET").upper() == "POST":
+            response = self.client.post(request["path"], request.get("body") or {}, content_type="application/json")
+        else:
+            response = self.client.get(request["path"], request.get("params") or {})
+        return response.status_code
+
+
+class HttpTransport:
+    """Sends requests to a running server over keep-alive HTTP connections."""
+    counts_queries = False
+
+    def __init__(self, token: str, base_url: str):
+        self.base_url = base_url.rstrip("/")
+        self.session = requests.Session()
+        self.session.headers["Authorization"] = f"Bearer {token}"
+
+    def send(self, request: dict) -> int:
+        response = self.session.request(
+            request.get("method", "GET"),
+            self.base_url + request["path"],
+            params=request.get("params"),
+            json=request.get("body"),
+        )
+        return response.status_code
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def run(requests_to_send: list, transport_factory, concurrency: int = 1) -> dict:
+    """
+    Send requests from `concurrency` threads and return throughput, latency percentiles (ms),
+    queries per request (in-process transport only) and response status counts.
+    """
+    latencies = []
+    statuses = Counter()
+    queries = []
+    lock = threading.Lock()
+
+    def worker(share):
+        transport = transport_factory()
+        counter = QueryCounter()
+        local_latencies, local_statuses = [], Counter()
+        try:
+            with connection.execute_wrapper(counter):
+                for request in share:
+                    started = time.perf_counter()
+                    local_statuses[transport.send(request)] += 1
+                    local_latencies.append(time.perf_counter() - started)
+        finally:
+            connection.close()
+        with lock:
+            latencies.extend(local_latencies)
+            statuses.update(local_statuses)
+            if transport.counts_queries:
+                queries.append(counter.count)
+
+    threads = [
+        threading.Thread(target=worker, args=(requests_to_send[i::concurrency],))
+        for i in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - started
+
+    latencies.sort()
+    total = len(latencies)
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(total / duration, 1) if duration else 0.0,
+        "latency_ms": {
+            name: round(percentile(latencies, pct) * 1000, 2)
+            for name, pct in (("p50", 50), ("p95", 95), ("p99", 99), ("max", 100))
+        },
+        "queries_per_request": round(sum(queries) / total, 2) if queries and total else None,
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+    }
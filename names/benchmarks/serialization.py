@@ -0,0 +1,46 @@
+import json
+import time
+
+from rest_framework.renderers import JSONRenderer
+
+from names.renderers import FastJSONRenderer, orjson
+from names.serializers import NameSerializer, name_data
+
+
+def serialization_variants() -> dict:
+    """Ways to turn a prefetched Name into response bytes: the original path first."""
+    renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+    variants = {
+        "NameSerializer + JSONRenderer": lambda name_obj: renderer.render(NameSerializer(name_obj).data),
+        "name_data + JSONRenderer": lambda name_obj: renderer.render(name_data(name_obj)),
+    }
+    if orjson is not None:
+        variants["name_data + orjson"] = lambda name_obj: fast_renderer.render(name_data(name_obj))
+    return variants
+
+
+def compare(name_objs: list, repeat: int = 5) -> dict:
+    """
+    Time each serialization variant over the same names and return, per variant, the best
+    microseconds per name over `repeat` rounds and whether its output matches the original.
+    """
+    variants = serialization_variants()
+    baseline = [next(iter(variants.values()))(name_obj) for name_obj in name_objs]
+    baseline_values = [json.loads(payload) for payload in baseline]
+    report = {}
+    for label, serialize in variants.items():
+        best = min(timed_round(serialize, name_objs) for _ in range(repeat))
+        outputs = [serialize(name_obj) for name_obj in name_objs]
+        report[label] = {
+            "us_per_name": best / len(name_objs) * 1e6,
+            "same_bytes": outputs == baseline,
+            "same_values": [json.loads(payload) for payload in outputs] == baseline_values,
+        }
+    return report
+
+
+def timed_round(serialize, name_objs) -> float:
+    started = time.perf_counter()
+    for name_obj in name_objs:
+        serialize(name_obj)
+    return time.perf_counter() - started
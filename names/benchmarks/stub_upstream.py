@@ -0,0 +1,129 @@
+import json
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from names.services import external_apis
+
+
+def synthetic_predictions(name: str, country_codes: list, count: int = 3) -> list:
+    """Deterministic nationalize.io style predictions for any name."""
+    if not country_codes:
+        return []
+    seed = zlib.crc32(name.encode())
+    codes = [country_codes[(seed + i * 7919) % len(country_codes)] for i in range(count)]
+    return [
+        {"country_id": code, "probability": round(0.6 / (i + 1), 4)}
+        for i, code in enumerate(dict.fromkeys(codes))
+    ]
+
+
+# Region of every synthetic country, their codes overlap real ISO codes
+SYNTHETIC_REGION = "Synthetic"
+
+
+def synthetic_country(code: str) -> dict:
+    """A REST Countries style payload for any alpha-2 code."""
+    return {
+        "cca2": code,
+        "name": {"official": f"Republic of {code}", "common": code},
+        "region": SYNTHETIC_REGION,
+        "subregion": "",
+        "capital": [f"{code} City"],
+        "latlng": [0.0, 0.0],
+        "flags": {"png": "", "svg": ""},
+        "coatOfArms": {},
+        "borders": [],
+        "independent": True,
+    }
+
+
+class StubUpstreamHandler(BaseHTTPRequestHandler):
+    """Answers nationalize.io and REST Countries requests with synthetic data after a fixed latency."""
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        url = urlsplit(self.path)
+        params = parse_qs(url.query)
+        time.sleep(server.latency)
+
+        status = 200
+        if url.path.startswith("/v3.1/alpha/"):
+            body = [synthetic_country(url.path.rsplit("/", 1)[-1].upper())]
+        elif url.path == "/v3.1/all":
+            body = [synthetic_country(code) for code in server.country_codes]
+        elif "name[]" in params:
+            body = [
+                {"name": name, "country": synthetic_predictions(name, server.country_codes)}
+                for name in params["name[]"]
+            ]
+        elif "name" in params:
+            name = params["name"][0]
+            body = {"name": name, "country": synthetic_predictions(name, server.country_codes)}
+        else:
+            status, body = 404, {"error": "Not found"}
+
+        with server.lock:
+            server.request_count += 1
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubUpstreamServer(ThreadingHTTPServer):
+    """
+    Local stand-in for both upstream APIs, for benchmarks that must not depend on the real services.
+    `latency` is the delay in seconds added to every response.
+    """
+    daemon_threads = True
+
+    def __init__(self, country_codes: list, latency: float = 0.0, port: int = 0):
+        super().__init__(("127.0.0.1", port), StubUpstreamHandler)
+        self.country_codes = list(country_codes)
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.request_count = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+@contextmanager
+def upstreams_at(url: str):
+    """Send every upstream call of this process to `url` instead of the configured APIs while active."""
+    clients = [
+        external_apis.nationalize_client,
+        external_apis.restcountries_client,
+        external_apis.async_nationalize_client,
+        external_apis.async_restcountries_client,
+    ]
+    original = [client.base_url for client in clients]
+    for client in clients:
+        client.base_url = url.rstrip("/")
+    try:
+        yield
+    finally:
+        for client, base_url in zip(clients, original):
+            client.base_url = base_url
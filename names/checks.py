@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+
+# Cache backends whose entries are not seen by other processes
+PROCESS_LOCAL_CACHES = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+@register(Tags.caches, deploy=True)
+def check_quota_cache(app_configs, **kwargs):
+    """The nationalize.io quota only holds across workers if its cache alias is shared by them."""
+    alias = settings.NATIONALIZE_QUOTA["ALIAS"]
+    backend = settings.CACHES.get(alias, {}).get("BACKEND")
+    if backend in PROCESS_LOCAL_CACHES:
+        return [Error(
+            f"The nationalize.io quota is kept in the cache '{alias}' ({backend}), which each process has a copy of.",
+            hint="Set REDIS_URL, or NATIONALIZE_QUOTA_CACHE_ALIAS to a cache shared by all workers.",
+            id="names.E001",
+        )]
+    return []
@@ -0,0 +1,42 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+
+
+REPLICA = "replica"
+
+# Whether reads in the current context may go to the replica, see replica_reads()
+use_replica = ContextVar("use_replica", default=False)
+
+
+@contextmanager
+def replica_reads():
+    """
+    Send the reads of this block to the read replica, if one is configured.
+    Only for reads that tolerate replication lag: never read back what the same request wrote.
+    """
+    token = use_replica.set(True)
+    try:
+        yield
+    finally:
+        use_replica.reset(token)
+
+
+class ReplicaRouter:
+    """Routes reads made under replica_reads() to the "replica" database. Everything else uses default."""
+
+    def db_for_read(self, model, **hints):
+        if use_replica.get() and REPLICA in connections.settings:
+            return REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as default
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA
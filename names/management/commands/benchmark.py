@@ -0,0 +1,106 @@
+import json
+import uuid
+from contextlib import ExitStack
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from names.benchmarks import runner
+from names.benchmarks.datasets import country_codes
+from names.benchmarks.stub_upstream import StubUpstreamServer, upstreams_at
+from names.services.counters import request_counter
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the lookup and popular-names endpoints against data from seed_benchmark_data. "
+        "Reports throughput, p50/p95/p99 latency and database queries per request."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scenario", choices=sorted(runner.SCENARIOS), default="mixed")
+        parser.add_argument("--replay", help="Replay a JSONL file of recorded requests instead of a scenario.")
+        parser.add_argument("--requests", type=int, default=1000, help="Number of measured requests.")
+        parser.add_argument("--warmup", type=int, default=100, help="Requests sent before measuring.")
+        parser.add_argument("--concurrency", type=int, default=4, help="Concurrent clients.")
+        parser.add_argument("--names", type=int, default=10000, help="Number of seeded names to draw from.")
+        parser.add_argument("--countries", type=int, default=250, help="Number of seeded countries to draw from.")
+        parser.add_argument("--miss-ratio", type=float, default=0.1, help="Share of cold names in mixed and batch.")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed, the same seed replays the same traffic.")
+        parser.add_argument(
+            "--upstream-latency", type=float, default=0.05, help="Latency in seconds of the in-process upstream stub."
+        )
+        parser.add_argument("--real-upstream", action="store_true", help="Call the configured upstream APIs instead of the stub.")
+        parser.add_argument(
+            "--url", help="Benchmark a running server at this URL over HTTP. Queries per request are not reported."
+        )
+        parser.add_argument("--json", help="Also write the report to this file.")
+
+    def handle(self, *args, **options):
+        if options["replay"]:
+            traffic = runner.load_replay(options["replay"])
+            label = f"replay:{options['replay']}"
+        else:
+            traffic = runner.build_requests(
+                options["scenario"],
+                options["warmup"] + options["requests"],
+                options["names"],
+                country_codes(options["countries"]),
+                options["miss_ratio"],
+                options["seed"],
+            )
+            label = options["scenario"]
+        if not traffic:
+            raise CommandError("No requests to send.")
+
+        warmup, measured = traffic[:options["warmup"]], traffic[options["warmup"]:] or traffic
+        stub = None
+        with ExitStack() as stack:
+            # A throwaway user to sign the token, deleted when the run ends
+            user = User.objects.create_user(f"benchmark-{uuid.uuid4().hex}")
+            stack.callback(user.delete)
+            token = AccessToken.for_user(user)
+            token.set_exp(lifetime=timedelta(hours=12))
+            token = str(token)
+
+            if options["url"]:
+                def transport_factory():
+                    return runner.HttpTransport(token, options["url"])
+            else:
+                def transport_factory():
+                    return runner.InProcessTransport(token)
+
+            if not options["real_upstream"] and not options["url"]:
+                stub = StubUpstreamServer(country_codes(options["countries"]), options["upstream_latency"]).start()
+                stack.callback(stub.stop)
+                stack.enter_context(upstreams_at(stub.url))
+            stack.enter_context(override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]))
+            stack.callback(request_counter.flush)
+
+            if warmup:
+                runner.run(warmup, transport_factory, options["concurrency"])
+            report = runner.run(measured, transport_factory, options["concurrency"])
+
+        report = {"scenario": label, **report}
+        if stub:
+            report["upstream_calls"] = stub.request_count
+        self.write_report(report)
+        if options["json"]:
+            with open(options["json"], "w", encoding="utf-8") as output:
+                json.dump(report, output, indent=2)
+
+    def write_report(self, report: dict):
+        latency = report["latency_ms"]
+        self.stdout.write(f"Scenario:      {report['scenario']}")
+        self.stdout.write(f"Requests:      {report['requests']} ({report['concurrency']} concurrent)")
+        self.stdout.write(f"Throughput:    {report['throughput_rps']} req/s")
+        self.stdout.write(
+            f"Latency (ms):  p50 {latency['p50']}  p95 {latency['p95']}  p99 {latency['p99']}  max {latency['max']}"
+        )
+        if report["queries_per_request"] is not None:
+            self.stdout.write(f"Queries/req:   {report['queries_per_request']}")
+        self.stdout.write(f"Statuses:      {report['statuses']}")
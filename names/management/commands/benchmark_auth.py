@@ -0,0 +1,33 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from names.benchmarks.authentication import compare
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the cost per request of JWT authentication in each NAMES_AUTH mode with the original "
+        "JWTAuthentication, against the configured database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--username", help="User to issue the token for, the first user by default.")
+        parser.add_argument("--requests", type=int, default=1000, help="Requests authenticated per round.")
+        parser.add_argument("--repeat", type=int, default=5, help="Rounds per backend, the best one is reported.")
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.order_by("pk")
+        if options["username"]:
+            users = users.filter(username=options["username"])
+        user = users.first()
+        if user is None:
+            raise CommandError("No user to issue a token for, create one with createsuperuser first.")
+
+        report = compare(user, options["requests"], options["repeat"])
+        baseline = next(iter(report.values()))["us_per_request"]
+        self.stdout.write(f"{options['requests']} requests, best of {options['repeat']} rounds")
+        for label, result in report.items():
+            self.stdout.write(
+                f"{label:<24} {result['us_per_request']:8.1f} us/request  {baseline / result['us_per_request']:5.1f}x  "
+                f"{result['queries_per_request']:.3f} queries/request"
+            )
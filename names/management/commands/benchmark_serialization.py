@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from names.benchmarks.serialization import compare
+from names.models import NameCountryProbability
+from names.services.lookup import names_with_predictions
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the cost per name of the original NameSerializer rendering with the fast serialization path, "
+        "on names with predictions from the database (e.g. seeded with seed_benchmark_data)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--names", type=int, default=1000, help="Number of names to serialize.")
+        parser.add_argument("--repeat", type=int, default=5, help="Rounds per variant, the best one is reported.")
+
+    def handle(self, *args, **options):
+        name_ids = NameCountryProbability.objects.values_list("name_id", flat=True).distinct()[:options["names"]]
+        name_objs = list(names_with_predictions().filter(pk__in=list(name_ids)))
+        if not name_objs:
+            raise CommandError("No names with predictions, run seed_benchmark_data first.")
+
+        report = compare(name_objs, options["repeat"])
+        baseline = next(iter(report.values()))["us_per_name"]
+        self.stdout.write(f"{len(name_objs)} names, best of {options['repeat']} rounds")
+        for label, result in report.items():
+            output = "same bytes" if result["same_bytes"] else "same values" if result["same_values"] else "DIFFERENT"
+            self.stdout.write(
+                f"{label:<32} {result['us_per_name']:8.1f} us/name  {baseline / result['us_per_name']:5.1f}x  {output}"
+            )
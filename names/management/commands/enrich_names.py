@@ -0,0 +1,87 @@
+import json
+import os
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from names.services.enrichment import chunked, enrich_chunk, load_checkpoint, read_names, save_checkpoint
+from names.services.external_apis import nationalize_quota
+from names.services.http_client import RateLimiter
+from names.services.quota import background_priority
+
+
+class Command(BaseCommand):
+    help = (
+        "Enrich names from a CSV or JSONL file with nationalize.io predictions and write JSONL results. "
+        "Progress is checkpointed after every chunk so an interrupted run can be resumed. "
+        "Upstream calls run at background priority and the run stops when only the interactive "
+        "reserve of the nationalize.io quota is left."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", help="CSV file with a header row, or JSONL file.")
+        parser.add_argument("--output", required=True, help="JSONL file to write results to.")
+        parser.add_argument("--format", choices=["csv", "jsonl"], help="Input format, guessed from the extension by default.")
+        parser.add_argument("--field", default="name", help="CSV column or JSONL key holding the name.")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Names looked up and written per batch.")
+        parser.add_argument(
+            "--workers", type=int, default=settings.NAMES_BATCH_UPSTREAM_WORKERS,
+            help="Concurrent nationalize.io calls.",
+        )
+        parser.add_argument("--rate", type=float, default=5.0, help="Max nationalize.io calls per second, 0 for no limit.")
+        parser.add_argument("--checkpoint", help="Checkpoint file, <output>.checkpoint by default.")
+        parser.add_argument("--resume", action="store_true", help="Continue from the checkpoint of an interrupted run.")
+
+    def handle(self, *args, **options):
+        input_path = os.path.abspath(options["input"])
+        fmt = options["format"] or ("csv" if input_path.lower().endswith(".csv") else "jsonl")
+        checkpoint_path = options["checkpoint"] or f"{options['output']}.checkpoint"
+
+        checkpoint = load_checkpoint(checkpoint_path)
+        if checkpoint and not options["resume"]:
+            raise CommandError(f"Checkpoint {checkpoint_path} exists, pass --resume or delete it.")
+        if checkpoint and checkpoint["input"] != input_path:
+            raise CommandError(f"Checkpoint {checkpoint_path} belongs to {checkpoint['input']}.")
+        records = checkpoint["records"] if checkpoint else 0
+
+        throttle = RateLimiter(options["rate"]).wait
+        processed = 0
+        started = time.monotonic()
+        with open(options["output"], "a" if checkpoint else "w", encoding="utf-8") as output:
+            if checkpoint:
+                # Drop results written after the last checkpoint, they are produced again
+                output.truncate(checkpoint["output_bytes"])
+                self.stdout.write(f"Resuming after {records} records")
+
+            try:
+                names = islice(read_names(input_path, fmt, options["field"]), records, None)
+                for chunk in chunked(names, options["chunk_size"]):
+                    if nationalize_quota.is_low():
+                        self.stdout.write(self.style.WARNING(
+                            f"Stopped after {records} records: the nationalize.io quota is down to the "
+                            "interactive reserve. Run again with --resume once it resets."
+                        ))
+                        return
+                    with background_priority():
+                        results = enrich_chunk(chunk, options["workers"], throttle)
+                    output.writelines(json.dumps(result) + "\n" for result in results)
+                    output.flush()
+
+                    records += len(chunk)
+                    processed += len(results)
+                    save_checkpoint(
+                        checkpoint_path,
+                        {"input": input_path, "records": records, "output_bytes": output.tell()},
+                    )
+                    self.stdout.write(f"{records} records, {processed / (time.monotonic() - started):.1f} names/s")
+            except ValueError as error:
+                raise CommandError(f"Could not read {input_path}: {error}")
+
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Enriched {processed} names in {elapsed:.1f}s ({processed / max(elapsed, 1e-9):.1f} names/s)"
+        ))
@@ -0,0 +1,37 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from names.benchmarks.plans import explain, hot_path_queries
+
+
+class Command(BaseCommand):
+    help = (
+        "Show the PostgreSQL plans of the hot-path queries, flagging sequential scans. "
+        "Run against a database seeded with seed_benchmark_data to check index usage at scale."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--analyze", action="store_true", help="Execute the queries and report their run time.")
+        parser.add_argument("--json", help="Also write the plans to this file.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Query plans are only supported on PostgreSQL.")
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        report = {}
+        for label, queryset in hot_path_queries().items():
+            plan = report[label] = explain(queryset, options["analyze"])
+            marker = self.style.ERROR("SEQ SCAN") if plan["seq_scan"] else self.style.SUCCESS("index")
+            timing = f", {plan['execution_ms']:.2f} ms" if plan["execution_ms"] is not None else ""
+            self.stdout.write(f"{label:<24} {marker}  cost {plan['total_cost']:.0f}{timing}")
+            for scan in plan["scans"]:
+                self.stdout.write(f"    {scan}")
+
+        if options["json"]:
+            with open(options["json"], "w", encoding="utf-8") as output:
+                json.dump(report, output, indent=2)
@@ -0,0 +1,26 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from names.services.snapshot import write_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Write every name with predictions and the country table to a compact, indexed snapshot file. "
+        "Nodes with NAMES_SNAPSHOT_PATH set serve lookups from it without a database connection "
+        "and pick up a new file as soon as it is swapped in."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="Snapshot file, replaced atomically.")
+        parser.add_argument("--chunk-size", type=int, default=10000, help="Rows fetched from the database at a time.")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        count = write_snapshot(options["output"], options["chunk_size"])
+        size = os.path.getsize(options["output"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {count} names ({size / 1e6:.1f} MB) to {options['output']} in {time.monotonic() - started:.1f}s"
+        ))
@@ -0,0 +1,31 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from names.models import Country
+from names.services.countries import upsert_countries
+from names.services.external_apis import get_all_countries
+
+
+class Command(BaseCommand):
+    help = "Bulk-load the full country catalogue from REST Countries /v3.1/all or a JSON snapshot of it."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--file", help="Path to a JSON snapshot in the /v3.1/all format instead of the live API.")
+        parser.add_argument("--if-empty", action="store_true", help="Do nothing if countries are already loaded.")
+
+    def handle(self, *args, **options):
+        if options["if_empty"] and Country.objects.exists():
+            self.stdout.write("Countries already loaded, skipping")
+            return
+
+        if options["file"]:
+            with open(options["file"], encoding="utf-8") as snapshot:
+                payload = json.load(snapshot)
+        else:
+            payload = get_all_countries()
+            if not payload:
+                raise CommandError("Could not fetch countries from REST Countries.")
+
+        loaded = upsert_countries(payload)
+        self.stdout.write(self.style.SUCCESS(f"Loaded {loaded} countries"))
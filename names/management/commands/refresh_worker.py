@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from names.services.refresh_queue import process_refresh_tasks
+
+
+class Command(BaseCommand):
+    help = "Refresh stale names queued by lookups in stale-while-revalidate mode."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100, help="Names refreshed per batch.")
+        parser.add_argument("--interval", type=float, default=1.0, help="Seconds to sleep when the queue is empty.")
+        parser.add_argument("--once", action="store_true", help="Drain the queue once and exit.")
+
+    def handle(self, *args, **options):
+        while True:
+            processed = process_refresh_tasks(options["batch_size"])
+            if processed:
+                self.stdout.write(f"Refreshed {processed} names")
+                continue
+            if options["once"]:
+                return
+            time.sleep(options["interval"])
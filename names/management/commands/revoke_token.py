@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import UntypedToken
+
+from names.services.token_denylist import token_denylist
+
+
+class Command(BaseCommand):
+    help = (
+        "Revoke access or refresh tokens: the API rejects them until they expire, in every NAMES_AUTH mode. "
+        "Other workers pick the revocation up within NAMES_AUTH_DENYLIST_CHECK_INTERVAL seconds."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("tokens", nargs="+", help="Encoded JWTs to revoke.")
+
+    def handle(self, *args, **options):
+        for raw_token in options["tokens"]:
+            try:
+                token = UntypedToken(raw_token)
+            except TokenError as e:
+                raise CommandError(f"Not a valid token: {e}")
+            token_denylist.revoke(token[api_settings.JTI_CLAIM], token["exp"])
+            self.stdout.write(self.style.SUCCESS(f"Revoked {token[api_settings.JTI_CLAIM]}"))
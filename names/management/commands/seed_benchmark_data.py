@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from names.benchmarks import datasets
+
+
+class Command(BaseCommand):
+    help = "Insert synthetic names, countries and predictions for benchmarks. Use a dedicated database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--names", type=int, default=10000, help="Number of names, e.g. 10000 to 10000000.")
+        parser.add_argument(
+            "--countries", type=int, default=250, help=f"Number of countries, at most {datasets.MAX_COUNTRIES}."
+        )
+        parser.add_argument("--chunk-size", type=int, default=10000, help="Names inserted per bulk statement.")
+        parser.add_argument("--clear", action="store_true", help="Delete existing benchmark names first.")
+        parser.add_argument(
+            "--force", action="store_true", help="Overwrite real countries whose codes the synthetic ones reuse."
+        )
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            self.stdout.write(f"Deleted {datasets.clear()} benchmark names")
+
+        try:
+            datasets.seed(
+                options["names"],
+                options["countries"],
+                options["chunk_size"],
+                progress=lambda done: self.stdout.write(f"Seeded {done} names"),
+                force=options["force"],
+            )
+        except ValueError as error:
+            raise CommandError(f"{error}. Use a dedicated database, or pass --force.")
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {options['names']} names across {min(options['countries'], datasets.MAX_COUNTRIES)} countries"
+        ))
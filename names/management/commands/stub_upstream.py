@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from names.benchmarks.datasets import country_codes
+from names.benchmarks.stub_upstream import StubUpstreamServer
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve synthetic nationalize.io and REST Countries responses for benchmarking a running server. "
+        "Point NATIONALIZE_API_URL and RESTCOUNTRIES_API_URL at it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--port", type=int, default=9000)
+        parser.add_argument("--latency", type=float, default=0.05, help="Seconds added to every response.")
+        parser.add_argument("--countries", type=int, default=250, help="Number of synthetic countries predicted.")
+
+    def handle(self, *args, **options):
+        server = StubUpstreamServer(country_codes(options["countries"]), options["latency"], options["port"])
+        self.stdout.write(f"Stub upstream listening on {server.url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
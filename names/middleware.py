@@ -0,0 +1,54 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from names.services.metrics import DB_QUERIES, DB_TIME, REQUEST_LATENCY, RequestTimings, current_timings
+
+
+class MetricsMiddleware:
+    """
+    Records per-endpoint latency, database queries and time for every request, and reports
+    the request's database, upstream, cache and serialization timings in a Server-Timing header.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        return self.finish(request, response, timings, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        return self.finish(request, response, timings, time.perf_counter() - started)
+
+    def finish(self, request, response, timings, total: float):
+        match = request.resolver_match
+        view = (match.url_name or match.view_name) if match else "unmatched"
+        REQUEST_LATENCY.labels(view, request.method, response.status_code).observe(total)
+        DB_QUERIES.labels(view).observe(timings.db_queries)
+        DB_TIME.labels(view).observe(timings.db_time)
+        if settings.NAMES_SERVER_TIMING:
+            response["Server-Timing"] = timings.server_timing(total)
+        return response
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('names', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NameRefreshTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('enqueued_at', models.DateTimeField(auto_now_add=True)),
+                ('name', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='refresh_task', to='names.name')),
+            ],
+        ),
+    ]
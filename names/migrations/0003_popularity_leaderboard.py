@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:06
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_request_counts(apps, schema_editor):
+    Name = apps.get_model('names', 'Name')
+    NameCountryProbability = apps.get_model('names', 'NameCountryProbability')
+    NameCountryProbability.objects.update(
+        request_count=Subquery(Name.objects.filter(pk=OuterRef('name_id')).values('request_count')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('names', '0002_namerefreshtask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='namecountryprobability',
+            name='request_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(copy_request_counts, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='namecountryprobability',
+            index=models.Index(fields=['country', '-request_count', 'name'], include=('probability',), name='names_popularity_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:08
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_refreshed_at(apps, schema_editor):
+    # Until now last_accessed_at doubled as the freshness timestamp
+    Name = apps.get_model('names', 'Name')
+    Name.objects.update(refreshed_at=F('last_accessed_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('names', '0003_popularity_leaderboard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='name',
+            name='refreshed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(copy_refreshed_at, migrations.RunPython.noop),
+    ]
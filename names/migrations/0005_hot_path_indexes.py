@@ -0,0 +1,79 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:21
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('names', '0004_name_refreshed_at'),
+    ]
+
+    operations = [
+        # Comma-joined alpha-3 codes become a varchar(3)[] in place
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    sql=(
+                        "ALTER TABLE names_country ALTER COLUMN borders TYPE varchar(3)[] "
+                        "USING coalesce(string_to_array(NULLIF(borders, ''), ','), '{}')::varchar(3)[]; "
+                        "ALTER TABLE names_country ALTER COLUMN borders SET DEFAULT '{}'"
+                    ),
+                    reverse_sql=(
+                        "ALTER TABLE names_country ALTER COLUMN borders DROP DEFAULT; "
+                        "ALTER TABLE names_country ALTER COLUMN borders TYPE text "
+                        "USING array_to_string(borders, ',')"
+                    ),
+                ),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='country',
+                    name='borders',
+                    field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=3), blank=True, default=list, size=None),
+                ),
+            ],
+        ),
+        # Only drop the redundant single-column indexes, without re-validating the foreign keys
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    sql=(
+                        'DROP INDEX IF EXISTS "names_namecountryprobability_country_id_6774a45f"; '
+                        'DROP INDEX IF EXISTS "names_namecountryprobability_name_id_4d182e07"'
+                    ),
+                    reverse_sql=(
+                        'CREATE INDEX "names_namecountryprobability_country_id_6774a45f" '
+                        'ON "names_namecountryprobability" ("country_id"); '
+                        'CREATE INDEX "names_namecountryprobability_name_id_4d182e07" '
+                        'ON "names_namecountryprobability" ("name_id")'
+                    ),
+                ),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='namecountryprobability',
+                    name='country',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='name_probabilities', to='names.country'),
+                ),
+                migrations.AlterField(
+                    model_name='namecountryprobability',
+                    name='name',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='country_probabilities', to='names.name'),
+                ),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='namerefreshtask',
+            name='enqueued_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AddIndex(
+            model_name='name',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='text_pattern_ops'), name='names_name_upper_idx'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+import re
+import unicodedata
+from collections import defaultdict
+
+from django.db import migrations
+
+
+# A frozen copy of names.services.normalization as of this migration, so that later changes
+# to the normalization do not change what this migration does
+FOLDED_LETTERS = str.maketrans({
+    'ł': 'l', 'ø': 'o', 'đ': 'd', 'ð': 'd', 'ı': 'i', 'þ': 'th', 'æ': 'ae', 'œ': 'oe',
+    '’': "'", '‘': "'", 'ʼ': "'", '`': "'",
+})
+EDGES = re.compile(r'^[\W_]+|[\W_]+$')
+LATIN_END = '\u0250'
+
+
+def fold_accents(value):
+    folded = []
+    for char in unicodedata.normalize('NFD', value):
+        if unicodedata.combining(char) and folded and folded[-1] < LATIN_END:
+            continue
+        folded.append(char)
+    return unicodedata.normalize('NFC', ''.join(folded))
+
+
+def normalize_name(value):
+    value = unicodedata.normalize('NFKC', value).casefold()
+    value = fold_accents(value).translate(FOLDED_LETTERS)
+    return EDGES.sub('', ' '.join(value.split()))
+
+
+def normalize_existing_names(apps, schema_editor):
+    # Names used to be stored lowercased only: merge the variants of each name into its
+    # normalized row, adding up their request counts, and drop the ones that are not valid names
+    Name = apps.get_model('names', 'Name')
+    NameCountryProbability = apps.get_model('names', 'NameCountryProbability')
+    max_length = Name._meta.get_field('name').max_length
+
+    def is_valid_name(name):
+        return 0 < len(name) <= max_length
+
+    variants = defaultdict(list)
+    for pk, name in Name.objects.values_list('pk', 'name').iterator(chunk_size=10000):
+        normalized = normalize_name(name)
+        if normalized != name:
+            variants[normalized].append(pk)
+
+    for normalized, pks in variants.items():
+        rows = list(Name.objects.filter(pk__in=pks).order_by('-request_count', 'pk'))
+        if not is_valid_name(normalized):
+            Name.objects.filter(pk__in=pks).delete()
+            continue
+
+        target = Name.objects.filter(name=normalized).first()
+        if target is None:
+            target, rows = rows[0], rows[1:]
+            target.name = normalized
+        target.request_count += sum(row.request_count for row in rows)
+        Name.objects.filter(pk__in=[row.pk for row in rows]).delete()
+        target.save(update_fields=['name', 'request_count'])
+        NameCountryProbability.objects.filter(name_id=target.pk).update(request_count=target.request_count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('names', '0005_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_existing_names, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,7 @@
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import OpClass
 from django.db import models
+from django.db.models.functions import Upper
 
 
 class Country(models.Model):
@@ -15,7 +18,7 @@ class Country(models.Model):
     flag_svg = models.URLField(blank=True)
     coat_of_arms_png = models.URLField(blank=True)
     coat_of_arms_svg = models.URLField(blank=True)
-    borders = models.TextField(blank=True)
+    borders = ArrayField(models.CharField(max_length=3), blank=True, default=list)
     independent = models.BooleanField(null=True)
 
     def __str__(self):
@@ -23,23 +26,63 @@ class Country(models.Model):
 
 
 class Name(models.Model):
-    """Stores each unique name with last accessed timestamp and request count."""
+    """
+    Stores each unique name with its request count, the time it was last requested
+    and the time its predictions were last fetched (None until the first fetch).
+    """
     name = models.CharField(max_length=64, unique=True)
     last_accessed_at = models.DateTimeField(auto_now=True)
+    refreshed_at = models.DateTimeField(null=True, blank=True)
     request_count = models.PositiveIntegerField(default=0)
 
+    class Meta:
+        indexes = [
+            # Serves case-insensitive exact and prefix matches (iexact / istartswith, e.g. admin search)
+            models.Index(OpClass(Upper("name"), name="text_pattern_ops"), name="names_name_upper_idx"),
+        ]
+
     def __str__(self):
         return self.name
 
 
 class NameCountryProbability(models.Model):
-    """Links a name to a country with a probability score from Nationalize.io."""
-    name = models.ForeignKey(Name, on_delete=models.CASCADE, related_name="country_probabilities")
-    country = models.ForeignKey(Country, on_delete=models.CASCADE, related_name="name_probabilities")
+    """
+    Links a name to a country with a probability score from Nationalize.io.
+    The name's request count is copied here so that each country's leaderboard is read from one index.
+    """
+    # Both foreign keys lead a composite index below, so they need no single-column index of their own
+    name = models.ForeignKey(Name, on_delete=models.CASCADE, related_name="country_probabilities", db_index=False)
+    country = models.ForeignKey(Country, on_delete=models.CASCADE, related_name="name_probabilities", db_index=False)
     probability = models.FloatField()
+    request_count = models.PositiveIntegerField(default=0)
 
     class Meta:
         unique_together = ("name", "country")
+        indexes = [
+            models.Index(
+                fields=["country", "-request_count", "name"],
+                include=["probability"],
+                name="names_popularity_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name.name} → {self.country.alpha2_code}: {self.probability}"
+
+
+class NameRefreshTask(models.Model):
+    """Queued background refresh of a stale name, consumed by the refresh_worker command."""
+    name = models.OneToOneField(Name, on_delete=models.CASCADE, related_name="refresh_task")
+    enqueued_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"refresh {self.name.name}"
+
+
+class RevokedToken(models.Model):
+    """A revoked JWT, by its jti claim. Kept until the token would have expired anyway."""
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.jti
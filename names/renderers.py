@@ -0,0 +1,21 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # the optional `fast` extra is not installed
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer backed by orjson when it is installed, with the standard renderer as fallback.
+    Output is compact like JSONRenderer's. The browsable API's indented output still goes through the standard renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=self.encoder_class().default)
+        # Same escaping as JSONRenderer, these are valid JSON but not valid JavaScript
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
@@ -0,0 +1,31 @@
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from drf_spectacular.drainage import set_override
+from drf_spectacular.extensions import OpenApiSerializerExtension
+from drf_spectacular.plumbing import build_basic_type, build_object_type
+from drf_spectacular.types import OpenApiTypes
+
+from names.authentication import DenylistJWTAuthentication
+
+
+class CompactNameSerializerExtension(OpenApiSerializerExtension):
+    """A compact result is a map of alpha-2 codes to probabilities, which a serializer cannot declare."""
+
+    target_class = "names.serializers.CompactNameSerializer"
+
+    def map_serializer(self, auto_schema, direction):
+        return build_object_type(
+            properties={},
+            additionalProperties=build_basic_type(OpenApiTypes.DOUBLE),
+            description="{alpha2_code: probability}",
+        )
+
+
+class DenylistJWTScheme(SimpleJWTScheme):
+    """The JWT authentication classes of names.authentication take the same bearer tokens as simplejwt's."""
+
+    target_class = "names.authentication.DenylistJWTAuthentication"
+    match_subclasses = True
+
+
+# The subclasses differ only in how the user is loaded, so they are one "jwtAuth" scheme
+set_override(DenylistJWTAuthentication, "suppress_collision_warning", True)
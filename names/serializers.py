@@ -1,5 +1,13 @@
+import json
+from functools import lru_cache
+
+from django.conf import settings
+from drf_spectacular.utils import PolymorphicProxySerializer, extend_schema_field
 from rest_framework import serializers
 from .models import Name, Country, NameCountryProbability
+from .renderers import FastJSONRenderer
+from names.services.country_registry import country_registry
+from names.services.normalization import NAME_MAX_LENGTH, normalize_name
 
 
 class CountrySerializer(serializers.ModelSerializer):
@@ -23,8 +31,22 @@ class CountrySerializer(serializers.ModelSerializer):
         ]
 
 
+@extend_schema_field(CountrySerializer)
+class RegisteredCountryField(serializers.Field):
+    """Renders a country FK from the pre-serialized country registry instead of a Country row."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("source", "country_id")
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, country_id):
+        record = country_registry.get_by_pk(country_id)
+        return record.data if record is not None else None
+
+
 class NameCountryProbabilitySerializer(serializers.ModelSerializer):
-    country = CountrySerializer()
+    country = RegisteredCountryField()
 
     class Meta:
         model = NameCountryProbability
@@ -42,6 +64,181 @@ class NameSerializer(serializers.ModelSerializer):
         fields = [
             "name",
             "last_accessed_at",
+            "refreshed_at",
             "request_count",
             "country_probabilities",
         ]
+
+
+datetime_field = serializers.DateTimeField()
+
+
+def name_data(name_obj) -> dict:
+    """
+    Plain-dict equivalent of NameSerializer(name_obj).data for the lookup paths, several times cheaper.
+    Predictions must be prefetched; countries come pre-serialized from the country registry.
+    """
+    return {
+        "name": name_obj.name,
+        "last_accessed_at": datetime_field.to_representation(name_obj.last_accessed_at),
+        "refreshed_at": datetime_field.to_representation(name_obj.refreshed_at),
+        "request_count": name_obj.request_count,
+        "country_probabilities": [
+            {"country": record.data, "probability": link.probability}
+            for record, link in country_registry.with_records(name_obj.country_probabilities.all())
+        ],
+    }
+
+
+def compact_data(name_obj) -> dict:
+    """
+    Compact lookup result: {alpha2_code: probability} of a name's predictions, without country payloads.
+    Predictions must be prefetched.
+    """
+    return {
+        record.alpha2_code: link.probability
+        for record, link in country_registry.with_records(name_obj.country_probabilities.all())
+    }
+
+
+class CompactNameSerializer(serializers.Serializer):
+    """Documents a compact=1 result, {alpha2_code: probability}; see names.schema for its schema."""
+
+
+def shape_data(data: dict, compact: bool, fields: tuple = None) -> dict:
+    """Apply a lookup format to a name_data dict."""
+    if compact:
+        return {link["country"]["alpha2_code"]: link["probability"] for link in data["country_probabilities"]}
+    if fields is None:
+        return data
+    return {
+        **data,
+        "country_probabilities": [
+            {"country": {field: link["country"][field] for field in fields}, "probability": link["probability"]}
+            for link in data["country_probabilities"]
+        ],
+    }
+
+
+@lru_cache(maxsize=settings.NAMES_RESPONSE_CACHE["PROJECTION_MAX_SIZE"])
+def project_payload(payload: bytes, compact: bool, fields: tuple = None) -> bytes:
+    """
+    Render a format of a rendered full result. Memoized on the payload, so a cached response is parsed
+    once per format; a refreshed name renders to a new payload and gets new entries.
+    """
+    return FastJSONRenderer().render(shape_data(json.loads(payload), compact, fields))
+
+
+class LookupFormatSerializer(serializers.Serializer):
+    """
+    Query parameters selecting the shape of lookup results: `compact=1` for {alpha2_code: probability},
+    or `fields=name,region` for only these country fields (alpha2_code is always included).
+    Without either, results are the full name_data payload.
+    """
+
+    compact = serializers.BooleanField(default=False)
+    fields = serializers.CharField(required=False)
+
+    def validate_fields(self, value):
+        fields = {field.strip() for field in value.split(",") if field.strip()}
+        unknown = fields - set(CountrySerializer.Meta.fields)
+        if unknown:
+            raise serializers.ValidationError(f"Unknown country fields: {', '.join(sorted(unknown))}.")
+        return tuple(field for field in CountrySerializer.Meta.fields if field in fields or field == "alpha2_code")
+
+    @property
+    def is_full(self) -> bool:
+        return not self.validated_data["compact"] and "fields" not in self.validated_data
+
+    def shape(self, data: dict) -> dict:
+        """Apply the format to a name_data dict."""
+        return shape_data(data, self.validated_data["compact"], self.validated_data.get("fields"))
+
+    def shape_name(self, name_obj) -> dict:
+        """Formatted result of a prefetched name. Compact results skip the country payloads altogether."""
+        if self.validated_data["compact"]:
+            return compact_data(name_obj)
+        return self.shape(name_data(name_obj))
+
+    def shape_results(self, names):
+        """Formatted batch results: a list of results, or one {name: {alpha2_code: probability}} dict if compact."""
+        if self.validated_data["compact"]:
+            return {name_obj.name: compact_data(name_obj) for name_obj in names}
+        return [self.shape_name(name_obj) for name_obj in names]
+
+    def shape_payload(self, payload: bytes, compact_payload: bytes = None) -> bytes:
+        """
+        Formatted result from the rendered full result of a name, and its rendered compact result if there
+        is one. Other formats come from project_payload.
+        """
+        if self.is_full:
+            return payload
+        if self.validated_data["compact"] and compact_payload is not None:
+            return compact_payload
+        return project_payload(payload, self.validated_data["compact"], self.validated_data.get("fields"))
+
+
+class NormalizedNameField(serializers.CharField):
+    """A name in its normalized form, see normalize_name. Values without letters or digits are rejected."""
+
+    default_error_messages = {"invalid_name": "Not a valid name."}
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("max_length", NAME_MAX_LENGTH)
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        name = normalize_name(super().to_internal_value(data))
+        if not name:
+            self.fail("invalid_name")
+        return name
+
+
+class NameBatchRequestSerializer(serializers.Serializer):
+    names = serializers.ListField(
+        child=NormalizedNameField(),
+        allow_empty=False,
+        max_length=settings.NAMES_BATCH_MAX_SIZE,
+    )
+
+
+class NameBatchResponseSerializer(serializers.Serializer):
+    results = NameSerializer(many=True)
+    not_found = serializers.ListField(child=serializers.CharField())
+    unavailable = serializers.ListField(child=serializers.CharField())
+
+
+class NameCompactBatchResponseSerializer(serializers.Serializer):
+    results = serializers.DictField(child=CompactNameSerializer())
+    not_found = serializers.ListField(child=serializers.CharField())
+    unavailable = serializers.ListField(child=serializers.CharField())
+
+
+# Lookup and batch responses: full (or fields=) results, or compact ones with compact=1
+NAME_LOOKUP_RESPONSE = PolymorphicProxySerializer(
+    component_name="NameLookupResult",
+    serializers=[NameSerializer, CompactNameSerializer],
+    resource_type_field_name=None,
+)
+NAME_BATCH_RESPONSE = PolymorphicProxySerializer(
+    component_name="NameBatchResult",
+    serializers=[NameBatchResponseSerializer, NameCompactBatchResponseSerializer],
+    resource_type_field_name=None,
+)
+
+
+class PopularNamesQuerySerializer(serializers.Serializer):
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=5)
+    offset = serializers.IntegerField(min_value=0, max_value=10000, default=0)
+    min_probability = serializers.FloatField(min_value=0, max_value=1, default=0.0)
+
+
+class NameExportQuerySerializer(serializers.Serializer):
+    country = serializers.CharField(required=False)
+    min_probability = serializers.FloatField(min_value=0, max_value=1, default=0.0)
+    updated_since = serializers.DateTimeField(required=False)
+
+
+class NameSuggestQuerySerializer(serializers.Serializer):
+    q = NormalizedNameField()
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
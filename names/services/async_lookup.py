@@ -0,0 +1,101 @@
+import asyncio
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from names.models import Name
+from names.services.countries import insert_countries, missing_country_codes, registered_countries
+from names.services.external_apis import (
+    aget_country_details,
+    aget_nationalize_batch,
+    aget_nationalize_data,
+    nationalize_quota,
+)
+from names.services.lookup import (
+    batch_chunks,
+    claim_refresh,
+    has_predictions,
+    mark_refreshed,
+    prediction_country_codes,
+    refresh_lock_key,
+    revalidates_in_background,
+    store_predictions,
+)
+from names.services.singleflight import AsyncSingleFlight, aadvisory_lock
+
+
+async_refresh_flight = AsyncSingleFlight()
+
+
+async def afresh_refreshed_at(name: str):
+    """Async version of lookup.fresh_refreshed_at."""
+    cutoff = timezone.now() - timedelta(seconds=settings.NAMES_SOFT_TTL)
+    return await Name.objects.filter(name=name, refreshed_at__gt=cutoff).values_list("refreshed_at", flat=True).afirst()
+
+
+async def ais_servable_stale(name_obj) -> bool:
+    """Async version of lookup.is_servable_stale: the quota state is read without blocking the event loop."""
+    if not name_obj.country_probabilities.all():
+        return False
+    return revalidates_in_background(name_obj) or await nationalize_quota.ais_low()
+
+
+async def aresolve_countries(codes) -> dict:
+    """Async version of resolve_countries. Unknown countries are fetched from REST Countries concurrently."""
+    codes = {code.upper() for code in codes}
+    missing = await sync_to_async(missing_country_codes)(codes)
+    if missing and settings.NAMES_FETCH_MISSING_COUNTRIES:
+        details = await asyncio.gather(*(aget_country_details(code) for code in missing))
+        await sync_to_async(insert_countries)(dict(zip(missing, details)))
+    return await sync_to_async(registered_countries)(codes)
+
+
+async def asave_predictions(predictions: dict) -> None:
+    """Async version of save_predictions."""
+    if not predictions:
+        return
+
+    countries = await aresolve_countries(prediction_country_codes(predictions))
+    await sync_to_async(store_predictions)(predictions, countries)
+
+
+async def arefresh_name(name_obj, query: str, has_stale_data: bool) -> bool | None:
+    """Async version of refresh_name, coalescing concurrent refreshes of a name on this event loop."""
+    return await async_refresh_flight.do(name_obj.name, _arefresh_name, name_obj, query, has_stale_data)
+
+
+async def _arefresh_name(name_obj, query: str, has_stale_data: bool) -> bool | None:
+    async with aadvisory_lock(refresh_lock_key(name_obj), wait=not has_stale_data) as acquired:
+        if not acquired:
+            return True
+
+        if not await sync_to_async(claim_refresh)(name_obj):
+            return await sync_to_async(has_predictions)(name_obj)
+
+        country_data = await aget_nationalize_data(query)
+        if country_data is None:
+            return None
+
+        if country_data:
+            await asave_predictions({name_obj: country_data})
+        await sync_to_async(mark_refreshed)(name_obj)
+        return bool(country_data)
+
+
+async def arefresh_names(name_objs) -> dict:
+    """Async version of refresh_names. All upstream chunks are requested concurrently."""
+    if not name_objs:
+        return {}
+
+    country_data = {}
+    chunks = batch_chunks([n.name for n in name_objs])
+    for data in await asyncio.gather(*(aget_nationalize_batch(chunk) for chunk in chunks)):
+        if data:
+            country_data.update(data)
+
+    answered = [n for n in name_objs if n.name in country_data]
+    await asave_predictions({n: country_data[n.name] for n in answered if country_data[n.name]})
+    await Name.objects.filter(pk__in=[n.pk for n in answered]).aupdate(refreshed_at=timezone.now())
+    return country_data
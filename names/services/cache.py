@@ -0,0 +1,196 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from names.services.metrics import record_cache
+
+
+class LocalLRUBackend:
+    """
+    Per-process LRU cache with a per-entry TTL and a bound on the number of entries.
+    Safe to share between the threads of a worker.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: object, ttl: float = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    async def aget(self, key: str):
+        return self.get(key)
+
+    async def aset(self, key: str, value: object, ttl: float = None):
+        self.set(key, value, ttl)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "size": len(self._entries)}
+
+
+class DjangoCacheBackend:
+    """
+    Shared cache tier on top of a configured Django cache alias (Redis, Memcached, ...).
+    Keys are hashed so any name is a valid key for every cache backend.
+    """
+
+    def __init__(self, alias: str, ttl: float, prefix: str = "names:lookup:v3:"):
+        self.alias = alias
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def make_key(self, key: str) -> str:
+        return self.prefix + hashlib.sha1(key.encode()).hexdigest()
+
+    def get(self, key: str):
+        value = self.cache.get(self.make_key(key))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: object, ttl: float = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl > 0:
+            self.cache.set(self.make_key(key), value, timeout=ttl)
+
+    async def aget(self, key: str):
+        value = await self.cache.aget(self.make_key(key))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def aset(self, key: str, value: object, ttl: float = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl > 0:
+            await self.cache.aset(self.make_key(key), value, timeout=ttl)
+
+    def delete_many(self, keys):
+        self.cache.delete_many([self.make_key(key) for key in keys])
+
+    def clear(self):
+        # The alias may hold unrelated data, so shared entries are left to expire
+        pass
+
+    def stats(self) -> dict:
+        # Evictions happen inside the cache server and are reported there
+        return {"hits": self.hits, "misses": self.misses, "evictions": 0}
+
+
+class ResponseCache:
+    """
+    Rendered lookup responses keyed by normalized name. Values are anything picklable,
+    see response_cache and negative_cache below.
+    Reads go through the backends in order and backfill the faster tiers on a hit.
+    `label` names the cache in the lookup metrics.
+    """
+
+    def __init__(self, backends, label: str = "response"):
+        self.backends = backends
+        self.label = label
+
+    @classmethod
+    def from_settings(cls, config: dict, label: str = "response", prefix: str = "names:lookup:v3:"):
+        backends = []
+        if config["LOCAL_MAX_SIZE"] > 0:
+            backends.append(LocalLRUBackend(config["LOCAL_MAX_SIZE"], config["LOCAL_TTL"]))
+        if config["SHARED_ALIAS"]:
+            backends.append(DjangoCacheBackend(config["SHARED_ALIAS"], config["SHARED_TTL"], prefix))
+        return cls(backends, label)
+
+    def get(self, name: str):
+        for index, backend in enumerate(self.backends):
+            value = backend.get(name)
+            if value is not None:
+                for faster in self.backends[:index]:
+                    faster.set(name, value)
+                record_cache(hit=True, cache=self.label)
+                return value
+        record_cache(hit=False, cache=self.label)
+        return None
+
+    def set(self, name: str, value: object, ttl: float = None):
+        for backend in self.backends:
+            backend.set(name, value, ttl)
+
+    async def aget(self, name: str):
+        for index, backend in enumerate(self.backends):
+            value = await backend.aget(name)
+            if value is not None:
+                for faster in self.backends[:index]:
+                    await faster.aset(name, value)
+                record_cache(hit=True, cache=self.label)
+                return value
+        record_cache(hit=False, cache=self.label)
+        return None
+
+    async def aset(self, name: str, value: object, ttl: float = None):
+        for backend in self.backends:
+            await backend.aset(name, value, ttl)
+
+    def invalidate(self, names):
+        names = list(names)
+        for backend in self.backends:
+            backend.delete_many(names)
+
+    def clear(self):
+        for backend in self.backends:
+            backend.clear()
+
+    def stats(self) -> dict:
+        return {type(backend).__name__: backend.stats() for backend in self.backends}
+
+
+# (refreshed at timestamp, rendered JSON, rendered compact JSON) tuples of fresh names.
+# The timestamp is the data version behind their ETags.
+response_cache = ResponseCache.from_settings(settings.NAMES_RESPONSE_CACHE)
+
+# Rendered 404 responses (bytes) of names nationalize.io has no data for. Upstream failures are never stored here.
+negative_cache = ResponseCache.from_settings(settings.NAMES_NEGATIVE_CACHE, "negative", "names:negative:")
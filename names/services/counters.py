@@ -0,0 +1,74 @@
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import DatabaseError
+
+from names.services.popularity import count_requests
+
+
+logger = logging.getLogger(__name__)
+
+
+class RequestCounter:
+    """
+    Write-behind request counters. Requests are tallied per name in memory and written
+    with one batched UPDATE per table once the flush interval has passed
+    or too many names are pending, so lookups never update a Name row themselves.
+    Counts that fail to flush are kept for the next attempt.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._last_flush = time.monotonic()
+
+    def record(self, names) -> bool:
+        """Count one request for each of `names`. Returns True if a flush is due."""
+        config = settings.NAMES_REQUEST_COUNTER
+        with self._lock:
+            self._pending.update(names)
+            return (
+                len(self._pending) >= config["MAX_PENDING"]
+                or time.monotonic() - self._last_flush >= config["FLUSH_INTERVAL"]
+            )
+
+    def flush(self) -> int:
+        """Write the pending counts. Returns the number of names written."""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._last_flush = time.monotonic()
+        if not pending:
+            return 0
+
+        try:
+            count_requests(pending)
+        except DatabaseError:
+            logger.exception("Failed to flush request counters for %d names", len(pending))
+            with self._lock:
+                self._pending.update(pending)
+            return 0
+        return len(pending)
+
+    def clear(self):
+        """Drop the pending counts without writing them."""
+        with self._lock:
+            self._pending.clear()
+            self._last_flush = time.monotonic()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+
+request_counter = RequestCounter()
+atexit.register(request_counter.flush)
+
+
+def count_request(names) -> None:
+    """Count a request for `names`, flushing the counters in this thread if due."""
+    if request_counter.record(names):
+        request_counter.flush()
@@ -0,0 +1,107 @@
+from django.conf import settings
+
+from names.models import Country
+from names.services.country_registry import country_registry
+from names.services.external_apis import get_country_details
+
+
+# Country columns filled from REST Countries, everything except the alpha-2 key
+DETAIL_FIELDS = [
+    "name",
+    "common_name",
+    "region",
+    "subregion",
+    "capital",
+    "latitude",
+    "longitude",
+    "flag_png",
+    "flag_svg",
+    "coat_of_arms_png",
+    "coat_of_arms_svg",
+    "borders",
+    "independent",
+]
+
+
+def country_fields(c_data: dict) -> dict:
+    """Map a REST Countries payload onto Country model fields."""
+    latlng = c_data.get("latlng") or [None, None]
+    return {
+        "name": c_data["name"]["official"],
+        "common_name": c_data["name"].get("common", ""),
+        "region": c_data.get("region", ""),
+        "subregion": c_data.get("subregion", ""),
+        "capital": (c_data.get("capital") or [""])[0],
+        "latitude": latlng[0],
+        "longitude": latlng[1],
+        "flag_png": c_data.get("flags", {}).get("png", ""),
+        "flag_svg": c_data.get("flags", {}).get("svg", ""),
+        "coat_of_arms_png": c_data.get("coatOfArms", {}).get("png", ""),
+        "coat_of_arms_svg": c_data.get("coatOfArms", {}).get("svg", ""),
+        "borders": c_data.get("borders") or [],
+        "independent": c_data.get("independent", None),
+    }
+
+
+def upsert_countries(payload: list) -> int:
+    """
+    Insert or update countries from a list of REST Countries payloads in a single statement.
+    Entries without an alpha-2 code are skipped. Returns the number of countries written.
+    """
+    countries = [
+        Country(alpha2_code=c_data["cca2"].upper(), **country_fields(c_data))
+        for c_data in payload
+        if c_data.get("cca2")
+    ]
+    Country.objects.bulk_create(
+        countries,
+        update_conflicts=True,
+        unique_fields=["alpha2_code"],
+        update_fields=DETAIL_FIELDS,
+    )
+    country_registry.invalidate()
+    return len(countries)
+
+
+def missing_country_codes(codes) -> list:
+    """
+    Return the upper-case codes that are not in the country registry.
+    The registry is reloaded first if another worker has inserted some of them since it was loaded.
+    """
+    missing = [code for code in codes if country_registry.get(code) is None]
+    if missing and Country.objects.filter(alpha2_code__in=missing).exists():
+        country_registry.clear()
+        missing = [code for code in missing if country_registry.get(code) is None]
+    return missing
+
+
+def insert_countries(details: dict) -> None:
+    """Insert countries from a dict of alpha2 code -> REST Countries payload (or None if unavailable)."""
+    new_countries = [
+        Country(alpha2_code=code, **country_fields(c_data))
+        for code, c_data in details.items()
+        if c_data
+    ]
+    if new_countries:
+        Country.objects.bulk_create(new_countries, ignore_conflicts=True)
+        country_registry.invalidate()
+
+
+def registered_countries(codes) -> dict:
+    """Return a dict of alpha2 code -> CountryRecord for the codes known to the registry."""
+    countries = {code: country_registry.get(code) for code in codes}
+    return {code: record for code, record in countries.items() if record is not None}
+
+
+def resolve_countries(codes) -> dict:
+    """
+    Return a dict of alpha2 code -> CountryRecord for the given codes from the country registry.
+    Unknown codes are fetched from REST Countries and inserted in bulk, unless
+    NAMES_FETCH_MISSING_COUNTRIES is off because the table is preloaded with load_countries.
+    Codes that cannot be resolved are left out.
+    """
+    codes = {code.upper() for code in codes}
+    missing = missing_country_codes(codes)
+    if missing and settings.NAMES_FETCH_MISSING_COUNTRIES:
+        insert_countries({code: get_country_details(code) for code in missing})
+    return registered_countries(codes)
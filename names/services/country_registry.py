@@ -0,0 +1,110 @@
+import threading
+import time
+from types import MappingProxyType
+
+from django.conf import settings
+from django.db import connections, router
+
+from names.models import Country
+
+
+class CountryRecord:
+    """A country as served by the API: its primary key, alpha-2 code and pre-serialized payload."""
+    __slots__ = ("pk", "alpha2_code", "data")
+
+    def __init__(self, pk: int, alpha2_code: str, data: dict):
+        self.pk = pk
+        self.alpha2_code = alpha2_code
+        self.data = data
+
+
+class CountryRegistry:
+    """
+    Read-only, process-wide copy of the Country table with O(1) lookup by alpha-2 code or pk.
+    The table is loaded once per worker. Every NAMES_COUNTRY_REGISTRY_CHECK_INTERVAL seconds a hash of the
+    table is compared with the one it was loaded at, so that changes made by any process, e.g. load_countries
+    or an admin edit, reach every worker; invalidate() reloads this worker straight away.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tables_loaded = None
+        self._version = None
+        self._checked_at = 0.0
+
+    def get(self, code: str):
+        """Return the CountryRecord for a case-insensitive alpha-2 code, or None."""
+        return self._tables()[0].get(code.upper())
+
+    def get_by_pk(self, pk: int):
+        """
+        Return the CountryRecord for a Country primary key, reloading once if it is not known yet.
+        Returns None for a country that no longer exists.
+        """
+        record = self._tables()[1].get(pk)
+        if record is None:
+            self.clear()
+            record = self._tables()[1].get(pk)
+        return record
+
+    def with_records(self, links):
+        """
+        (CountryRecord, link) pairs of prediction rows, leaving out the rows of countries deleted since
+        they were read: the delete cascades to those rows, so they are gone from the database as well.
+        """
+        for link in links:
+            record = self.get_by_pk(link.country_id)
+            if record is not None:
+                yield record, link
+
+    def invalidate(self):
+        """Drop the loaded table after a change made by this process. Other workers notice it on their next check."""
+        self.clear()
+
+    def clear(self):
+        """Drop the loaded table in this process only."""
+        with self._lock:
+            self._tables_loaded = None
+
+    def _tables(self):
+        """Return the (by_code, by_pk) mappings, loading them if needed."""
+        now = time.monotonic()
+        check_due = now - self._checked_at >= settings.NAMES_COUNTRY_REGISTRY_CHECK_INTERVAL
+        if self._tables_loaded is not None and check_due:
+            self._checked_at = now
+            if table_version() != self._version:
+                self.clear()
+
+        tables = self._tables_loaded
+        if tables is None:
+            with self._lock:
+                if self._tables_loaded is None:
+                    self._tables_loaded = self._load()
+                tables = self._tables_loaded
+        return tables
+
+    def _load(self):
+        from names.serializers import CountrySerializer
+
+        self._version = table_version()
+        self._checked_at = time.monotonic()
+        records = [
+            CountryRecord(country.pk, country.alpha2_code, dict(CountrySerializer(country).data))
+            for country in Country.objects.all()
+        ]
+        return (
+            MappingProxyType({record.alpha2_code.upper(): record for record in records}),
+            MappingProxyType({record.pk: record for record in records}),
+        )
+
+
+def table_version() -> str:
+    """Hash of every row of the Country table, a few hundred rows: changes with any insert, update or delete."""
+    connection = connections[router.db_for_read(Country)]
+    table = connection.ops.quote_name(Country._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT md5(coalesce(string_agg(c::text, ',' ORDER BY c.id), '')) FROM {table} c")
+        return cursor.fetchone()[0]
+
+
+country_registry = CountryRegistry()
@@ -0,0 +1,93 @@
+import csv
+import json
+import os
+from itertools import islice
+
+from names.models import Name
+from names.services.country_registry import country_registry
+from names.services.lookup import is_fresh, names_with_predictions, refresh_names
+from names.services.normalization import is_valid_name, normalize_name
+
+
+def read_names(path: str, fmt: str, field: str = "name"):
+    """
+    Yield one raw name per input record, streaming the file.
+    CSV files need a header row with `field`. JSONL lines are objects with `field` or plain JSON strings.
+    """
+    with open(path, newline="", encoding="utf-8") as source:
+        if fmt == "csv":
+            reader = csv.DictReader(source)
+            if field not in (reader.fieldnames or []):
+                raise ValueError(f"CSV header has no '{field}' column.")
+            for row in reader:
+                yield row[field] or ""
+            return
+
+        for line in source:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            yield (record.get(field) or "") if isinstance(record, dict) else str(record)
+
+
+def chunked(iterable, size: int):
+    """Yield lists of up to `size` items from any iterable."""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def enrich_chunk(raw_names: list, workers: int = None, throttle=None) -> list:
+    """
+    Enrich one chunk of names and return one result per distinct name, in input order.
+    Names already fresh in the database are not fetched again. Each result has the name,
+    a status (fresh, enriched, not_found, failed or invalid) and the predicted country codes.
+    """
+    keys = list(dict.fromkeys(normalize_name(name) for name in raw_names))
+    valid = [key for key in keys if is_valid_name(key)]
+
+    known = {n.name: n for n in names_with_predictions().filter(name__in=valid).only("id", "name", "refreshed_at")}
+    stale = [key for key in valid if key not in known or not is_fresh(known[key])]
+
+    fetched = {}
+    if stale:
+        Name.objects.bulk_create([Name(name=key) for key in stale if key not in known], ignore_conflicts=True)
+        fetched = refresh_names(list(Name.objects.filter(name__in=stale)), workers, throttle)
+
+    names = {n.name: n for n in names_with_predictions().filter(name__in=valid)}
+    stale = set(stale)
+    results = []
+    for key in keys:
+        if key not in names:
+            results.append({"name": key, "status": "invalid", "countries": []})
+            continue
+
+        links = sorted(names[key].country_probabilities.all(), key=lambda link: -link.probability)
+        countries = [
+            {"country": record.alpha2_code, "probability": link.probability}
+            for record, link in country_registry.with_records(links)
+        ]
+        if key not in stale:
+            result_status = "fresh"
+        elif key not in fetched:
+            result_status = "failed"
+        else:
+            result_status = "enriched" if countries else "not_found"
+        results.append({"name": key, "status": result_status, "countries": countries})
+    return results
+
+
+def load_checkpoint(path: str):
+    """Return the saved checkpoint dict, or None if there is none."""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as checkpoint:
+        return json.load(checkpoint)
+
+
+def save_checkpoint(path: str, state: dict) -> None:
+    """Atomically replace the checkpoint file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as checkpoint:
+        json.dump(state, checkpoint)
+    os.replace(tmp_path, path)
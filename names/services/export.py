@@ -0,0 +1,62 @@
+from asgiref.sync import sync_to_async
+from rest_framework.fields import DateTimeField
+
+from names.models import NameCountryProbability
+from names.renderers import FastJSONRenderer
+
+
+# Rows fetched per round trip of the server-side cursor, and written to the response at once
+CHUNK_SIZE = 2000
+
+
+def export_queryset(country_pk: int = None, min_probability: float = 0.0, updated_since=None):
+    """
+    Predictions to export, one row per name and country, in the order of the (name, country) unique index
+    so that the database streams them without sorting. `updated_since` keeps names refreshed since then.
+    """
+    rows = NameCountryProbability.objects.all()
+    if country_pk is not None:
+        rows = rows.filter(country_id=country_pk)
+    if min_probability > 0:
+        rows = rows.filter(probability__gte=min_probability)
+    if updated_since is not None:
+        rows = rows.filter(name__refreshed_at__gte=updated_since)
+    return rows.order_by("name_id", "country_id").values_list(
+        "name__name", "country__alpha2_code", "probability", "name__request_count", "name__refreshed_at",
+    )
+
+
+def ndjson_chunks(rows, chunk_size: int = CHUNK_SIZE):
+    """
+    Render rows of export_queryset as newline-delimited JSON, `chunk_size` lines per yielded chunk.
+    Rows are read through a server-side cursor, so memory use does not grow with the number of rows.
+    """
+    renderer = FastJSONRenderer()
+    datetime_field = DateTimeField()
+    lines = []
+    for name, country, probability, request_count, refreshed_at in rows.iterator(chunk_size=chunk_size):
+        lines.append(renderer.render({
+            "name": name,
+            "country": country,
+            "probability": probability,
+            "request_count": request_count,
+            "refreshed_at": datetime_field.to_representation(refreshed_at) if refreshed_at else None,
+        }))
+        if len(lines) == chunk_size:
+            yield b"\n".join(lines) + b"\n"
+            lines = []
+    if lines:
+        yield b"\n".join(lines) + b"\n"
+
+
+async def andjson_chunks(rows, chunk_size: int = CHUNK_SIZE):
+    """
+    Async version of ndjson_chunks for ASGI servers, which would otherwise read a sync iterator to the end
+    before sending anything. Each chunk is read in the request's database thread and sent before the next one.
+    """
+    chunks = ndjson_chunks(rows, chunk_size)
+    try:
+        while (chunk := await sync_to_async(next)(chunks, None)) is not None:
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close)()
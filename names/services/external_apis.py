@@ -1,18 +1,62 @@
-import requests
+import httpx
+from django.conf import settings
 from requests.exceptions import RequestException, Timeout, ConnectionError
 
+from names.services.http_client import AsyncUpstreamClient, CircuitOpenError, UpstreamClient
+from names.services.quota import QuotaExceededError, UpstreamQuota
+
+
+# nationalize.io accepts at most 10 ``name[]`` values per request
+NATIONALIZE_BATCH_SIZE = 10
+
+# REST Countries requires an explicit field list (at most 10) for /all
+RESTCOUNTRIES_ALL_FIELDS = "cca2,name,region,subregion,capital,latlng,flags,coatOfArms,borders,independent"
+
+# nationalize.io calls are budgeted by its daily quota; REST Countries has none
+nationalize_quota = UpstreamQuota.from_settings(settings.NATIONALIZE_QUOTA, "names:quota:nationalize:")
+nationalize_client = UpstreamClient.from_settings(settings.NATIONALIZE_API_URL, quota=nationalize_quota)
+restcountries_client = UpstreamClient.from_settings(settings.RESTCOUNTRIES_API_URL)
+
+# Async clients for the ASGI path share the circuit breakers of the sync clients
+async_nationalize_client = AsyncUpstreamClient.from_settings(
+    settings.NATIONALIZE_API_URL, breaker=nationalize_client.breaker, quota=nationalize_quota
+)
+async_restcountries_client = AsyncUpstreamClient.from_settings(
+    settings.RESTCOUNTRIES_API_URL, breaker=restcountries_client.breaker
+)
+
+
+async def aclose_clients():
+    """Close the pooled async upstream clients of the running event loop."""
+    await async_nationalize_client.aclose()
+    await async_restcountries_client.aclose()
+
 
 def get_nationalize_data(name: str):
     """
     Get country probability data for a given name from nationalize.io API.
-    Returns a list of country entries or None if request fails or returns no data.
+    Returns a list of country entries (empty if nationalize.io has no data) or None if the request fails.
     """
     try:
-        response = requests.get(f"https://api.nationalize.io/?name={name}", timeout=5)
+        response = nationalize_client.get("/", params={"name": name})
         if response.status_code != 200:
             return None
         return response.json().get("country")
-    except (RequestException, Timeout, ConnectionError):
+    except (RequestException, Timeout, ConnectionError, ValueError):
+        return None
+
+
+def get_nationalize_batch(names: list[str]):
+    """
+    Get country probability data for up to NATIONALIZE_BATCH_SIZE names in one call.
+    Returns a dict mapping each name to its list of country entries or None if request fails.
+    """
+    try:
+        response = nationalize_client.get("/", params={"name[]": names})
+        if response.status_code != 200:
+            return None
+        return {entry["name"]: entry.get("country") or [] for entry in response.json()}
+    except (RequestException, Timeout, ConnectionError, KeyError, TypeError, ValueError):
         return None
 
 
@@ -22,9 +66,56 @@ def get_country_details(code: str):
     Returns a dictionary with country data or None if request fails.
     """
     try:
-        response = requests.get(f"https://restcountries.com/v3.1/alpha/{code}", timeout=5)
+        response = restcountries_client.get(f"/v3.1/alpha/{code}")
         if response.status_code != 200:
             return None
         return response.json()[0]
     except (RequestException, Timeout, ConnectionError, IndexError, ValueError):
         return None
+
+
+def get_all_countries():
+    """
+    Get data for every country from restcountries API in one call.
+    Returns a list of country dictionaries or None if request fails.
+    """
+    try:
+        response = restcountries_client.get("/v3.1/all", params={"fields": RESTCOUNTRIES_ALL_FIELDS})
+        if response.status_code != 200:
+            return None
+        return response.json()
+    except (RequestException, Timeout, ConnectionError, ValueError):
+        return None
+
+
+async def aget_nationalize_data(name: str):
+    """Async version of get_nationalize_data."""
+    try:
+        response = await async_nationalize_client.get("/", params={"name": name})
+        if response.status_code != 200:
+            return None
+        return response.json().get("country")
+    except (httpx.HTTPError, CircuitOpenError, QuotaExceededError, ValueError):
+        return None
+
+
+async def aget_nationalize_batch(names: list[str]):
+    """Async version of get_nationalize_batch."""
+    try:
+        response = await async_nationalize_client.get("/", params={"name[]": names})
+        if response.status_code != 200:
+            return None
+        return {entry["name"]: entry.get("country") or [] for entry in response.json()}
+    except (httpx.HTTPError, CircuitOpenError, QuotaExceededError, KeyError, TypeError, ValueError):
+        return None
+
+
+async def aget_country_details(code: str):
+    """Async version of get_country_details."""
+    try:
+        response = await async_restcountries_client.get(f"/v3.1/alpha/{code}")
+        if response.status_code != 200:
+            return None
+        return response.json()[0]
+    except (httpx.HTTPError, CircuitOpenError, QuotaExceededError, IndexError, ValueError):
+        return None
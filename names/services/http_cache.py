@@ -0,0 +1,55 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+def lookup_etag(version: float) -> str:
+    """
+    ETag of a lookup response, from the time the name was refreshed (its data version).
+    Weak, as the request count and access time in the body change between refreshes.
+    """
+    return f'W/"{round(version * 1_000_000):x}"'
+
+
+def lookup_max_age(version: float) -> int:
+    """Seconds a lookup response of a name refreshed at `version` stays fresh: the rest of NAMES_SOFT_TTL."""
+    return max(0, int(version + settings.NAMES_SOFT_TTL - time.time()))
+
+
+def is_conditional(request) -> bool:
+    return "HTTP_IF_NONE_MATCH" in request.META or "HTTP_IF_MODIFIED_SINCE" in request.META
+
+
+def cache_headers(response, max_age: int, etag: str, last_modified: float = None):
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    scope = "public" if settings.NAMES_HTTP_CACHE["PUBLIC"] else "private"
+    patch_cache_control(response, **{scope: True}, max_age=max_age)
+    return response
+
+
+def lookup_cache_headers(response, version: float):
+    """Add the validators and Cache-Control of a lookup response of a name refreshed at `version`."""
+    return cache_headers(response, lookup_max_age(version), lookup_etag(version), version)
+
+
+def lookup_not_modified(request, version: float):
+    """Return a 304 response if the client's copy of a name refreshed at `version` is current, else None."""
+    response = get_conditional_response(request, etag=lookup_etag(version), last_modified=int(version))
+    if response is None:
+        return None
+    return lookup_cache_headers(response, version)
+
+
+def conditional_payload_response(request, payload: bytes, response, max_age: int):
+    """
+    Add an ETag hashed from the rendered payload and Cache-Control to `response`,
+    or return a 304 instead if the client's copy is the same payload.
+    """
+    etag = f'"{hashlib.sha1(payload).hexdigest()}"'
+    response = get_conditional_response(request, etag=etag, response=response)
+    return cache_headers(response, max_age, etag)
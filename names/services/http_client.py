@@ -0,0 +1,360 @@
+import asyncio
+import random
+import threading
+import time
+import weakref
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException, Timeout, ConnectionError
+
+from names.services.metrics import record_upstream
+from names.services.quota import QuotaExceededError
+
+
+# Responses worth retrying: throttling and transient upstream failures
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(RequestException):
+    """Raised without calling the upstream while its circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Fails fast after `failure_threshold` consecutive failed requests.
+    Once `reset_timeout` seconds have passed a single trial request is let through:
+    success closes the circuit again, failure keeps it open for another period.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return "open"
+            return "half-open"
+
+    def allow(self) -> bool:
+        return self.acquire() is not None
+
+    def acquire(self):
+        """
+        Return None if calls must fail fast, "trial" for the single trial call of a half-open circuit
+        and "closed" otherwise. A trial that ends without an outcome must be handed back with release_trial().
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_in_flight:
+                return None
+            self._trial_in_flight = True
+            return "trial"
+
+    def release_trial(self):
+        """Let another call be the trial, after the trial call failed before reaching the upstream."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class RateLimiter:
+    """Spaces calls from any number of threads at least 1/rate seconds apart. A rate of 0 disables it."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def upstream_outcome(response) -> str:
+    return "ok" if response.status_code < 400 else "http_error"
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff, so retrying workers do not hit the upstream in lockstep."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def client_options() -> dict:
+    """Client keyword arguments from the UPSTREAM_HTTP setting, with a fresh circuit breaker."""
+    config = settings.UPSTREAM_HTTP
+    return {
+        "connect_timeout": config["CONNECT_TIMEOUT"],
+        "read_timeout": config["READ_TIMEOUT"],
+        "pool_maxsize": config["POOL_MAXSIZE"],
+        "max_retries": config["MAX_RETRIES"],
+        "backoff_base": config["BACKOFF_BASE"],
+        "backoff_max": config["BACKOFF_MAX"],
+        "breaker": CircuitBreaker(config["BREAKER_FAILURE_THRESHOLD"], config["BREAKER_RESET_TIMEOUT"]),
+    }
+
+
+class UpstreamClient:
+    """
+    Keep-alive HTTP client for one upstream host.
+    Connections are pooled and capped per host, idempotent GETs are retried with
+    jittered exponential backoff and a circuit breaker stops calls to an unhealthy host.
+    With a `quota`, calls are only made while it has room and its usage is read from every response.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        *,
+        connect_timeout: float,
+        read_timeout: float,
+        pool_maxsize: int,
+        max_retries: int,
+        backoff_base: float,
+        backoff_max: float,
+        breaker: CircuitBreaker,
+        quota=None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker
+        self.quota = quota
+
+        # pool_block makes extra threads wait for a free connection instead of opening more
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, pool_block=True)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    @classmethod
+    def from_settings(cls, base_url: str, quota=None):
+        return cls(base_url, quota=quota, **client_options())
+
+    @property
+    def host(self) -> str:
+        return urlsplit(self.base_url).netloc
+
+    def get(self, path: str, params=None) -> requests.Response:
+        """
+        GET `path` on the upstream. Returns the last response, which may still carry an error status,
+        or raises a RequestException (CircuitOpenError while the circuit is open, QuotaExceededError
+        while the quota has no room).
+        """
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            response = self._get(path, params)
+            outcome = upstream_outcome(response)
+            return response
+        except CircuitOpenError:
+            outcome = "circuit_open"
+            raise
+        except QuotaExceededError:
+            outcome = "quota_exceeded"
+            raise
+        finally:
+            record_upstream(self.host, outcome, time.perf_counter() - started)
+
+    def _get(self, path: str, params=None) -> requests.Response:
+        # The breaker goes first, so that calls it rejects do not use up quota
+        permit = self.breaker.acquire()
+        if permit is None:
+            raise CircuitOpenError(f"Circuit open for {self.base_url}")
+        try:
+            if self.quota is not None and not self.quota.acquire():
+                raise QuotaExceededError(f"No quota left for {self.base_url}")
+            return self._attempts(path, params)
+        except BaseException:
+            # An outcome recorded by _attempts already ended the trial, anything else would wedge the circuit
+            if permit == "trial":
+                self.breaker.release_trial()
+            raise
+
+    def _attempts(self, path: str, params=None) -> requests.Response:
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                response = self.session.get(self.base_url + path, params=params, timeout=self.timeout)
+            except (Timeout, ConnectionError):
+                if last_attempt:
+                    self.breaker.record_failure()
+                    raise
+                self._backoff(attempt)
+                continue
+            except RequestException:
+                self.breaker.record_failure()
+                raise
+
+            # A used-up quota is not a failure of the host and retrying cannot help
+            if self.quota is not None and not self.quota.observe(response):
+                self.breaker.record_success()
+                return response
+
+            if response.status_code in RETRY_STATUSES and not last_attempt:
+                response.close()
+                self._backoff(attempt)
+                continue
+
+            if response.status_code in RETRY_STATUSES:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            return response
+
+    def _backoff(self, attempt: int):
+        time.sleep(backoff_delay(attempt, self.backoff_base, self.backoff_max))
+
+
+class AsyncUpstreamClient:
+    """
+    asyncio counterpart of UpstreamClient built on httpx, for the ASGI request path.
+    Each event loop gets its own pooled httpx.AsyncClient, which aclose() closes before the loop goes away.
+    Pass the breaker and quota of the sync client for the same host so that both paths agree
+    on the upstream's health and usage.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        *,
+        connect_timeout: float,
+        read_timeout: float,
+        pool_maxsize: int,
+        max_retries: int,
+        backoff_base: float,
+        backoff_max: float,
+        breaker: CircuitBreaker,
+        quota=None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(max_connections=pool_maxsize, max_keepalive_connections=pool_maxsize)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker
+        self.quota = quota
+        self._clients = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def from_settings(cls, base_url: str, breaker: CircuitBreaker = None, quota=None):
+        options = client_options()
+        if breaker is not None:
+            options["breaker"] = breaker
+        return cls(base_url, quota=quota, **options)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._clients[loop] = httpx.AsyncClient(
+                base_url=self.base_url, timeout=self.timeout, limits=self.limits
+            )
+        return client
+
+    @property
+    def host(self) -> str:
+        return urlsplit(self.base_url).netloc
+
+    async def aclose(self):
+        """Close the pooled client of the running event loop and its keep-alive connections."""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    async def get(self, path: str, params=None) -> httpx.Response:
+        """
+        GET `path` on the upstream. Returns the last response, which may still carry an error status,
+        or raises an httpx.HTTPError. While the circuit is open or the quota has no room it raises
+        CircuitOpenError or QuotaExceededError, which are requests exceptions shared with UpstreamClient.
+        """
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            response = await self._get(path, params)
+            outcome = upstream_outcome(response)
+            return response
+        except CircuitOpenError:
+            outcome = "circuit_open"
+            raise
+        except QuotaExceededError:
+            outcome = "quota_exceeded"
+            raise
+        finally:
+            record_upstream(self.host, outcome, time.perf_counter() - started)
+
+    async def _get(self, path: str, params=None) -> httpx.Response:
+        permit = self.breaker.acquire()
+        if permit is None:
+            raise CircuitOpenError(f"Circuit open for {self.base_url}")
+        try:
+            if self.quota is not None and not await self.quota.aacquire():
+                raise QuotaExceededError(f"No quota left for {self.base_url}")
+            return await self._attempts(path, params)
+        except BaseException:
+            if permit == "trial":
+                self.breaker.release_trial()
+            raise
+
+    async def _attempts(self, path: str, params=None) -> httpx.Response:
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                response = await self.client.get(path, params=params)
+            except (httpx.TimeoutException, httpx.TransportError):
+                if last_attempt:
+                    self.breaker.record_failure()
+                    raise
+                await asyncio.sleep(backoff_delay(attempt, self.backoff_base, self.backoff_max))
+                continue
+            except httpx.HTTPError:
+                self.breaker.record_failure()
+                raise
+
+            if self.quota is not None and not await self.quota.aobserve(response):
+                self.breaker.record_success()
+                return response
+
+            if response.status_code in RETRY_STATUSES and not last_attempt:
+                await asyncio.sleep(backoff_delay(attempt, self.backoff_base, self.backoff_max))
+                continue
+
+            if response.status_code in RETRY_STATUSES:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            return response
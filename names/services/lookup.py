@@ -0,0 +1,224 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from names.models import Name, NameCountryProbability
+from names.services.cache import negative_cache, response_cache
+from names.services.countries import resolve_countries
+from names.services.external_apis import (
+    NATIONALIZE_BATCH_SIZE,
+    get_nationalize_batch,
+    get_nationalize_data,
+    nationalize_quota,
+)
+from names.services.popularity import sync_request_counts
+from names.services.singleflight import SingleFlight, advisory_lock
+
+
+refresh_flight = SingleFlight()
+
+
+def is_fresh(name_obj) -> bool:
+    """Return True if the cached predictions for a name are younger than the soft TTL."""
+    return remaining_ttl(name_obj) > 0
+
+
+def is_servable_stale(name_obj) -> bool:
+    """
+    Return True if a stale name may still be served while it is refreshed in the background.
+    Once the nationalize.io quota runs low any stale predictions are served, whatever the refresh mode.
+    """
+    if not name_obj.country_probabilities.all():
+        return False
+    return revalidates_in_background(name_obj) or nationalize_quota.is_low()
+
+
+def revalidates_in_background(name_obj) -> bool:
+    """Return True if stale-while-revalidate mode serves this name while it is refreshed, whatever the quota."""
+    return (
+        settings.NAMES_REFRESH_MODE == "stale-while-revalidate"
+        and name_obj.refreshed_at is not None
+        and name_obj.refreshed_at > timezone.now() - timedelta(seconds=settings.NAMES_HARD_TTL)
+    )
+
+
+def remaining_ttl(name_obj) -> float:
+    """
+    Seconds until the cached predictions for a name go stale.
+    A name without predictions is a negative result and stays fresh for NAMES_NEGATIVE_TTL only.
+    """
+    if name_obj.refreshed_at is None:
+        return 0.0
+    age = timezone.now() - name_obj.refreshed_at
+    ttl = settings.NAMES_SOFT_TTL if name_obj.country_probabilities.all() else settings.NAMES_NEGATIVE_TTL
+    return ttl - age.total_seconds()
+
+
+def fresh_refreshed_at(name: str):
+    """Refresh time of a name refreshed within the soft TTL, or None. Reads the name row only."""
+    cutoff = timezone.now() - timedelta(seconds=settings.NAMES_SOFT_TTL)
+    return Name.objects.filter(name=name, refreshed_at__gt=cutoff).values_list("refreshed_at", flat=True).first()
+
+
+def names_with_predictions():
+    """
+    Name queryset that loads predictions in one extra query, most likely first as in export_snapshot.
+    Countries are rendered from the country registry, so they are not joined.
+    """
+    return Name.objects.prefetch_related(
+        Prefetch(
+            "country_probabilities",
+            queryset=NameCountryProbability.objects.only("id", "name_id", "country_id", "probability")
+            .order_by("-probability", "country_id"),
+        )
+    )
+
+
+def save_predictions(predictions: dict) -> None:
+    """
+    Persist nationalize.io entries for several names at once.
+    `predictions` maps Name objects to their list of {"country_id", "probability"} entries.
+    """
+    if not predictions:
+        return
+
+    store_predictions(predictions, resolve_countries(prediction_country_codes(predictions)))
+
+
+def prediction_country_codes(predictions: dict) -> set:
+    """All country codes mentioned in a Name -> entries mapping."""
+    return {entry["country_id"] for entries in predictions.values() for entry in entries}
+
+
+def store_predictions(predictions: dict, countries: dict) -> None:
+    """
+    Upsert the probabilities of a Name -> entries mapping, given the resolved countries,
+    and drop the affected names from the response and negative caches. Entries for unknown countries are skipped.
+    """
+    links = [
+        NameCountryProbability(
+            name=name_obj,
+            country_id=countries[entry["country_id"].upper()].pk,
+            probability=entry["probability"],
+        )
+        for name_obj, entries in predictions.items()
+        for entry in entries
+        if entry["country_id"].upper() in countries
+    ]
+
+    # Upsert so that concurrent refreshes of the same name cannot fail on the unique constraint
+    NameCountryProbability.objects.bulk_create(
+        links,
+        update_conflicts=True,
+        unique_fields=["name", "country"],
+        update_fields=["probability"],
+    )
+    sync_request_counts([name_obj.pk for name_obj in predictions])
+    response_cache.invalidate(name_obj.name for name_obj in predictions)
+    negative_cache.invalidate(name_obj.name for name_obj in predictions)
+
+
+def refresh_name(name_obj, query: str, has_stale_data: bool) -> bool | None:
+    """
+    Refresh the predictions of one name from nationalize.io, with at most one refresh per name in flight.
+    Concurrent callers in this process share the result of the running refresh. Callers in other
+    processes wait for it to finish, or return straight away if there is stale data to serve.
+    Returns True if the name has predictions to serve, False if nationalize.io has none
+    and None if nationalize.io could not be reached.
+    """
+    return refresh_flight.do(name_obj.name, _refresh_name, name_obj, query, has_stale_data)
+
+
+def refresh_lock_key(name_obj) -> str:
+    return f"names:refresh:{name_obj.name}"
+
+
+def claim_refresh(name_obj) -> bool:
+    """
+    Check a name once its refresh lock is held.
+    Returns False if another process refreshed the name while we were waiting for the lock.
+    """
+    observed_at = name_obj.refreshed_at
+    name_obj.refresh_from_db(fields=["refreshed_at"])
+    return name_obj.refreshed_at == observed_at
+
+
+def mark_refreshed(name_obj) -> None:
+    """
+    Record a nationalize.io answer for a name, once its predictions are stored.
+    Failed upstream calls are not recorded, so that an outage is never kept as a result.
+    """
+    Name.objects.filter(pk=name_obj.pk).update(refreshed_at=timezone.now())
+
+
+def has_predictions(name_obj) -> bool:
+    return NameCountryProbability.objects.filter(name=name_obj).exists()
+
+
+def _refresh_name(name_obj, query: str, has_stale_data: bool) -> bool | None:
+    with advisory_lock(refresh_lock_key(name_obj), wait=not has_stale_data) as acquired:
+        if not acquired:
+            return True
+
+        if not claim_refresh(name_obj):
+            return has_predictions(name_obj)
+
+        country_data = get_nationalize_data(query)
+        if country_data is None:
+            return None
+
+        if country_data:
+            save_predictions({name_obj: country_data})
+        mark_refreshed(name_obj)
+        return bool(country_data)
+
+
+def refresh_names(name_objs, workers: int = None, throttle=None) -> dict:
+    """
+    Refresh many names at once: fetch their predictions in chunked upstream calls, store them
+    in bulk and mark the answered names fresh. Returns the fetched name -> entries mapping;
+    names from failed upstream chunks are left out and stay stale.
+    """
+    if not name_objs:
+        return {}
+
+    country_data = fetch_nationalize_batch([n.name for n in name_objs], workers, throttle)
+    answered = [n for n in name_objs if n.name in country_data]
+    save_predictions({n: country_data[n.name] for n in answered if country_data[n.name]})
+    Name.objects.filter(pk__in=[n.pk for n in answered]).update(refreshed_at=timezone.now())
+    return country_data
+
+
+def batch_chunks(names: list[str]) -> list:
+    """Split names into chunks of at most NATIONALIZE_BATCH_SIZE."""
+    return [names[i:i + NATIONALIZE_BATCH_SIZE] for i in range(0, len(names), NATIONALIZE_BATCH_SIZE)]
+
+
+def fetch_nationalize_batch(names: list[str], workers: int = None, throttle=None) -> dict:
+    """
+    Fetch predictions for many names, NATIONALIZE_BATCH_SIZE names per upstream call,
+    with up to `workers` chunks (NAMES_BATCH_UPSTREAM_WORKERS by default) requested concurrently.
+    `throttle`, if given, is called before each upstream call. Names from failed chunks are left out.
+    """
+    chunks = batch_chunks(names)
+    if not chunks:
+        return {}
+
+    def fetch(chunk):
+        if throttle is not None:
+            throttle()
+        return get_nationalize_batch(chunk)
+
+    results = {}
+    workers = min(workers or settings.NAMES_BATCH_UPSTREAM_WORKERS, len(chunks))
+    # Each call runs in a copy of the caller's context so request metrics reach the caller
+    contexts = [copy_context() for _ in chunks]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for data in pool.map(lambda context, chunk: context.run(fetch, chunk), contexts, chunks):
+            if data:
+                results.update(data)
+    return results
@@ -0,0 +1,137 @@
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+
+REQUEST_LATENCY = Histogram(
+    "names_http_request_duration_seconds",
+    "Time spent handling a request, by endpoint.",
+    ["view", "method", "status"],
+)
+DB_QUERIES = Histogram(
+    "names_db_queries_per_request",
+    "Database queries per request, by endpoint.",
+    ["view"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+DB_TIME = Histogram(
+    "names_db_duration_seconds_per_request",
+    "Time spent in database queries per request, by endpoint.",
+    ["view"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+UPSTREAM_LATENCY = Histogram(
+    "names_upstream_request_duration_seconds",
+    "Time spent in upstream API calls, retries included, by host.",
+    ["host"],
+)
+UPSTREAM_CALLS = Counter(
+    "names_upstream_requests",
+    "Upstream API calls by host and outcome (ok, http_error, error, circuit_open, quota_exceeded).",
+    ["host", "outcome"],
+)
+CACHE_LOOKUPS = Counter(
+    "names_response_cache_lookups",
+    "Response cache lookups by cache (response, negative) and outcome (hit, miss).",
+    ["cache", "outcome"],
+)
+
+
+class RequestTimings:
+    """Per-request counters collected by the hooks below and reported in the Server-Timing header."""
+    __slots__ = ("db_queries", "db_time", "upstream_calls", "upstream_time", "cache", "phases")
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.upstream_calls = 0
+        self.upstream_time = 0.0
+        self.cache = None
+        self.phases = {}
+
+    def server_timing(self, total: float) -> str:
+        entries = [f'db;dur={self.db_time * 1000:.1f};desc="{self.db_queries} queries"']
+        if self.upstream_calls:
+            entries.append(f'upstream;dur={self.upstream_time * 1000:.1f};desc="{self.upstream_calls} calls"')
+        if self.cache:
+            entries.append(f'cache;desc="{self.cache}"')
+        entries.extend(f"{phase};dur={seconds * 1000:.1f}" for phase, seconds in self.phases.items())
+        entries.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(entries)
+
+
+current_timings = ContextVar("names_request_timings", default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper installed on every connection, timing queries of instrumented requests."""
+    timings = current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db_queries += 1
+        timings.db_time += time.perf_counter() - started
+
+
+def install_query_hook(sender, connection, **kwargs):
+    """connection_created receiver that adds record_query to each new database connection."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def record_upstream(host: str, outcome: str, duration: float) -> None:
+    UPSTREAM_CALLS.labels(host, outcome).inc()
+    UPSTREAM_LATENCY.labels(host).observe(duration)
+    timings = current_timings.get()
+    if timings is not None:
+        timings.upstream_calls += 1
+        timings.upstream_time += duration
+
+
+def record_cache(hit: bool, cache: str = "response") -> None:
+    outcome = "hit" if hit else "miss"
+    CACHE_LOOKUPS.labels(cache, outcome).inc()
+    timings = current_timings.get()
+    # Server-Timing reports the response cache outcome, or the cache that answered the request
+    if timings is not None and (cache == "response" or hit):
+        timings.cache = outcome if cache == "response" else f"{cache} {outcome}"
+
+
+@contextmanager
+def timed(phase: str):
+    """Add the time spent in the block to a named phase of the current request's Server-Timing."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = current_timings.get()
+        if timings is not None:
+            timings.phases[phase] = timings.phases.get(phase, 0.0) + time.perf_counter() - started
+
+
+def render_latest() -> tuple:
+    """
+    Return the Prometheus text exposition and its content type. With PROMETHEUS_MULTIPROC_DIR set,
+    metrics of all worker processes are aggregated from the shared directory.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
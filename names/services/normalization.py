@@ -0,0 +1,46 @@
+import re
+import unicodedata
+
+from names.models import Name
+
+
+NAME_MAX_LENGTH = Name._meta.get_field("name").max_length
+
+# Latin letters without a decomposition into base letter and accent, and apostrophe variants
+FOLDED_LETTERS = str.maketrans({
+    "ł": "l", "ø": "o", "đ": "d", "ð": "d", "ı": "i", "þ": "th", "æ": "ae", "œ": "oe",
+    "’": "'", "‘": "'", "ʼ": "'", "`": "'",
+})
+EDGES = re.compile(r"^[\W_]+|[\W_]+$")
+# Basic Latin to Latin Extended-B
+LATIN_END = "\u0250"
+
+
+def fold_accents(value: str) -> str:
+    """
+    Drop the accents of Latin letters ("é" -> "e"). Marks on other scripts are kept,
+    they tell letters apart there (Cyrillic "й" is not "и").
+    """
+    folded = []
+    for char in unicodedata.normalize("NFD", value):
+        if unicodedata.combining(char) and folded and folded[-1] < LATIN_END:
+            continue
+        folded.append(char)
+    return unicodedata.normalize("NFC", "".join(folded))
+
+
+def normalize_name(value: str) -> str:
+    """
+    Canonical form of a name: the key of the lookup caches and the Name table, and the query sent upstream.
+    Applies NFKC, case folding and accent folding, collapses whitespace and trims anything but letters
+    and digits from both ends, so "José", " jose " and "JOSE-" are one name.
+    Returns an empty string for a value without letters or digits.
+    """
+    value = unicodedata.normalize("NFKC", value).casefold()
+    value = fold_accents(value).translate(FOLDED_LETTERS)
+    return EDGES.sub("", " ".join(value.split()))
+
+
+def is_valid_name(name: str) -> bool:
+    """Whether a normalized name can be looked up and stored."""
+    return 0 < len(name) <= NAME_MAX_LENGTH
@@ -0,0 +1,78 @@
+from itertools import chain
+
+from django.db import connection, transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from names.models import Name, NameCountryProbability
+
+
+def count_requests(counts: dict) -> None:
+    """
+    Add request counts, given as a name -> increment mapping, to names and to their rows
+    in the country leaderboards, and mark the names as accessed now.
+    One UPDATE per table, which locks its rows in primary key order: concurrent flushes
+    from several workers wait for each other instead of deadlocking.
+    """
+    if not counts:
+        return
+
+    names = connection.ops.quote_name(Name._meta.db_table)
+    links = connection.ops.quote_name(NameCountryProbability._meta.db_table)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH locked AS (
+                SELECT n.id, v.by FROM {names} n
+                JOIN (VALUES {", ".join(["(%s::varchar, %s::integer)"] * len(counts))}) AS v(name, by)
+                    ON n.name = v.name
+                ORDER BY n.id
+                FOR UPDATE OF n
+            )
+            UPDATE {names} SET request_count = {names}.request_count + locked.by, last_accessed_at = %s
+            FROM locked WHERE {names}.id = locked.id
+            RETURNING {names}.id, locked.by
+            """,
+            [*chain.from_iterable(counts.items()), timezone.now()],
+        )
+        increments = sorted(cursor.fetchall())
+        if not increments:
+            return
+        cursor.execute(
+            f"""
+            WITH locked AS (
+                SELECT p.id, v.by FROM {links} p
+                JOIN (VALUES {", ".join(["(%s::bigint, %s::integer)"] * len(increments))}) AS v(name_id, by)
+                    ON p.name_id = v.name_id
+                ORDER BY p.id
+                FOR UPDATE OF p
+            )
+            UPDATE {links} SET request_count = {links}.request_count + locked.by
+            FROM locked WHERE {links}.id = locked.id
+            """,
+            list(chain.from_iterable(increments)),
+        )
+
+
+def sync_request_counts(name_ids) -> None:
+    """Copy the request counters of names onto their leaderboard rows, e.g. after new predictions were stored."""
+    NameCountryProbability.objects.filter(name_id__in=name_ids).update(
+        request_count=Subquery(Name.objects.filter(pk=OuterRef("name_id")).values("request_count")[:1])
+    )
+
+
+def popular_names_queryset(country_pk: int, min_probability: float = 0.0):
+    """Leaderboard rows of a country in order, read from the leaderboard index."""
+    rows = NameCountryProbability.objects.filter(country_id=country_pk)
+    if min_probability > 0:
+        rows = rows.filter(probability__gte=min_probability)
+    return rows.order_by("-request_count", "name_id")
+
+
+def top_names(country_pk: int, limit: int, offset: int = 0, min_probability: float = 0.0) -> list:
+    """
+    Most requested names predicted for a country.
+    Names with a probability below `min_probability` for the country are skipped.
+    """
+    rows = popular_names_queryset(country_pk, min_probability)
+    return list(rows.values_list("name__name", flat=True)[offset:offset + limit])
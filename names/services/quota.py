@@ -0,0 +1,174 @@
+import asyncio
+import math
+import time
+from contextlib import contextmanager, suppress
+from contextvars import ContextVar
+
+from django.core.cache import caches
+from requests.exceptions import RequestException
+
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+# Priority of the upstream calls made in the current context, see background_priority()
+upstream_priority = ContextVar("upstream_priority", default=INTERACTIVE)
+
+# Seconds a 429 without rate-limit headers blocks further calls
+DEFAULT_RESET = 60
+
+
+class QuotaExceededError(RequestException):
+    """Raised without calling the upstream when its quota has no room for a call of the current priority."""
+
+
+@contextmanager
+def background_priority():
+    """
+    Make the upstream calls of this block background calls, which give way to interactive lookups.
+    Threads started with a copy of the context inherit the priority.
+    """
+    token = upstream_priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        upstream_priority.reset(token)
+
+
+class UpstreamQuota:
+    """
+    Call budget of one upstream host, shared by all worker processes through a Django cache alias.
+    The alias must be a cache shared by the processes, such as Redis: a local-memory cache gives every
+    process a budget of its own (`check --deploy` reports this as names.E001).
+
+    Calls are admitted by a token bucket of `burst` calls refilled every burst/rate seconds, kept as one
+    atomic counter per refill period. Background calls may only use `background_share` of each period.
+    The remaining daily quota reported by the upstream's rate-limit headers is tracked as well: background
+    calls stop once it drops to `reserve_ratio` of the limit, interactive calls once it is used up.
+    A rate of 0 disables the bucket and keeps only the daily quota.
+    """
+
+    def __init__(self, alias: str, prefix: str, rate: float, burst: int, background_share: float, reserve_ratio: float):
+        self.alias = alias
+        self.prefix = prefix
+        self.period = burst / rate if rate > 0 else 0
+        self.burst = burst
+        self.background_burst = int(burst * background_share)
+        self.reserve_ratio = reserve_ratio
+
+    @classmethod
+    def from_settings(cls, config: dict, prefix: str):
+        return cls(
+            config["ALIAS"], prefix, config["RATE"], config["BURST"], config["BACKGROUND_SHARE"], config["RESERVE_RATIO"]
+        )
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @property
+    def state_key(self) -> str:
+        return f"{self.prefix}state"
+
+    def bucket_key(self) -> str:
+        return f"{self.prefix}bucket:{int(time.time() // self.period)}"
+
+    def bucket_size(self, priority: str) -> int:
+        return self.burst if priority == INTERACTIVE else self.background_burst
+
+    def has_room(self, state, priority: str) -> bool:
+        """Whether the daily quota in `state` ((remaining, limit) or None) admits a call of this priority."""
+        if state is None:
+            return True
+        remaining, limit = state
+        reserve = limit * self.reserve_ratio if priority == BACKGROUND else 0
+        return remaining > reserve
+
+    def is_low(self) -> bool:
+        """Whether only the interactive reserve of the daily quota is left."""
+        return not self.has_room(self.cache.get(self.state_key), BACKGROUND)
+
+    async def ais_low(self) -> bool:
+        """Async version of is_low."""
+        return not self.has_room(await self.cache.aget(self.state_key), BACKGROUND)
+
+    def acquire(self, priority: str = None) -> bool:
+        """
+        Take one call from the quota. Interactive calls fail fast when the bucket is empty,
+        background calls wait for the next refill. Returns False if the daily quota has no room.
+        """
+        priority = priority or upstream_priority.get()
+        if not self.has_room(self.cache.get(self.state_key), priority):
+            return False
+        if not self.period:
+            return True
+
+        while True:
+            key = self.bucket_key()
+            self.cache.add(key, 0, timeout=math.ceil(self.period) + 1)
+            try:
+                count = self.cache.incr(key)
+            except ValueError:
+                # The counter expired between add and incr, start again with the current period
+                continue
+            if count <= self.bucket_size(priority):
+                return True
+            with suppress(ValueError):
+                self.cache.decr(key)
+            if priority == INTERACTIVE:
+                return False
+            time.sleep(self.period - time.time() % self.period)
+
+    async def aacquire(self, priority: str = None) -> bool:
+        """Async version of acquire."""
+        priority = priority or upstream_priority.get()
+        if not self.has_room(await self.cache.aget(self.state_key), priority):
+            return False
+        if not self.period:
+            return True
+
+        while True:
+            key = self.bucket_key()
+            await self.cache.aadd(key, 0, timeout=math.ceil(self.period) + 1)
+            try:
+                count = await self.cache.aincr(key)
+            except ValueError:
+                continue
+            if count <= self.bucket_size(priority):
+                return True
+            with suppress(ValueError):
+                await self.cache.adecr(key)
+            if priority == INTERACTIVE:
+                return False
+            await asyncio.sleep(self.period - time.time() % self.period)
+
+    def parse(self, response):
+        """Return ((remaining, limit), seconds until reset) from a response's rate-limit headers, or None."""
+        headers = response.headers
+        try:
+            remaining = int(headers["X-Rate-Limit-Remaining"])
+            limit = int(headers.get("X-Rate-Limit-Limit", remaining))
+            reset = int(headers.get("X-Rate-Limit-Reset", DEFAULT_RESET))
+        except (KeyError, ValueError):
+            if response.status_code != 429:
+                return None
+            remaining, limit, reset = 0, 0, DEFAULT_RESET
+        return (remaining, limit), max(reset, 1)
+
+    def observe(self, response) -> bool:
+        """Record the daily quota reported by a response. Returns False if it is used up."""
+        parsed = self.parse(response)
+        if parsed is None:
+            return True
+        state, reset = parsed
+        self.cache.set(self.state_key, state, timeout=reset)
+        return self.has_room(state, INTERACTIVE)
+
+    async def aobserve(self, response) -> bool:
+        """Async version of observe."""
+        parsed = self.parse(response)
+        if parsed is None:
+            return True
+        state, reset = parsed
+        await self.cache.aset(self.state_key, state, timeout=reset)
+        return self.has_room(state, INTERACTIVE)
@@ -0,0 +1,39 @@
+from django.db import transaction
+
+from names.models import Name, NameRefreshTask
+from names.services.lookup import refresh_names
+from names.services.quota import background_priority
+
+
+def enqueue_refresh(name_objs) -> None:
+    """Queue background refreshes for names. Each name is queued at most once."""
+    NameRefreshTask.objects.bulk_create([NameRefreshTask(name=n) for n in name_objs], ignore_conflicts=True)
+
+
+def claim_refresh_tasks(limit: int) -> list:
+    """
+    Remove up to `limit` queued tasks and return their names.
+    Rows locked by another worker are skipped, so several workers can share the queue.
+    """
+    with transaction.atomic():
+        tasks = list(
+            NameRefreshTask.objects.select_for_update(skip_locked=True)
+            .order_by("enqueued_at")
+            .values_list("pk", "name_id")[:limit]
+        )
+        NameRefreshTask.objects.filter(pk__in=[pk for pk, _ in tasks]).delete()
+
+    return list(Name.objects.filter(pk__in=[name_id for _, name_id in tasks]))
+
+
+def process_refresh_tasks(limit: int) -> int:
+    """
+    Refresh one batch of queued names at background priority. Names nationalize.io did not answer,
+    for instance because the quota is kept for interactive lookups, are queued again.
+    Returns the number of names refreshed.
+    """
+    name_objs = claim_refresh_tasks(limit)
+    with background_priority():
+        country_data = refresh_names(name_objs)
+    enqueue_refresh([n for n in name_objs if n.name not in country_data])
+    return len(country_data)
@@ -0,0 +1,152 @@
+import asyncio
+import threading
+import zlib
+from contextlib import asynccontextmanager, contextmanager
+
+from asgiref.sync import sync_to_async
+from django.db import connection
+
+# Releases scheduled for locks whose taker was cancelled, referenced until they finish
+_pending_releases = set()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key inside one process.
+    The first caller runs the function, callers arriving while it runs wait and share its result.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+class AsyncSingleFlight:
+    """
+    asyncio counterpart of SingleFlight: coroutines awaiting the same key while a call
+    is running share its result instead of starting their own.
+    """
+
+    def __init__(self):
+        self._calls = {}
+
+    async def do(self, key, fn, *args, **kwargs):
+        task = self._calls.get(key)
+        if task is None:
+            # The call runs in its own task so cancelling the caller that started it
+            # (e.g. a disconnected client) neither aborts it nor fails the other waiters
+            task = self._calls[key] = asyncio.ensure_future(fn(*args, **kwargs))
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved in case every caller was cancelled
+            task.exception()
+
+
+def lock_id(key: str) -> int:
+    """Stable signed advisory lock id for a string key."""
+    return zlib.crc32(key.encode()) - 2 ** 31
+
+
+def acquire_advisory_lock(key: str, wait: bool = True) -> bool:
+    """
+    Take a PostgreSQL session advisory lock on a string key.
+    Returns False if `wait` is False and another session holds it.
+    Other databases have no advisory locks and always return True.
+    """
+    if connection.vendor != "postgresql":
+        return True
+
+    with connection.cursor() as cursor:
+        if wait:
+            cursor.execute("SELECT pg_advisory_lock(%s)", [lock_id(key)])
+            return True
+        cursor.execute("SELECT pg_try_advisory_lock(%s)", [lock_id(key)])
+        return cursor.fetchone()[0]
+
+
+def release_advisory_lock(key: str) -> None:
+    """Release a lock taken with acquire_advisory_lock."""
+    if connection.vendor != "postgresql":
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_unlock(%s)", [lock_id(key)])
+
+
+@contextmanager
+def advisory_lock(key: str, wait: bool = True):
+    """
+    Cross-process lock on a string key using a PostgreSQL session advisory lock.
+    Yields True once the lock is held, or False if `wait` is False and another session holds it.
+    """
+    acquired = acquire_advisory_lock(key, wait)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            release_advisory_lock(key)
+
+
+@asynccontextmanager
+async def aadvisory_lock(key: str, wait: bool = True):
+    """
+    Async version of advisory_lock. Taking and releasing the lock are shielded from cancellation,
+    so a caller cancelled while either is in flight never leaves the session holding the lock.
+    """
+    acquire = asyncio.ensure_future(sync_to_async(acquire_advisory_lock)(key, wait))
+    try:
+        acquired = await asyncio.shield(acquire)
+    except asyncio.CancelledError:
+        acquire.add_done_callback(lambda done: _release_abandoned(key, done))
+        raise
+
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            await asyncio.shield(sync_to_async(release_advisory_lock)(key))
+
+
+def _release_abandoned(key, acquire):
+    """Release a lock that finished being taken after its caller was cancelled."""
+    if acquire.cancelled() or acquire.exception() is not None or not acquire.result():
+        return
+    release = acquire.get_loop().create_task(sync_to_async(release_advisory_lock)(key))
+    _pending_releases.add(release)
+    release.add_done_callback(_pending_releases.discard)
@@ -0,0 +1,211 @@
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.db.models.functions import Collate
+from django.utils import timezone
+from rest_framework.fields import DateTimeField
+from rest_framework.renderers import JSONRenderer
+
+from names.models import Country, NameCountryProbability, RevokedToken
+
+
+# File layout: header, countries as a JSON array, jti claims of revoked tokens as a JSON array,
+# one record per name, then the index. The index holds one fixed-size entry per name, sorted by the UTF-8 bytes
+# of the name, pointing at the record: name bytes, timestamps, request count and (country, probability) pairs.
+MAGIC = b"NCSNAP02"
+HEADER = struct.Struct("<8sIIQQQQd")  # magic, names, countries, countries/revoked/data/index offsets, exported at
+ENTRY = struct.Struct("<QHH")  # record offset, name length, number of predictions
+RECORD = struct.Struct("<qqI")  # last accessed and refreshed at (microseconds since the epoch), request count
+PREDICTION = struct.Struct("<Hd")  # country position in the countries array, probability
+
+NO_TIME = -1
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def to_micros(value) -> int:
+    return NO_TIME if value is None else (value - EPOCH) // timedelta(microseconds=1)
+
+
+def write_snapshot(path: str, chunk_size: int = 10000) -> int:
+    """
+    Write every name with predictions, the country table and the revoked tokens that have not expired
+    to a snapshot file at `path`. The file is written next to `path` and swapped in atomically.
+    Returns the number of names written.
+    """
+    from names.serializers import CountrySerializer
+
+    countries = list(Country.objects.order_by("pk"))
+    positions = {country.pk: position for position, country in enumerate(countries)}
+    revoked = list(RevokedToken.objects.filter(expires_at__gt=timezone.now()).values_list("jti", flat=True))
+    # One row per prediction, grouped by name in byte order so that readers can binary search the names
+    rows = (
+        NameCountryProbability.objects
+        .order_by(Collate("name__name", "C"), "-probability", "country_id")
+        .values_list(
+            "name__name", "name__last_accessed_at", "name__refreshed_at", "name__request_count",
+            "country_id", "probability",
+        )
+    )
+
+    tmp_path = f"{path}.tmp"
+    index = bytearray()
+    with open(tmp_path, "wb") as output:
+        output.write(bytes(HEADER.size))
+        countries_offset = output.tell()
+        output.write(json.dumps(CountrySerializer(countries, many=True).data).encode())
+        revoked_offset = output.tell()
+        output.write(json.dumps(revoked).encode())
+        data_offset = output.tell()
+
+        for name, links in groupby(rows.iterator(chunk_size=chunk_size), key=itemgetter(0)):
+            links = list(links)
+            _, last_accessed_at, refreshed_at, request_count, _, _ = links[0]
+            key = name.encode()
+            index += ENTRY.pack(output.tell(), len(key), len(links))
+            output.write(key)
+            output.write(RECORD.pack(to_micros(last_accessed_at), to_micros(refreshed_at), request_count))
+            output.write(b"".join(PREDICTION.pack(positions[link[4]], link[5]) for link in links))
+
+        index_offset = output.tell()
+        output.write(index)
+        output.seek(0)
+        name_count = len(index) // ENTRY.size
+        output.write(HEADER.pack(
+            MAGIC, name_count, len(countries), countries_offset, revoked_offset, data_offset, index_offset, time.time()
+        ))
+        output.flush()
+        os.fsync(output.fileno())
+    os.replace(tmp_path, path)
+    return name_count
+
+
+class Snapshot:
+    """
+    A memory-mapped snapshot file. Lookups binary search the index and assemble the
+    JSON response from the mapped record and the pre-rendered countries.
+    `revoked_jtis` holds the tokens that were revoked when it was exported.
+    """
+
+    datetime_field = DateTimeField()
+
+    def __init__(self, path: str):
+        with open(path, "rb") as source:
+            self.stat = os.fstat(source.fileno())
+            self.buffer = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+
+        header = HEADER.unpack_from(self.buffer, 0)
+        magic, self.name_count, _, countries_offset, revoked_offset, data_offset, self.index_offset = header[:7]
+        self.exported_at = header[7]
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a names snapshot of this version.")
+        renderer = JSONRenderer()
+        self.countries = [renderer.render(data) for data in json.loads(self.buffer[countries_offset:revoked_offset])]
+        self.revoked_jtis = frozenset(json.loads(self.buffer[revoked_offset:data_offset]))
+
+    def find(self, key: bytes):
+        """Return (record offset, prediction count) of an encoded name, or None."""
+        buffer = self.buffer
+        low, high = 0, self.name_count
+        while low < high:
+            middle = (low + high) // 2
+            offset, key_length, count = ENTRY.unpack_from(buffer, self.index_offset + middle * ENTRY.size)
+            probe = buffer[offset:offset + key_length]
+            if probe < key:
+                low = middle + 1
+            elif probe > key:
+                high = middle
+            else:
+                return offset + key_length, count
+        return None
+
+    def render_datetime(self, micros: int) -> bytes:
+        if micros == NO_TIME:
+            return b"null"
+        value = self.datetime_field.to_representation(EPOCH + timedelta(microseconds=micros))
+        return f'"{value}"'.encode()
+
+    def version(self, name: str):
+        """
+        Return the refresh time of a normalized name as a timestamp (0 if unknown),
+        or None if it is not in the snapshot.
+        """
+        found = self.find(name.encode())
+        if found is None:
+            return None
+        _, refreshed_at, _ = RECORD.unpack_from(self.buffer, found[0])
+        return max(refreshed_at, 0) / 1_000_000
+
+    def render(self, name: str):
+        """Return the lookup response of a normalized name as JSON bytes, or None if it is not in the snapshot."""
+        key = name.encode()
+        found = self.find(key)
+        if found is None:
+            return None
+
+        offset, count = found
+        last_accessed_at, refreshed_at, request_count = RECORD.unpack_from(self.buffer, offset)
+        offset += RECORD.size
+        predictions = []
+        for _ in range(count):
+            position, probability = PREDICTION.unpack_from(self.buffer, offset)
+            offset += PREDICTION.size
+            predictions.append(
+                b'{"country":%s,"probability":%s}' % (self.countries[position], repr(probability).encode())
+            )
+
+        return (
+            b'{"name":%s,"last_accessed_at":%s,"refreshed_at":%s,"request_count":%d,"country_probabilities":[%s]}'
+        ) % (
+            json.dumps(name, ensure_ascii=False).encode(),
+            self.render_datetime(last_accessed_at),
+            self.render_datetime(refreshed_at),
+            request_count,
+            b",".join(predictions),
+        )
+
+
+class SnapshotStore:
+    """
+    The snapshot at NAMES_SNAPSHOT_PATH, opened on first use. The file is checked at most every
+    NAMES_SNAPSHOT_CHECK_INTERVAL seconds and reopened once export_snapshot has swapped in a new one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._checked_at = 0.0
+
+    def get(self) -> Snapshot | None:
+        """The current snapshot, or None until export_snapshot has written one."""
+        snapshot = self._snapshot
+        now = time.monotonic()
+        if snapshot is not None and now - self._checked_at < settings.NAMES_SNAPSHOT_CHECK_INTERVAL:
+            return snapshot
+
+        with self._lock:
+            self._checked_at = now
+            path = settings.NAMES_SNAPSHOT_PATH
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                return self._snapshot
+            current = self._snapshot
+            if current is None or (stat.st_ino, stat.st_mtime_ns) != (current.stat.st_ino, current.stat.st_mtime_ns):
+                # The previous mapping is released once the requests still reading it are done
+                self._snapshot = Snapshot(path)
+            return self._snapshot
+
+    def clear(self):
+        with self._lock:
+            self._snapshot = None
+
+
+snapshot_store = SnapshotStore()
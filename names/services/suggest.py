@@ -0,0 +1,147 @@
+import heapq
+import math
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Exists, OuterRef
+
+from names.db_router import replica_reads
+from names.models import Name, NameCountryProbability
+
+
+# Fuzzy matches need at least this share of trigrams in common with the query (pg_trgm's default)
+SIMILARITY_THRESHOLD = 0.3
+# Trigrams found in more names are not used to find fuzzy candidates
+MAX_POSTINGS = 2000
+# Fuzzy candidates scored per requested suggestion, those sharing the most trigrams first
+CANDIDATES_PER_RESULT = 5
+# Highest code point, sorts after every continuation of a prefix
+MAX_CHAR = "\U0010ffff"
+
+
+def trigrams(name: str) -> set:
+    """Trigrams of a name padded like pg_trgm does, so that word starts weigh more."""
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SuggestIndex:
+    """
+    Immutable in-memory index over known names: a sorted list for prefix search and an
+    inverted trigram index for fuzzy matches, ranked by request count.
+    """
+
+    def __init__(self, rows):
+        rows = sorted(rows)
+        self.names = [name for name, _ in rows]
+        self.counts = array("Q", (count for _, count in rows))
+        self.by_count = array("I", sorted(range(len(rows)), key=lambda position: -rows[position][1]))
+        postings = {}
+        for position, name in enumerate(self.names):
+            for trigram in trigrams(name):
+                postings.setdefault(trigram, array("I")).append(position)
+        self.postings = postings
+
+    def __len__(self):
+        return len(self.names)
+
+    def suggest(self, query: str, limit: int) -> list:
+        """
+        Names starting with a normalized query, the query itself first and then the most requested,
+        topped up with names similar to it when there are fewer than `limit`.
+        """
+        low = bisect_left(self.names, query)
+        high = bisect_left(self.names, query + MAX_CHAR, low)
+        positions = [low] if low < high and self.names[low] == query else []
+        matches = range(low + len(positions), high)
+        if len(matches) > math.isqrt(limit * len(self.names)):
+            # Many matches: the most requested ones come up early when scanning in request count order
+            positions += islice((position for position in self.by_count if position in matches), limit - len(positions))
+        else:
+            positions += heapq.nlargest(limit - len(positions), matches, key=self.counts.__getitem__)
+        if len(positions) < limit:
+            positions += self.similar(query, limit - len(positions), exclude=range(low, high))
+        return [self.names[position] for position in positions]
+
+    def similar(self, query: str, limit: int, exclude) -> list:
+        """Names sharing at least SIMILARITY_THRESHOLD of their trigrams with the query, most similar first."""
+        query_trigrams = trigrams(query)
+        # Trigrams of many names cost the most and narrow nothing down: candidates come from the rarer ones
+        shared = Counter()
+        for trigram in query_trigrams:
+            postings = self.postings.get(trigram, ())
+            if len(postings) <= MAX_POSTINGS:
+                shared.update(postings)
+
+        scored = []
+        for position, _ in shared.most_common(limit * CANDIDATES_PER_RESULT):
+            if position in exclude:
+                continue
+            name_trigrams = trigrams(self.names[position])
+            similarity = len(query_trigrams & name_trigrams) / len(query_trigrams | name_trigrams)
+            if similarity >= SIMILARITY_THRESHOLD:
+                scored.append((similarity, self.counts[position], position))
+        return [position for _, _, position in heapq.nlargest(limit, scored)]
+
+
+class SuggestIndexStore:
+    """
+    Process-wide SuggestIndex over the NAMES_SUGGEST["MAX_NAMES"] most requested names with predictions.
+    The first request builds it; afterwards it is rebuilt in a background thread once it is older than
+    NAMES_SUGGEST["REFRESH_INTERVAL"] seconds, and requests keep using the previous index meanwhile.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = None
+        self._built_at = 0.0
+        self._rebuilding = False
+
+    def get(self) -> SuggestIndex:
+        index = self._index
+        if index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = self._build()
+                return self._index
+
+        if time.monotonic() - self._built_at >= settings.NAMES_SUGGEST["REFRESH_INTERVAL"]:
+            with self._lock:
+                start = not self._rebuilding
+                self._rebuilding = True
+            if start:
+                threading.Thread(target=self._rebuild, daemon=True).start()
+        return index
+
+    def clear(self):
+        with self._lock:
+            self._index = None
+
+    def _rebuild(self):
+        try:
+            index = self._build()
+            with self._lock:
+                self._index = index
+        finally:
+            self._rebuilding = False
+            connection.close()
+
+    def _build(self) -> SuggestIndex:
+        self._built_at = time.monotonic()
+        with replica_reads():
+            rows = list(
+                Name.objects
+                .filter(Exists(NameCountryProbability.objects.filter(name_id=OuterRef("pk"))))
+                .order_by("-request_count")
+                .values_list("name", "request_count")[:settings.NAMES_SUGGEST["MAX_NAMES"]]
+            )
+        return SuggestIndex(rows)
+
+
+suggest_index = SuggestIndexStore()
@@ -0,0 +1,76 @@
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from names.models import RevokedToken
+
+
+class TokenDenylist:
+    """
+    Process-wide set of the jti claims of revoked tokens that have not expired yet, so that checking a token
+    costs no query. Every NAMES_AUTH["DENYLIST_CHECK_INTERVAL"] seconds the version of the RevokedToken table
+    (its row count and highest id) is read, and the set is reloaded if it changed: revocations made by other
+    workers, hosts or directly in the database show within that interval.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jtis = None
+        self._version = None
+        self._checked_at = 0.0
+
+    def __contains__(self, jti) -> bool:
+        return jti in self._loaded()
+
+    def revoke(self, jti: str, expires_at: int) -> None:
+        """Deny the token with this jti until its `exp` claim, and drop entries of tokens that expired."""
+        RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+        # Saving it invalidates the denylist through a signal
+        RevokedToken.objects.get_or_create(
+            jti=jti, defaults={"expires_at": datetime.fromtimestamp(expires_at, tz=dt_timezone.utc)}
+        )
+
+    def invalidate(self):
+        """Drop the loaded set in this process, which other workers notice from the table version."""
+        self.clear()
+
+    def clear(self):
+        """Drop the loaded set in this process only."""
+        with self._lock:
+            self._jtis = None
+
+    def _loaded(self) -> frozenset:
+        now = time.monotonic()
+        check_due = now - self._checked_at >= settings.NAMES_AUTH["DENYLIST_CHECK_INTERVAL"]
+        if self._jtis is not None and check_due:
+            self._checked_at = now
+            if self.table_version() != self._version:
+                self.clear()
+
+        jtis = self._jtis
+        if jtis is None:
+            with self._lock:
+                if self._jtis is None:
+                    self._jtis = self._load()
+                jtis = self._jtis
+        return jtis
+
+    @staticmethod
+    def table_version() -> tuple:
+        """(row count, highest id) of the RevokedToken table: adding or deleting revocations changes it."""
+        version = RevokedToken.objects.aggregate(count=Count("id"), last=Max("id"))
+        return version["count"], version["last"]
+
+    def _load(self) -> frozenset:
+        self._version = self.table_version()
+        self._checked_at = time.monotonic()
+        return frozenset(
+            RevokedToken.objects.filter(expires_at__gt=timezone.now()).values_list("jti", flat=True)
+        )
+
+
+token_denylist = TokenDenylist()
@@ -0,0 +1,30 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from django.contrib.auth import get_user_model
+
+from .authentication import user_cache
+from .models import Country, RevokedToken
+from names.services.country_registry import country_registry
+from names.services.token_denylist import token_denylist
+
+
+@receiver(post_save, sender=Country)
+@receiver(post_delete, sender=Country)
+def invalidate_country_registry(sender, **kwargs):
+    """Reload the in-memory country registry after a country is changed, e.g. in the admin."""
+    country_registry.invalidate()
+
+
+@receiver(post_save, sender=RevokedToken)
+@receiver(post_delete, sender=RevokedToken)
+def invalidate_token_denylist(sender, **kwargs):
+    """Reload the denylist after a revocation is added or removed, e.g. in the admin."""
+    token_denylist.invalidate()
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def evict_cached_user(sender, instance, **kwargs):
+    """Authenticate a changed user, e.g. one deactivated in the admin, against the database again."""
+    user_cache.evict(instance.pk)
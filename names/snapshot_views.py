@@ -0,0 +1,63 @@
+from django.http import HttpResponse
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .authentication import SnapshotJWTAuthentication
+from .serializers import NAME_LOOKUP_RESPONSE, LookupFormatSerializer
+from .views import FORMAT_PARAMETERS, INVALID_NAME, NO_DATA
+from names.services.http_cache import lookup_cache_headers, lookup_not_modified
+from names.services.metrics import timed
+from names.services.normalization import is_valid_name, normalize_name
+from names.services.snapshot import snapshot_store
+
+
+NO_SNAPSHOT = {"error": "Name data is not available yet, try again later."}
+
+
+@extend_schema(
+    parameters=[
+        OpenApiParameter(name="name", required=True, type=str, location=OpenApiParameter.QUERY),
+        *FORMAT_PARAMETERS,
+    ],
+    responses=NAME_LOOKUP_RESPONSE,
+)
+class SnapshotNameLookupView(APIView):
+    """
+    GET /names/?name=<name>
+
+    Serves lookups from the memory-mapped snapshot written by export_snapshot, without a database
+    connection: tokens are verified without loading the user, against the revocations exported with the snapshot,
+    and requests are not counted.
+    Names missing from the snapshot return 404, every name returns 503 until a snapshot has been exported.
+    """
+    authentication_classes = [SnapshotJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        name_param = request.query_params.get("name")
+        if not name_param:
+            return Response({"error": "Missing 'name' query parameter."}, status=status.HTTP_400_BAD_REQUEST)
+        name = normalize_name(name_param)
+        if not is_valid_name(name):
+            return Response(INVALID_NAME, status=status.HTTP_400_BAD_REQUEST)
+        fmt = LookupFormatSerializer(data=request.query_params)
+        if not fmt.is_valid():
+            return Response({"error": fmt.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        snapshot = snapshot_store.get()
+        if snapshot is None:
+            return Response(NO_SNAPSHOT, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        version = snapshot.version(name)
+        if version is None:
+            return Response(NO_DATA, status=status.HTTP_404_NOT_FOUND)
+        response = lookup_not_modified(request, version)
+        if response is not None:
+            return response
+
+        with timed("serialize"):
+            payload = snapshot.render(name)
+            payload = fmt.shape_payload(payload)
+        return lookup_cache_headers(HttpResponse(payload, content_type="application/json"), version)
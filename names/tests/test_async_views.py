@@ -0,0 +1,106 @@
+from datetime import timedelta
+from unittest.mock import AsyncMock, patch
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from names.async_views import AsyncNameBatchLookupView, AsyncNameLookupView
+from names.models import Country, Name, NameCountryProbability, NameRefreshTask
+from names.services.cache import negative_cache, response_cache
+from names.services.counters import request_counter
+from names.services.country_registry import country_registry
+from names.services.external_apis import nationalize_quota
+from names.tests.test_views import US_COUNTRY_DETAILS
+
+
+class AsyncNameViewsTest(TestCase):
+    def setUp(self):
+        response_cache.clear()
+        negative_cache.clear()
+        country_registry.clear()
+        request_counter.clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass123")
+        self.factory = APIRequestFactory()
+
+    async def lookup(self, name, **params):
+        request = self.factory.get("/names/lookup/", {"name": name, **params})
+        force_authenticate(request, user=self.user)
+        return await AsyncNameLookupView.as_view()(request)
+
+    @patch("names.services.async_lookup.aget_country_details", new_callable=AsyncMock)
+    @patch("names.services.async_lookup.aget_nationalize_data", new_callable=AsyncMock)
+    async def test_lookup_fetches_and_caches(self, mock_nationalize, mock_country):
+        """
+        Should fetch predictions on a miss and serve the second lookup from the response cache.
+        """
+        mock_nationalize.return_value = [{"country_id": "US", "probability": 0.9}]
+        mock_country.return_value = US_COUNTRY_DETAILS
+
+        response = await self.lookup("Michael")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["country_probabilities"][0]["country"]["alpha2_code"], "US")
+
+        cached = await self.lookup("michael")
+        self.assertEqual(cached.status_code, status.HTTP_200_OK)
+        self.assertIn(b'"michael"', cached.content)
+        compact = await self.lookup("michael", compact="1")
+        self.assertEqual(compact.content, b'{"US":0.9}')
+        mock_nationalize.assert_awaited_once_with("michael")
+        mock_country.assert_awaited_once_with("US")
+
+    @patch("names.services.async_lookup.aget_nationalize_data", new_callable=AsyncMock)
+    async def test_lookup_without_data(self, mock_nationalize):
+        """
+        Should return 404 when nationalize.io has no predictions for the name.
+        """
+        mock_nationalize.return_value = []
+
+        response = await self.lookup("zzzz")
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @patch("names.services.async_lookup.aget_country_details", new_callable=AsyncMock)
+    @patch("names.services.async_lookup.aget_nationalize_batch", new_callable=AsyncMock)
+    async def test_batch_lookup(self, mock_batch, mock_country):
+        """
+        Should fetch distinct names in one batch call and report names without data.
+        """
+        mock_batch.return_value = {
+            "anna": [{"country_id": "US", "probability": 0.5}],
+            "zzzz": [],
+        }
+        mock_country.return_value = US_COUNTRY_DETAILS
+        request = self.factory.post("/names/batch/", {"names": ["Anna", "anna", "zzzz"]}, format="json")
+        force_authenticate(request, user=self.user)
+
+        response = await AsyncNameBatchLookupView.as_view()(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_batch.assert_awaited_once_with(["anna", "zzzz"])
+        self.assertEqual([r["name"] for r in response.data["results"]], ["anna"])
+        self.assertEqual(response.data["not_found"], ["zzzz"])
+        await sync_to_async(request_counter.flush)()
+        name = await Name.objects.aget(name="anna")
+        self.assertEqual(name.request_count, 1)
+
+    @patch("names.services.async_lookup.aget_nationalize_data", new_callable=AsyncMock)
+    async def test_low_quota_serves_stale_predictions(self, mock_nationalize):
+        """
+        Should serve stale predictions when the quota is low, reading the quota state without blocking the loop.
+        """
+        country = await Country.objects.acreate(alpha2_code="US", name="United States of America", region="Americas")
+        name = await Name.objects.acreate(name="anna", refreshed_at=timezone.now() - timedelta(days=30))
+        await NameCountryProbability.objects.acreate(name=name, country=country, probability=0.5)
+        await nationalize_quota.cache.aset(nationalize_quota.state_key, (5, 100))
+        self.addCleanup(nationalize_quota.cache.delete, nationalize_quota.state_key)
+
+        with patch.object(nationalize_quota, "is_low", side_effect=AssertionError("sync cache read on the loop")):
+            response = await self.lookup("anna")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_nationalize.assert_not_awaited()
+        self.assertTrue(await NameRefreshTask.objects.filter(name=name).aexists())
@@ -0,0 +1,137 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from names.authentication import CachedJWTAuthentication, StatelessJWTAuthentication, UserCache, user_cache
+from names.models import RevokedToken
+from names.services.country_registry import country_registry
+from names.services.token_denylist import token_denylist
+
+
+class CachedJWTAuthenticationTest(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        token_denylist.clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass123")
+        token = AccessToken.for_user(self.user)
+        self.request = Request(APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}"))
+        self.backend = CachedJWTAuthentication()
+
+    def test_user_is_loaded_once(self):
+        """
+        Should authenticate repeated requests of a user without querying the database again.
+        """
+        self.assertEqual(self.backend.authenticate(self.request)[0], self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.backend.authenticate(self.request)[0], self.user)
+
+    def test_changed_user_is_loaded_again(self):
+        """
+        Should load a user again after it was saved, so that deactivation takes effect.
+        """
+        self.backend.authenticate(self.request)
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.backend.authenticate(self.request)
+
+    def test_full_cache_evicts_expired_then_least_recently_used_users(self):
+        """
+        Should make room by dropping expired users first and then the least recently used one, keeping the rest.
+        """
+        cache = UserCache()
+        with override_settings(NAMES_AUTH={**settings.NAMES_AUTH, "USER_CACHE_MAX_SIZE": 3, "USER_CACHE_TTL": 60}):
+            with patch("names.authentication.time.monotonic", return_value=0):
+                cache.set("expiring", "expiring user")
+            with patch("names.authentication.time.monotonic", return_value=100):
+                for key in ("a", "b"):
+                    cache.set(key, f"user {key}")
+                cache.set("c", "user c")
+                self.assertIsNone(cache.get("expiring"))
+                self.assertEqual(cache.get("a"), "user a")
+
+                cache.set("d", "user d")
+
+                self.assertEqual([cache.get(key) for key in "abcd"], ["user a", None, "user c", "user d"])
+
+    def test_stateless_authentication_makes_no_query(self):
+        """
+        Should build the user from the token claims.
+        """
+        # Loads the denylist, once per worker
+        self.assertNotIn("", token_denylist)
+        with self.assertNumQueries(0):
+            user, _ = StatelessJWTAuthentication().authenticate(self.request)
+        self.assertEqual(str(user.id), str(self.user.id))
+
+    def test_benchmark_auth_command(self):
+        """
+        Should report the cost and queries per request of every authentication mode.
+        """
+        out = StringIO()
+        call_command("benchmark_auth", "--requests", "5", "--repeat", "1", stdout=out)
+        self.assertIn("stateless", out.getvalue())
+
+
+class RevokedTokenTest(APITestCase):
+    def setUp(self):
+        user_cache.clear()
+        token_denylist.clear()
+        country_registry.clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass123")
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+
+    def test_revoked_token_is_rejected(self):
+        """
+        Should return 401 Unauthorized for a revoked token, on cached and stateless endpoints alike.
+        """
+        popular = reverse("popular-names")
+        suggest = reverse("name-suggest")
+        self.assertNotEqual(self.client.get(popular, {"country": "US"}).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        call_command("revoke_token", self.token, stdout=StringIO())
+
+        self.assertEqual(self.client.get(popular, {"country": "US"}).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.client.get(suggest, {"q": "an"}).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revoked_refresh_token_is_rejected(self):
+        """
+        Should return 401 Unauthorized instead of a new access token for a revoked refresh token.
+        """
+        refresh = str(RefreshToken.for_user(self.user))
+        url = reverse("token_refresh")
+        self.assertEqual(self.client.post(url, {"refresh": refresh}).status_code, status.HTTP_200_OK)
+
+        call_command("revoke_token", refresh, stdout=StringIO())
+
+        response = self.client.post(url, {"refresh": refresh})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertNotIn("access", response.data)
+
+    def test_revocation_made_by_another_process_is_noticed(self):
+        """
+        Should reject a token revoked in the database without this worker being told, after the check interval.
+        """
+        popular = reverse("popular-names")
+        with override_settings(NAMES_AUTH={**settings.NAMES_AUTH, "DENYLIST_CHECK_INTERVAL": 0}):
+            self.assertNotEqual(self.client.get(popular, {"country": "US"}).status_code, status.HTTP_401_UNAUTHORIZED)
+
+            # bulk_create sends no signal, as if another worker or host had written the row
+            jti = AccessToken(self.token)["jti"]
+            RevokedToken.objects.bulk_create([RevokedToken(jti=jti, expires_at=timezone.now() + timedelta(hours=1))])
+
+            self.assertEqual(self.client.get(popular, {"country": "US"}).status_code, status.HTTP_401_UNAUTHORIZED)
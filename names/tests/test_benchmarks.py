@@ -0,0 +1,97 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TransactionTestCase
+
+from names.benchmarks.runner import percentile
+from names.models import Country, Name, NameCountryProbability
+from names.services.cache import negative_cache, response_cache
+from names.services.counters import request_counter
+from names.services.country_registry import country_registry
+
+
+class PercentileTest(SimpleTestCase):
+    def test_nearest_rank(self):
+        """
+        Should pick nearest-rank percentiles from sorted samples.
+        """
+        samples = list(range(1, 101))
+        self.assertEqual(percentile(samples, 50), 50)
+        self.assertEqual(percentile(samples, 99), 99)
+        self.assertEqual(percentile(samples, 100), 100)
+        self.assertEqual(percentile([], 50), 0.0)
+
+
+class BenchmarkCommandTest(TransactionTestCase):
+    def setUp(self):
+        response_cache.clear()
+        negative_cache.clear()
+        country_registry.clear()
+        request_counter.clear()
+
+    def test_seed_and_run_mixed_scenario(self):
+        """
+        Should seed synthetic data and report latency and query counts for a scenario against the stub upstream.
+        """
+        call_command("seed_benchmark_data", "--names", "50", "--countries", "5", stdout=StringIO())
+        self.assertEqual(Name.objects.count(), 50)
+        self.assertTrue(NameCountryProbability.objects.exists())
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "report.json")
+            call_command(
+                "benchmark", "--scenario", "mixed", "--requests", "20", "--warmup", "0", "--concurrency", "2",
+                "--names", "50", "--countries", "5", "--miss-ratio", "0.5", "--upstream-latency", "0",
+                "--json", path, stdout=StringIO(),
+            )
+            with open(path) as report_file:
+                report = json.load(report_file)
+
+        self.assertEqual(report["requests"], 20)
+        self.assertEqual(report["statuses"], {"200": 20})
+        self.assertGreater(report["upstream_calls"], 0)
+        self.assertGreater(report["queries_per_request"], 0)
+        self.assertLessEqual(report["latency_ms"]["p50"], report["latency_ms"]["p99"])
+        self.assertFalse(User.objects.exists())
+
+    def test_seed_does_not_overwrite_real_countries(self):
+        """
+        Should refuse to reuse the code of a real country unless --force is passed.
+        """
+        Country.objects.create(alpha2_code="AB", name="Real Country", region="Europe")
+
+        with self.assertRaisesMessage(CommandError, "AB"):
+            call_command("seed_benchmark_data", "--names", "5", "--countries", "3", stdout=StringIO())
+        self.assertEqual(Country.objects.get(alpha2_code="AB").name, "Real Country")
+        self.assertFalse(Name.objects.exists())
+
+        call_command("seed_benchmark_data", "--names", "5", "--countries", "3", "--force", stdout=StringIO())
+        self.assertEqual(Country.objects.get(alpha2_code="AB").region, "Synthetic")
+
+    def test_explain_queries_reports_every_hot_path(self):
+        """
+        Should print a plan for each hot-path query of the seeded database.
+        """
+        call_command("seed_benchmark_data", "--names", "20", "--countries", "3", stdout=StringIO())
+        stdout = StringIO()
+
+        call_command("explain_queries", stdout=stdout)
+
+        for label in ("lookup", "batch", "popular-names", "refresh-queue", "admin-name-search"):
+            self.assertIn(label, stdout.getvalue())
+
+    def test_serialization_benchmark_matches_original_output(self):
+        """
+        Should time every serialization path and confirm each one renders what NameSerializer does.
+        """
+        call_command("seed_benchmark_data", "--names", "20", "--countries", "3", stdout=StringIO())
+        stdout = StringIO()
+
+        call_command("benchmark_serialization", "--names", "10", "--repeat", "1", stdout=stdout)
+
+        self.assertIn("NameSerializer + JSONRenderer", stdout.getvalue())
+        self.assertNotIn("DIFFERENT", stdout.getvalue())
@@ -0,0 +1,72 @@
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+
+from names.services.cache import DjangoCacheBackend, LocalLRUBackend, ResponseCache
+
+
+class LocalLRUBackendTest(SimpleTestCase):
+    def test_evicts_least_recently_used_entry(self):
+        """
+        Should drop the least recently used entry once the size bound is reached.
+        """
+        cache = LocalLRUBackend(max_size=2, ttl=60)
+        cache.set("anna", b"1")
+        cache.set("bob", b"2")
+        cache.get("anna")
+        cache.set("olga", b"3")
+
+        self.assertIsNone(cache.get("bob"))
+        self.assertEqual(cache.get("anna"), b"1")
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_expires_entries_after_ttl(self):
+        """
+        Should treat entries older than their TTL as misses.
+        """
+        cache = LocalLRUBackend(max_size=10, ttl=60)
+        with patch("names.services.cache.time.monotonic", return_value=100.0):
+            cache.set("anna", b"1", ttl=5)
+        with patch("names.services.cache.time.monotonic", return_value=104.0):
+            self.assertEqual(cache.get("anna"), b"1")
+        with patch("names.services.cache.time.monotonic", return_value=106.0):
+            self.assertIsNone(cache.get("anna"))
+
+        self.assertEqual(cache.stats(), {"hits": 1, "misses": 1, "evictions": 0, "size": 0})
+
+    def test_skips_entries_without_remaining_ttl(self):
+        """
+        Should not store responses that are already stale.
+        """
+        cache = LocalLRUBackend(max_size=10, ttl=60)
+        cache.set("anna", b"1", ttl=0)
+        self.assertIsNone(cache.get("anna"))
+
+
+@override_settings(CACHES={"shared": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class ResponseCacheTest(SimpleTestCase):
+    def test_shared_hit_backfills_local_tier(self):
+        """
+        Should serve a shared-tier hit and copy it into the local tier.
+        """
+        local = LocalLRUBackend(max_size=10, ttl=60)
+        shared = DjangoCacheBackend("shared", ttl=60)
+        ResponseCache([shared]).set("anna", b"1")
+
+        cache = ResponseCache([local, shared])
+        self.assertEqual(cache.get("anna"), b"1")
+        self.assertEqual(local.get("anna"), b"1")
+
+    def test_invalidate_removes_name_from_every_tier(self):
+        """
+        Should drop a refreshed name from all backends.
+        """
+        local = LocalLRUBackend(max_size=10, ttl=60)
+        shared = DjangoCacheBackend("shared", ttl=60)
+        cache = ResponseCache([local, shared])
+        cache.set("anna", b"1")
+
+        cache.invalidate(["anna"])
+
+        self.assertIsNone(local.get("anna"))
+        self.assertIsNone(shared.get("anna"))
@@ -0,0 +1,186 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from names.models import Country, Name, NameCountryProbability
+from names.serializers import compact_data, name_data
+from names.services.countries import resolve_countries
+from names.services.country_registry import country_registry
+from names.services.enrichment import save_checkpoint
+from names.services.lookup import names_with_predictions
+
+
+def country_payload(code, official, capital):
+    return {
+        "cca2": code,
+        "name": {"official": official, "common": official},
+        "region": "Europe",
+        "subregion": "",
+        "capital": [capital],
+        "latlng": [49.0, 32.0],
+        "flags": {"png": "", "svg": ""},
+        "coatOfArms": {},
+        "borders": ["POL"],
+        "independent": True,
+    }
+
+
+class LoadCountriesCommandTest(TestCase):
+    def setUp(self):
+        country_registry.clear()
+
+    @patch("names.management.commands.load_countries.get_all_countries")
+    def test_loads_all_countries_in_one_upstream_call(self, mock_get_all):
+        """
+        Should insert every country returned by /v3.1/all.
+        """
+        mock_get_all.return_value = [country_payload("UA", "Ukraine", "Kyiv"), country_payload("PL", "Poland", "Warsaw")]
+
+        call_command("load_countries", stdout=StringIO())
+
+        mock_get_all.assert_called_once_with()
+        self.assertEqual(set(Country.objects.values_list("alpha2_code", flat=True)), {"UA", "PL"})
+        self.assertEqual(Country.objects.get(alpha2_code="UA").borders, ["POL"])
+
+    def test_upserts_from_snapshot_file(self):
+        """
+        Should update existing countries in place when loading a snapshot.
+        """
+        Country.objects.create(alpha2_code="UA", name="Old name", region="Europe")
+        with tempfile.NamedTemporaryFile("w", suffix=".json") as snapshot:
+            json.dump([country_payload("UA", "Ukraine", "Kyiv")], snapshot)
+            snapshot.flush()
+            call_command("load_countries", "--file", snapshot.name, stdout=StringIO())
+
+        self.assertEqual(Country.objects.count(), 1)
+        self.assertEqual(Country.objects.get(alpha2_code="UA").name, "Ukraine")
+
+    @patch("names.management.commands.load_countries.get_all_countries")
+    def test_if_empty_skips_loaded_table(self, mock_get_all):
+        """
+        Should not call REST Countries when the table is already warm.
+        """
+        Country.objects.create(alpha2_code="UA", name="Ukraine", region="Europe")
+
+        call_command("load_countries", "--if-empty", stdout=StringIO())
+
+        mock_get_all.assert_not_called()
+
+    @override_settings(NAMES_FETCH_MISSING_COUNTRIES=False)
+    @patch("names.services.countries.get_country_details")
+    def test_preloaded_table_never_calls_rest_countries(self, mock_get_country):
+        """
+        Should leave unknown codes out instead of fetching them on the request path.
+        """
+        Country.objects.create(alpha2_code="UA", name="Ukraine", region="Europe")
+
+        countries = resolve_countries(["UA", "XX"])
+
+        self.assertEqual(list(countries), ["UA"])
+        mock_get_country.assert_not_called()
+
+
+class CountryRegistryTest(TestCase):
+    def setUp(self):
+        country_registry.clear()
+
+    def test_registry_notices_changes_made_by_other_processes(self):
+        """
+        Should reload countries changed without invalidating this worker's registry, e.g. by another process.
+        """
+        Country.objects.create(alpha2_code="UA", name="Ukraine", region="Europe")
+        self.assertEqual(country_registry.get("UA").data["region"], "Europe")
+
+        # A queryset update sends no signal, like a change made in another worker
+        Country.objects.filter(alpha2_code="UA").update(region="Eastern Europe")
+        self.assertEqual(country_registry.get("UA").data["region"], "Europe")
+        with override_settings(NAMES_COUNTRY_REGISTRY_CHECK_INTERVAL=0):
+            self.assertEqual(country_registry.get("UA").data["region"], "Eastern Europe")
+
+    def test_deleted_country_is_left_out(self):
+        """
+        Should leave out predictions of a country deleted after they were read, instead of failing to render them.
+        """
+        ua = Country.objects.create(alpha2_code="UA", name="Ukraine", region="Europe")
+        pl = Country.objects.create(alpha2_code="PL", name="Poland", region="Europe")
+        name = Name.objects.create(name="olena", refreshed_at=timezone.now())
+        NameCountryProbability.objects.create(name=name, country=ua, probability=0.8)
+        NameCountryProbability.objects.create(name=name, country=pl, probability=0.1)
+        name = names_with_predictions().get(pk=name.pk)
+
+        ua.delete()
+        country_registry.clear()
+
+        self.assertEqual(compact_data(name), {"PL": 0.1})
+        links = name_data(name)["country_probabilities"]
+        self.assertEqual([link["country"]["alpha2_code"] for link in links], ["PL"])
+
+
+class EnrichNamesCommandTest(TestCase):
+    def setUp(self):
+        country_registry.clear()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.input = os.path.join(self.tmpdir.name, "names.csv")
+        self.output = os.path.join(self.tmpdir.name, "out.jsonl")
+        with open(self.input, "w") as source:
+            source.write("id,name\n1,Anna\n2,bob\n3,anna\n4,\n5,zzzz\n")
+        Country.objects.create(alpha2_code="US", name="United States of America", region="Americas")
+
+    def read_output(self):
+        with open(self.output) as output:
+            return [json.loads(line) for line in output]
+
+    @patch("names.services.lookup.get_nationalize_batch")
+    def test_enriches_csv_and_skips_fresh_names(self, mock_batch):
+        """
+        Should fetch each distinct stale name once, write one JSONL result per name and skip fresh names on rerun.
+        """
+        mock_batch.return_value = {"anna": [{"country_id": "US", "probability": 0.5}], "bob": [], "zzzz": []}
+        stdout = StringIO()
+
+        call_command("enrich_names", self.input, "--output", self.output, "--rate", "0", stdout=stdout)
+
+        mock_batch.assert_called_once_with(["anna", "bob", "zzzz"])
+        results = {r["name"]: r for r in self.read_output()}
+        self.assertEqual(results["anna"]["status"], "enriched")
+        self.assertEqual(results["anna"]["countries"], [{"country": "US", "probability": 0.5}])
+        self.assertEqual(results["bob"]["status"], "not_found")
+        self.assertEqual(results[""]["status"], "invalid")
+        self.assertIn("names/s", stdout.getvalue())
+        self.assertFalse(os.path.exists(self.output + ".checkpoint"))
+
+        mock_batch.reset_mock()
+        call_command("enrich_names", self.input, "--output", self.output, "--rate", "0", stdout=StringIO())
+        mock_batch.assert_not_called()
+        self.assertEqual(self.read_output()[0]["status"], "fresh")
+
+    @patch("names.services.lookup.get_nationalize_batch")
+    def test_resumes_from_checkpoint(self, mock_batch):
+        """
+        Should skip the records covered by the checkpoint and drop output written after it.
+        """
+        mock_batch.side_effect = lambda names: {name: [] for name in names}
+        with open(self.output, "w") as output:
+            output.write('{"name": "anna", "status": "not_found", "countries": []}\n{"partial": true}\n')
+        save_checkpoint(
+            self.output + ".checkpoint",
+            {"input": os.path.abspath(self.input), "records": 3, "output_bytes": 57},
+        )
+
+        with self.assertRaises(CommandError):
+            call_command("enrich_names", self.input, "--output", self.output, stdout=StringIO())
+        call_command(
+            "enrich_names", self.input, "--output", self.output, "--resume", "--chunk-size", "1", "--rate", "0",
+            stdout=StringIO(),
+        )
+
+        self.assertEqual([r["name"] for r in self.read_output()], ["anna", "", "zzzz"])
+        mock_batch.assert_called_once_with(["zzzz"])
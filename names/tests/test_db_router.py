@@ -0,0 +1,58 @@
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from names.db_router import REPLICA, ReplicaRouter, replica_reads, use_replica
+from names.models import Country, Name
+from names.services.country_registry import country_registry
+
+
+class ReplicaRouterTest(SimpleTestCase):
+    def test_reads_go_to_replica_only_when_marked_and_configured(self):
+        """
+        Should route reads under replica_reads() to the replica and leave writes and migrations on default.
+        """
+        router = ReplicaRouter()
+
+        with patch("names.db_router.connections") as connections:
+            connections.settings = {"default": {}, REPLICA: {}}
+            self.assertIsNone(router.db_for_read(Name))
+            with replica_reads():
+                self.assertEqual(router.db_for_read(Name), REPLICA)
+                self.assertIsNone(router.db_for_write(Name))
+
+            connections.settings = {"default": {}}
+            with replica_reads():
+                self.assertIsNone(router.db_for_read(Name))
+
+        self.assertFalse(router.allow_migrate(REPLICA, "names"))
+        self.assertTrue(router.allow_migrate("default", "names"))
+
+
+class ReplicaViewsTest(APITestCase):
+    def setUp(self):
+        country_registry.clear()
+        user = User.objects.create_user(username="testuser", password="testpass123")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+        Country.objects.create(alpha2_code="US", name="United States of America", region="Americas")
+
+    def test_popular_names_and_authentication_read_from_replica(self):
+        """
+        Should load the user and the leaderboard under replica_reads().
+        """
+        replica_reads_seen = []
+
+        def record_replica_use(model, **hints):
+            replica_reads_seen.append((model._meta.label, use_replica.get()))
+
+        with patch.object(ReplicaRouter, "db_for_read", side_effect=record_replica_use):
+            response = self.client.get(reverse("popular-names"), {"country": "US"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(("auth.User", True), replica_reads_seen)
+        self.assertTrue(all(replica for _, replica in replica_reads_seen))
@@ -0,0 +1,297 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from prometheus_client import REGISTRY
+from requests.exceptions import Timeout
+
+from names.checks import check_quota_cache
+from names.services import external_apis
+from names.services.http_client import AsyncUpstreamClient, CircuitBreaker, CircuitOpenError, UpstreamClient
+from names.services.quota import BACKGROUND, INTERACTIVE, QuotaExceededError, UpstreamQuota
+
+
+def rate_limit_headers(remaining: int, limit: int = 100) -> dict:
+    return {"X-Rate-Limit-Limit": str(limit), "X-Rate-Limit-Remaining": str(remaining), "X-Rate-Limit-Reset": "3600"}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serves the scripted (status, body, delay[, headers]) responses of its server in order."""
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.path, self.client_address))
+            status, body, delay, *headers = server.responses.pop(0) if server.responses else (200, {}, 0)
+        time.sleep(delay)
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        for header, value in (headers[0] if headers else {}).items():
+            self.send_header(header, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.lock = threading.Lock()
+        self.requests = []
+        self.responses = []
+
+    def handle_error(self, request, client_address):
+        # Clients that gave up on a slow response close the socket, which is expected here
+        pass
+
+
+class StubServerTestCase(SimpleTestCase):
+    """Runs a StubServer per test and builds clients for it."""
+
+    def setUp(self):
+        self.server = StubServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def make_client(self, client_class=UpstreamClient, **overrides):
+        options = {
+            "connect_timeout": 1,
+            "read_timeout": 1,
+            "pool_maxsize": 2,
+            "max_retries": 2,
+            "backoff_base": 0,
+            "backoff_max": 0,
+            "breaker": CircuitBreaker(failure_threshold=2, reset_timeout=60),
+        }
+        options.update(overrides)
+        return client_class(self.base_url, **options)
+
+
+class UpstreamClientTest(StubServerTestCase):
+    def test_reuses_connection_between_requests(self):
+        """
+        Should send consecutive requests over one keep-alive connection.
+        """
+        client = self.make_client()
+        for _ in range(3):
+            self.assertEqual(client.get("/").status_code, 200)
+
+        self.assertEqual(len({address for _, address in self.server.requests}), 1)
+
+    def test_retries_transient_errors(self):
+        """
+        Should retry 503 responses and return the first successful one.
+        """
+        self.server.responses = [(503, {}, 0), (200, {"country": []}, 0)]
+
+        response = self.make_client().get("/", params={"name": "anna"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_gives_up_after_read_timeout(self):
+        """
+        Should raise Timeout once every attempt exceeded the read timeout.
+        """
+        self.server.responses = [(200, {}, 0.3)] * 2
+
+        with self.assertRaises(Timeout):
+            self.make_client(read_timeout=0.1, max_retries=1).get("/")
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_circuit_opens_and_fails_fast(self):
+        """
+        Should stop calling the upstream after repeated failures and try again after the reset timeout.
+        """
+        self.server.responses = [(500, {}, 0)] * 2
+        client = self.make_client(max_retries=0)
+
+        client.get("/")
+        client.get("/")
+        with self.assertRaises(CircuitOpenError):
+            client.get("/")
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(client.breaker.state, "open")
+
+        with patch("names.services.http_client.time.monotonic", return_value=time.monotonic() + 61):
+            self.assertEqual(client.get("/").status_code, 200)
+        self.assertEqual(client.breaker.state, "closed")
+
+    def test_failed_trial_does_not_wedge_the_circuit(self):
+        """
+        Should let the next call be the trial if the trial call raised something other than an upstream failure.
+        """
+        client = self.make_client(max_retries=0)
+        client.breaker.record_failure()
+        client.breaker.record_failure()
+
+        later = time.monotonic() + 61
+        with patch("names.services.http_client.time.monotonic", return_value=later):
+            with patch.object(client.session, "get", side_effect=ValueError("bad params")):
+                with self.assertRaises(ValueError):
+                    client.get("/")
+            self.assertEqual(client.get("/").status_code, 200)
+        self.assertEqual(client.breaker.state, "closed")
+
+    def test_nationalize_lookup_through_stub(self):
+        """
+        Should parse nationalize.io responses and map upstream failures to None.
+        """
+        self.server.responses = [
+            (200, {"name": "anna", "country": [{"country_id": "US", "probability": 0.5}]}, 0),
+            (200, [{"name": "anna", "country": []}, {"name": "bob", "country": []}], 0),
+            (404, {}, 0),
+        ]
+        with patch.object(external_apis, "nationalize_client", self.make_client(max_retries=0)):
+            self.assertEqual(external_apis.get_nationalize_data("anna"), [{"country_id": "US", "probability": 0.5}])
+            self.assertEqual(external_apis.get_nationalize_batch(["anna", "bob"]), {"anna": [], "bob": []})
+            self.assertIsNone(external_apis.get_nationalize_data("anna"))
+
+        self.assertEqual(self.server.requests[1][0], "/?name%5B%5D=anna&name%5B%5D=bob")
+
+    def test_upstream_calls_are_recorded(self):
+        """
+        Should count upstream calls by host and outcome, including calls rejected by an open circuit.
+        """
+        host = f"127.0.0.1:{self.server.server_port}"
+        self.server.responses = [(200, {}, 0), (500, {}, 0), (500, {}, 0)]
+        client = self.make_client(max_retries=0)
+
+        for _ in range(4):
+            try:
+                client.get("/")
+            except CircuitOpenError:
+                pass
+
+        def calls(outcome):
+            return REGISTRY.get_sample_value("names_upstream_requests_total", {"host": host, "outcome": outcome})
+
+        self.assertEqual(calls("ok"), 1)
+        self.assertEqual(calls("http_error"), 2)
+        self.assertEqual(calls("circuit_open"), 1)
+
+
+class AsyncUpstreamClientTest(StubServerTestCase):
+    async def test_lifespan_shutdown_closes_pooled_client(self):
+        """
+        Should close the pooled httpx client of the server's event loop on ASGI lifespan shutdown.
+        """
+        from name_country.asgi import application
+
+        client = self.make_client(AsyncUpstreamClient)
+        self.assertEqual((await client.get("/")).status_code, 200)
+        pooled = client.client
+
+        messages = asyncio.Queue()
+        for message_type in ("lifespan.startup", "lifespan.shutdown"):
+            messages.put_nowait({"type": message_type})
+        sent = []
+
+        async def send(message):
+            sent.append(message["type"])
+
+        with patch.object(external_apis, "async_nationalize_client", client):
+            await application({"type": "lifespan"}, messages.get, send)
+
+        self.assertEqual(sent, ["lifespan.startup.complete", "lifespan.shutdown.complete"])
+        self.assertTrue(pooled.is_closed)
+        self.assertIsNot(client.client, pooled)
+        await client.aclose()
+
+
+class UpstreamQuotaTest(StubServerTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_stops_calling_once_quota_is_used_up(self):
+        """
+        Should keep the last part of the daily quota for interactive calls and fail fast once it is used up.
+        """
+        quota = UpstreamQuota("default", "test:quota:", rate=0, burst=20, background_share=0.5, reserve_ratio=0.1)
+        self.server.responses = [(200, {}, 0, rate_limit_headers(5)), (429, {}, 0, rate_limit_headers(0))]
+        client = self.make_client(quota=quota)
+
+        self.assertEqual(client.get("/").status_code, 200)
+        self.assertTrue(quota.is_low())
+        self.assertFalse(quota.acquire(BACKGROUND))
+
+        self.assertEqual(client.get("/").status_code, 429)
+        with self.assertRaises(QuotaExceededError):
+            client.get("/")
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(client.breaker.state, "closed")
+
+    def test_open_circuit_does_not_use_quota(self):
+        """
+        Should reject calls on an open circuit before taking a token from the quota.
+        """
+        quota = UpstreamQuota("default", "test:quota:", rate=0.001, burst=4, background_share=0.5, reserve_ratio=0.1)
+        client = self.make_client(quota=quota, max_retries=0)
+        client.breaker.record_failure()
+        client.breaker.record_failure()
+
+        with patch.object(quota, "acquire", wraps=quota.acquire) as acquire:
+            with self.assertRaises(CircuitOpenError):
+                client.get("/")
+        acquire.assert_not_called()
+
+    def test_bucket_keeps_room_for_interactive_calls(self):
+        """
+        Should let background calls take only their share of the token bucket.
+        """
+        # One refill period lasts 4000 seconds, so the bucket is not refilled during the test
+        quota = UpstreamQuota("default", "test:quota:", rate=0.001, burst=4, background_share=0.5, reserve_ratio=0.1)
+
+        self.assertTrue(quota.acquire(BACKGROUND))
+        self.assertTrue(quota.acquire(BACKGROUND))
+        self.assertEqual(quota.cache.get(quota.bucket_key()), 2)
+        self.assertTrue(quota.acquire(INTERACTIVE))
+        self.assertTrue(quota.acquire(INTERACTIVE))
+        self.assertFalse(quota.acquire(INTERACTIVE))
+
+    def test_bucket_expiring_before_incr_is_added_again(self):
+        """
+        Should start over with a new counter when the bucket key expires between add and incr.
+        """
+        quota = UpstreamQuota("default", "test:quota:", rate=0.001, burst=4, background_share=0.5, reserve_ratio=0.1)
+
+        with patch.object(quota.cache, "incr", side_effect=[ValueError("expired"), 1]) as incr:
+            self.assertTrue(quota.acquire(INTERACTIVE))
+        self.assertEqual(incr.call_count, 2)
+
+    async def test_async_bucket_expiring_before_incr_is_added_again(self):
+        """
+        Should start over with a new counter when the bucket key expires between aadd and aincr.
+        """
+        quota = UpstreamQuota("default", "test:quota:", rate=0.001, burst=4, background_share=0.5, reserve_ratio=0.1)
+
+        with patch.object(quota.cache, "aincr", side_effect=[ValueError("expired"), 1]) as aincr:
+            self.assertTrue(await quota.aacquire(INTERACTIVE))
+        self.assertEqual(aincr.call_count, 2)
+
+    def test_deploy_check_requires_a_shared_quota_cache(self):
+        """
+        Should report a quota kept in a local-memory cache, and accept one kept in Redis.
+        """
+        self.assertEqual([error.id for error in check_quota_cache(None)], ["names.E001"])
+
+        redis = {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://localhost:6379/0"}
+        with override_settings(CACHES={"default": redis, "shared": redis}):
+            self.assertEqual(check_quota_cache(None), [])
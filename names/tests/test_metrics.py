@@ -0,0 +1,66 @@
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from names.services.cache import negative_cache, response_cache
+from names.services.counters import request_counter
+from names.services.country_registry import country_registry
+from names.tests.test_views import US_COUNTRY_DETAILS
+
+
+class MetricsTest(APITestCase):
+    def setUp(self):
+        response_cache.clear()
+        negative_cache.clear()
+        country_registry.clear()
+        request_counter.clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass123")
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+
+    def sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    @patch("names.services.countries.get_country_details")
+    @patch("names.services.lookup.get_nationalize_data")
+    def test_server_timing_reports_db_and_cache(self, mock_get_nationalize, mock_get_country):
+        """
+        Should report database queries, serialization and cache outcome in the Server-Timing header.
+        """
+        mock_get_nationalize.return_value = [{"country_id": "US", "probability": 0.9}]
+        mock_get_country.return_value = US_COUNTRY_DETAILS
+        requests_before = self.sample("names_http_request_duration_seconds_count", view="name-lookup", method="GET", status="200")
+
+        miss = self.client.get(reverse("name-lookup"), {"name": "anna"})
+        hit = self.client.get(reverse("name-lookup"), {"name": "anna"})
+
+        self.assertIn('cache;desc="miss"', miss["Server-Timing"])
+        self.assertIn("serialize;dur=", miss["Server-Timing"])
+        self.assertIn('cache;desc="hit"', hit["Server-Timing"])
+        self.assertIn('db;dur=', hit["Server-Timing"])
+        self.assertEqual(
+            self.sample("names_http_request_duration_seconds_count", view="name-lookup", method="GET", status="200"),
+            requests_before + 2,
+        )
+
+    def test_metrics_endpoint(self):
+        """
+        Should expose Prometheus metrics, behind the metrics token when one is configured.
+        """
+        self.client.get(reverse("popular-names"), {"country": "US"})
+
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(b'names_db_queries_per_request_count{view="popular-names"}', response.content)
+
+        with override_settings(NAMES_METRICS_TOKEN="secret"):
+            self.assertEqual(self.client.get(reverse("metrics")).status_code, status.HTTP_401_UNAUTHORIZED)
+            self.client.credentials(HTTP_AUTHORIZATION="Bearer secret")
+            response = self.client.get(reverse("metrics"))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
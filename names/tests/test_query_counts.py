@@ -0,0 +1,85 @@
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from names.models import Country, Name, NameCountryProbability
+from names.services.cache import negative_cache, response_cache
+from names.services.counters import request_counter
+from names.authentication import user_cache
+from names.services.country_registry import country_registry
+from names.services.token_denylist import token_denylist
+
+
+class QueryBudgetTest(APITestCase):
+    """
+    Locks in a constant number of queries per endpoint on the cache-hit path,
+    independent of how many countries a name is linked to.
+    """
+
+    COUNTRY_CODES = ["US", "GB", "DE", "FR", "UA"]
+
+    def setUp(self):
+        response_cache.clear()
+        negative_cache.clear()
+        country_registry.clear()
+        request_counter.clear()
+        user_cache.clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass123")
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+
+        countries = [
+            Country.objects.create(alpha2_code=code, name=code, region="Test")
+            for code in self.COUNTRY_CODES
+        ]
+        for name in ("anna", "maria", "olga"):
+            name_obj = Name.objects.create(name=name, request_count=1, refreshed_at=timezone.now())
+            for country in countries:
+                NameCountryProbability.objects.create(name=name_obj, country=country, probability=0.2)
+        # Countries are served from the in-memory registry, loaded once per worker
+        country_registry.get("US")
+        # So is the token denylist
+        token_denylist.clear()
+        self.assertNotIn("", token_denylist)
+
+    def test_lookup_hit_query_budget(self):
+        """
+        Auth user + name + predictions.
+        """
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("name-lookup"), {"name": "anna"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["country_probabilities"]), len(self.COUNTRY_CODES))
+
+    def test_lookup_response_cache_hit_query_budget(self):
+        """
+        None: the user is served from the user cache and the name from the response cache.
+        """
+        first = self.client.get(reverse("name-lookup"), {"name": "anna"})
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("name-lookup"), {"name": "Anna"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), first.json())
+
+    def test_batch_hit_query_budget(self):
+        """
+        Auth user + names + predictions, regardless of batch size.
+        """
+        with self.assertNumQueries(3):
+            response = self.client.post(
+                reverse("name-batch-lookup"), {"names": ["anna", "maria", "olga"]}, format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 3)
+
+    def test_popular_names_query_budget(self):
+        """
+        Auth user + top names.
+        """
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("popular-names"), {"country": "us"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 3)
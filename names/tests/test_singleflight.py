@@ -0,0 +1,215 @@
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITransactionTestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from names.models import Country, Name, NameCountryProbability
+from names.services.cache import negative_cache, response_cache
+from names.services.counters import request_counter
+from names.services.country_registry import country_registry
+from names.services.lookup import refresh_name
+from names.services.singleflight import AsyncSingleFlight, SingleFlight, aadvisory_lock, advisory_lock
+
+
+class SingleFlightTest(APITransactionTestCase):
+    BURST_SIZE = 10
+
+    def setUp(self):
+        response_cache.clear()
+        negative_cache.clear()
+        country_registry.clear()
+        request_counter.clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass123")
+        self.access_token = str(RefreshToken.for_user(self.user).access_token)
+        Country.objects.create(alpha2_code="US", name="United States of America", region="Americas")
+
+    def run_burst(self, target):
+        """Run `target` in BURST_SIZE threads released at the same moment."""
+        barrier = threading.Barrier(self.BURST_SIZE)
+        results = []
+
+        def worker():
+            barrier.wait()
+            try:
+                results.append(target())
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.BURST_SIZE)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_burst_of_lookups_makes_one_upstream_call(self):
+        """
+        Should call nationalize.io once when many requests miss on the same name at once.
+        """
+        calls = []
+
+        def slow_nationalize(name):
+            calls.append(name)
+            time.sleep(0.2)
+            return [{"country_id": "US", "probability": 0.9}]
+
+        def lookup():
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access_token}")
+            return client.get(reverse("name-lookup"), {"name": "michael"}).status_code
+
+        with patch("names.services.lookup.get_nationalize_data", side_effect=slow_nationalize):
+            statuses = self.run_burst(lookup)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(statuses, [status.HTTP_200_OK] * self.BURST_SIZE)
+        self.assertEqual(NameCountryProbability.objects.count(), 1)
+
+    def test_shared_result_and_error_propagation(self):
+        """
+        Should hand the leader's result or exception to every waiting caller.
+        """
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+
+        def leader_fn():
+            started.set()
+            release.wait()
+            return "done"
+
+        leader = threading.Thread(target=flight.do, args=("key", leader_fn))
+        leader.start()
+        started.wait()
+        follower_results = []
+        follower = threading.Thread(target=lambda: follower_results.append(flight.do("key", lambda: "other")))
+        follower.start()
+        time.sleep(0.05)
+        release.set()
+        leader.join()
+        follower.join()
+
+        self.assertEqual(follower_results, ["done"])
+
+        def failing_fn():
+            started.set()
+            release.wait()
+            raise ValueError("upstream failed")
+
+        started.clear()
+        release.clear()
+        leader_errors, follower_errors = [], []
+
+        def call(fn, errors):
+            try:
+                flight.do("key", fn)
+            except ValueError as error:
+                errors.append(error)
+
+        leader = threading.Thread(target=call, args=(failing_fn, leader_errors))
+        leader.start()
+        started.wait()
+        follower = threading.Thread(target=call, args=(lambda: "other", follower_errors))
+        follower.start()
+        time.sleep(0.05)
+        release.set()
+        leader.join()
+        follower.join()
+
+        self.assertEqual(len(leader_errors), 1)
+        self.assertEqual(follower_errors, leader_errors)
+
+    def test_refresh_serves_stale_data_while_another_process_refreshes(self):
+        """
+        Should skip the upstream call and serve stale data if another session holds the refresh lock.
+        """
+        name_obj = Name.objects.create(name="anna")
+        locked = threading.Event()
+        release = threading.Event()
+
+        def hold_lock():
+            try:
+                with advisory_lock("names:refresh:anna"):
+                    locked.set()
+                    release.wait()
+            finally:
+                connection.close()
+
+        holder = threading.Thread(target=hold_lock)
+        holder.start()
+        locked.wait()
+        try:
+            with patch("names.services.lookup.get_nationalize_data") as mock_nationalize:
+                self.assertTrue(refresh_name(name_obj, "anna", has_stale_data=True))
+            mock_nationalize.assert_not_called()
+        finally:
+            release.set()
+            holder.join()
+
+
+class AsyncSingleFlightTest(SimpleTestCase):
+    async def test_cancelled_leader_does_not_fail_waiters(self):
+        """
+        Should finish the call and hand its result to waiting callers when the caller that started it is cancelled.
+        """
+        flight = AsyncSingleFlight()
+        started = asyncio.Event()
+        release = asyncio.Event()
+        calls = []
+
+        async def refresh():
+            calls.append(1)
+            started.set()
+            await release.wait()
+            return "done"
+
+        leader = asyncio.ensure_future(flight.do("key", refresh))
+        await started.wait()
+        follower = asyncio.ensure_future(flight.do("key", refresh))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        self.assertEqual(await follower, "done")
+        self.assertTrue(leader.cancelled())
+        self.assertEqual(calls, [1])
+        self.assertEqual(await flight.do("key", refresh), "done")
+        self.assertEqual(calls, [1, 1])
+
+    async def test_lock_taken_after_cancellation_is_released(self):
+        """
+        Should release the advisory lock when the caller is cancelled while the lock is being taken.
+        """
+        def slow_acquire(key, wait):
+            time.sleep(0.1)
+            return True
+
+        async def hold():
+            async with aadvisory_lock("names:refresh:anna"):
+                pass
+
+        with (
+            patch("names.services.singleflight.acquire_advisory_lock", side_effect=slow_acquire),
+            patch("names.services.singleflight.release_advisory_lock") as mock_release,
+        ):
+            task = asyncio.ensure_future(hold())
+            await asyncio.sleep(0.02)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            mock_release.assert_not_called()
+
+            for _ in range(50):
+                if mock_release.called:
+                    break
+                await asyncio.sleep(0.01)
+        mock_release.assert_called_once_with("names:refresh:anna")
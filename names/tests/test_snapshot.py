@@ -0,0 +1,122 @@
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from names.models import Country, Name, NameCountryProbability, RevokedToken
+from names.serializers import NameSerializer
+from names.services.country_registry import country_registry
+from names.services.lookup import names_with_predictions
+from names.services.snapshot import Snapshot, snapshot_store
+from names.snapshot_views import SnapshotNameLookupView
+
+
+class SnapshotTest(TestCase):
+    def setUp(self):
+        country_registry.clear()
+        snapshot_store.clear()
+        self.addCleanup(snapshot_store.clear)
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, "names.snap")
+
+        us = Country.objects.create(alpha2_code="US", name="United States of America", region="Americas")
+        pl = Country.objects.create(alpha2_code="PL", name="Poland", region="Europe", borders=["DEU", "UKR"])
+        de = Country.objects.create(alpha2_code="DE", name="Germany", region="Europe")
+        for value, links in [("zoë", [(pl, 0.7)]), ("anna", [(de, 0.25), (pl, 0.5), (us, 0.25)]), ("bob", [])]:
+            name = Name.objects.create(name=value, refreshed_at=timezone.now(), request_count=3)
+            for country, probability in links:
+                NameCountryProbability.objects.create(name=name, country=country, probability=probability)
+
+    def test_snapshot_renders_same_payload_as_database(self):
+        """
+        Should serve every name with predictions exactly as the database lookup does, in the same order,
+        and nothing else.
+        """
+        call_command("export_snapshot", self.path, stdout=StringIO())
+        snapshot = Snapshot(self.path)
+
+        self.assertEqual(snapshot.name_count, 2)
+        for name in ("anna", "zoë"):
+            expected = JSONRenderer().render(NameSerializer(names_with_predictions().get(name=name)).data)
+            self.assertEqual(snapshot.render(name), expected)
+        links = json.loads(snapshot.render("anna"))["country_probabilities"]
+        self.assertEqual([link["country"]["alpha2_code"] for link in links], ["PL", "US", "DE"])
+        self.assertIsNone(snapshot.render("bob"))
+        self.assertIsNone(snapshot.render("carl"))
+
+    def test_view_serves_without_database_and_reloads_on_swap(self):
+        """
+        Should answer lookups and revalidations without any query and pick up a newly exported snapshot.
+        """
+        token = RefreshToken.for_user(User.objects.create_user(username="testuser", password="testpass123"))
+        view = SnapshotNameLookupView.as_view()
+
+        def lookup(name, **headers):
+            request = APIRequestFactory().get("/names/lookup/", {"name": name}, **headers)
+            request.META["HTTP_AUTHORIZATION"] = f"Bearer {token.access_token}"
+            return view(request)
+
+        call_command("export_snapshot", self.path, stdout=StringIO())
+        with override_settings(NAMES_SNAPSHOT_PATH=self.path, NAMES_SNAPSHOT_CHECK_INTERVAL=0):
+            with self.assertNumQueries(0):
+                response = lookup("Anna")
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(lookup("carl").status_code, status.HTTP_404_NOT_FOUND)
+                revalidated = lookup("anna", HTTP_IF_NONE_MATCH=response["ETag"])
+                self.assertEqual(revalidated.status_code, status.HTTP_304_NOT_MODIFIED)
+
+            carl = Name.objects.create(name="carl", refreshed_at=timezone.now())
+            us = Country.objects.get(alpha2_code="US")
+            NameCountryProbability.objects.create(name=carl, country=us, probability=0.9)
+            call_command("export_snapshot", self.path, stdout=StringIO())
+
+            response = lookup("carl")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(json.loads(response.content)["country_probabilities"][0]["probability"], 0.9)
+
+    def test_view_returns_503_until_a_snapshot_is_exported(self):
+        """
+        Should answer 503 while there is no snapshot file, and serve the snapshot once it has been exported.
+        """
+        token = RefreshToken.for_user(User.objects.create_user(username="testuser", password="testpass123"))
+        request = APIRequestFactory().get("/names/lookup/", {"name": "anna"})
+        request.META["HTTP_AUTHORIZATION"] = f"Bearer {token.access_token}"
+        view = SnapshotNameLookupView.as_view()
+
+        with override_settings(NAMES_SNAPSHOT_PATH=self.path, NAMES_SNAPSHOT_CHECK_INTERVAL=0):
+            with self.assertNumQueries(0):
+                self.assertEqual(view(request).status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+            call_command("export_snapshot", self.path, stdout=StringIO())
+            self.assertEqual(view(request).status_code, status.HTTP_200_OK)
+
+    def test_view_rejects_tokens_revoked_at_export(self):
+        """
+        Should reject tokens that were revoked when the snapshot was exported, without any query.
+        """
+        user = User.objects.create_user(username="testuser", password="testpass123")
+        revoked, valid = AccessToken.for_user(user), AccessToken.for_user(user)
+        RevokedToken.objects.create(jti=revoked["jti"], expires_at=timezone.now() + timedelta(hours=1))
+        view = SnapshotNameLookupView.as_view()
+
+        def lookup(token):
+            request = APIRequestFactory().get("/names/lookup/", {"name": "anna"})
+            request.META["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+            return view(request)
+
+        call_command("export_snapshot", self.path, stdout=StringIO())
+        with override_settings(NAMES_SNAPSHOT_PATH=self.path, NAMES_SNAPSHOT_CHECK_INTERVAL=0):
+            with self.assertNumQueries(0):
+                self.assertEqual(lookup(revoked).status_code, status.HTTP_401_UNAUTHORIZED)
+                self.assertEqual(lookup(valid).status_code, status.HTTP_200_OK)
@@ -0,0 +1,67 @@
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from names.models import Country, Name, NameCountryProbability
+from names.services.normalization import normalize_name
+from names.services.suggest import SuggestIndex, suggest_index
+
+
+class NormalizeNameTest(SimpleTestCase):
+    def test_variants_fold_to_one_name(self):
+        """
+        Should apply NFKC, fold case and Latin accents, and trim punctuation and whitespace.
+        """
+        for variant in ("José", " jose ", "JOSE-", "ｊｏｓｅ", "jOsé!"):
+            self.assertEqual(normalize_name(variant), "jose")
+        self.assertEqual(normalize_name("Anne   Marie"), "anne marie")
+        self.assertEqual(normalize_name("O’Brien"), "o'brien")
+        self.assertEqual(normalize_name("Łukasz"), "lukasz")
+        # Marks that tell letters apart outside the Latin script are kept
+        self.assertEqual(normalize_name("Йосип"), "йосип")
+        self.assertEqual(normalize_name("- . -"), "")
+
+
+class SuggestIndexTest(SimpleTestCase):
+    def test_prefix_matches_then_similar_names(self):
+        """
+        Should rank an exact match, then names starting with the query by request count, then similar ones.
+        """
+        index = SuggestIndex([("anna", 5), ("annabel", 9), ("anne", 1), ("hanna", 7), ("bob", 3)])
+
+        self.assertEqual(index.suggest("ann", 2), ["annabel", "anna"])
+        self.assertEqual(index.suggest("ann", 10)[:3], ["annabel", "anna", "anne"])
+        self.assertEqual(index.suggest("anna", 2), ["anna", "annabel"])
+        self.assertIn("hanna", index.suggest("hana", 5))
+        self.assertEqual(index.suggest("xyz", 5), [])
+
+
+class NameSuggestViewTest(APITestCase):
+    def setUp(self):
+        suggest_index.clear()
+        self.addCleanup(suggest_index.clear)
+        user = User.objects.create_user(username="testuser", password="testpass123")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+        self.url = reverse("name-suggest")
+
+        country = Country.objects.create(alpha2_code="US", name="United States of America", region="Americas")
+        for value, count in [("anna", 5), ("annabel", 9)]:
+            name = Name.objects.create(name=value, refreshed_at=timezone.now(), request_count=count)
+            NameCountryProbability.objects.create(name=name, country=country, probability=0.5)
+        Name.objects.create(name="annika", request_count=100)
+
+    def test_suggest_from_memory(self):
+        """
+        Should suggest known names with predictions and answer from memory once the index is built.
+        """
+        self.assertEqual(self.client.get(self.url, {"q": "Ann"}).json(), ["annabel", "anna"])
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, {"q": " ÁNNA", "limit": 1})
+        self.assertEqual(response.json(), ["anna"])
+
+        self.assertEqual(self.client.get(self.url, {"q": "?"}).status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,13 +1,35 @@
+import json
+import threading
+from datetime import timedelta
+from io import StringIO
 from unittest.mock import patch
 from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import TransactionTestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
+from drf_spectacular.generators import SchemaGenerator
 from rest_framework import status
 from rest_framework.test import APITestCase
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from names.models import Country, Name, NameCountryProbability, NameRefreshTask
+from names.serializers import project_payload
+from names.services.cache import negative_cache, response_cache
+from names.services.counters import request_counter
+from names.services.popularity import count_requests
+from names.services.external_apis import nationalize_quota
+from names.services.country_registry import country_registry
+from names.services.lookup import is_fresh
+
 
 class NamePredictionViewTest(APITestCase):
     def setUp(self):
+        response_cache.clear()
+        negative_cache.clear()
+        country_registry.clear()
+        request_counter.clear()
         self.user = User.objects.create_user(username="testuser", password="testpass123")
         refresh = RefreshToken.for_user(self.user)
         self.access_token = str(refresh.access_token)
@@ -15,8 +37,8 @@ class NamePredictionViewTest(APITestCase):
         self.url = reverse("name-prediction")
         self.valid_name = "michael"
 
-    @patch("names.views.get_country_details")
-    @patch("names.views.get_nationalize_data")
+    @patch("names.services.countries.get_country_details")
+    @patch("names.services.lookup.get_nationalize_data")
     def test_prediction_with_valid_name(self, mock_get_nationalize, mock_get_country):
         """
         Should return 200 OK with mocked country predictions for a valid name.
@@ -49,6 +71,71 @@ class NamePredictionViewTest(APITestCase):
         self.assertIn("country_probabilities", response.data)
         self.assertIsInstance(response.data["country_probabilities"], list)
 
+    @patch("names.services.lookup.get_nationalize_data")
+    def test_name_without_data_is_negatively_cached(self, mock_get_nationalize):
+        """
+        Should answer repeated lookups of a name without data with 404 from the negative cache.
+        """
+        mock_get_nationalize.return_value = []
+
+        first = self.client.get(self.url, {"name": "zzzz"})
+        # The user comes from the user cache after the first request
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url, {"name": "zzzz"})
+
+        self.assertEqual(first.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(second.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(second.json(), first.json())
+        mock_get_nationalize.assert_called_once()
+
+    @override_settings(NAMES_NEGATIVE_TTL=60)
+    @patch("names.services.lookup.get_nationalize_data")
+    def test_negative_result_expires_before_soft_ttl(self, mock_get_nationalize):
+        """
+        Should look a name without data up again once NAMES_NEGATIVE_TTL has passed.
+        """
+        mock_get_nationalize.return_value = []
+        self.client.get(self.url, {"name": "zzzz"})
+        negative_cache.clear()
+        Name.objects.filter(name="zzzz").update(refreshed_at=timezone.now() - timedelta(seconds=61))
+
+        response = self.client.get(self.url, {"name": "zzzz"})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(mock_get_nationalize.call_count, 2)
+
+    @patch("names.services.lookup.get_nationalize_data")
+    def test_upstream_failure_is_not_cached(self, mock_get_nationalize):
+        """
+        Should return 503 when nationalize.io is unreachable and retry the name on the next request.
+        """
+        mock_get_nationalize.return_value = None
+
+        response = self.client.get(self.url, {"name": "zzzz"})
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertIsNone(Name.objects.get(name="zzzz").refreshed_at)
+
+        mock_get_nationalize.return_value = []
+        self.assertEqual(self.client.get(self.url, {"name": "zzzz"}).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(mock_get_nationalize.call_count, 2)
+
+    @patch("names.services.lookup.get_nationalize_data")
+    def test_name_variants_share_one_entry(self, mock_get_nationalize):
+        """
+        Should normalize case, accents, whitespace and punctuation before the cache, the database and upstream.
+        """
+        Country.objects.create(alpha2_code="US", name="United States of America", region="Americas")
+        mock_get_nationalize.return_value = [{"country_id": "US", "probability": 0.9}]
+
+        for variant in ("José", " jose ", "JOSE-"):
+            response = self.client.get(self.url, {"name": variant})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        mock_get_nationalize.assert_called_once_with("jose")
+        self.assertEqual(list(Name.objects.values_list("name", flat=True)), ["jose"])
+        self.assertEqual(self.client.get(self.url, {"name": "--"}).status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_prediction_without_name(self):
         """
         Should return 400 Bad Request if name is missing.
@@ -72,3 +159,526 @@ class NamePredictionViewTest(APITestCase):
         self.client.credentials(HTTP_AUTHORIZATION="Bearer invalid.token")
         response = self.client.get(self.url, {"name": self.valid_name})
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+US_COUNTRY_DETAILS = {
+    "name": {"official": "United States of America", "common": "United States"},
+    "region": "Americas",
+    "subregion": "North America",
+    "capital": ["Washington, D.C."],
+    "latlng": [38.0, -97.0],
+    "flags": {"png": "https://example.com/flag.png", "svg": "https://example.com/flag.svg"},
+    "coatOfArms": {"png": "", "svg": ""},
+    "borders": ["CAN", "MEX"],
+    "independent": True,
+}
+
+
+class NameBatchLookupViewTest(APITestCase):
+    def setUp(self):
+        country_registry.clear()
+        request_counter.clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass123")
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+        self.url = reverse("name-batch-lookup")
+
+    @patch("names.services.countries.get_country_details")
+    @patch("names.services.lookup.get_nationalize_batch")
+    def test_batch_deduplicates_and_fetches_misses_in_one_call(self, mock_batch, mock_get_country):
+        """
+        Should fetch each distinct name once and resolve each country once.
+        """
+        mock_batch.return_value = {
+            "anna": [{"country_id": "US", "probability": 0.5}],
+            "bob": [{"country_id": "US", "probability": 0.7}],
+        }
+        mock_get_country.return_value = US_COUNTRY_DETAILS
+
+        response = self.client.post(self.url, {"names": ["Anna", "anna", "Bob"]}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_batch.assert_called_once_with(["anna", "bob"])
+        mock_get_country.assert_called_once_with("US")
+        self.assertEqual([r["name"] for r in response.data["results"]], ["anna", "bob"])
+        self.assertEqual(response.data["not_found"], [])
+        request_counter.flush()
+        self.assertEqual(Name.objects.get(name="anna").request_count, 1)
+
+    @patch("names.services.lookup.get_nationalize_batch")
+    def test_batch_serves_fresh_names_without_upstream_call(self, mock_batch):
+        """
+        Should not call nationalize.io for names refreshed within the last 24 hours.
+        """
+        country = Country.objects.create(alpha2_code="US", name="United States of America", region="Americas")
+        name = Name.objects.create(name="anna", refreshed_at=timezone.now())
+        NameCountryProbability.objects.create(name=name, country=country, probability=0.5)
+
+        response = self.client.post(self.url, {"names": ["anna"]}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_batch.assert_not_called()
+        self.assertEqual(response.data["results"][0]["country_probabilities"][0]["probability"], 0.5)
+
+    @patch("names.services.lookup.get_nationalize_batch")
+    def test_batch_reports_names_without_data(self, mock_batch):
+        """
+        Should list names with no upstream predictions under not_found.
+        """
+        mock_batch.return_value = {"zzzz": []}
+
+        response = self.client.post(self.url, {"names": ["zzzz"]}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"], [])
+        self.assertEqual(response.data["not_found"], ["zzzz"])
+
+    @patch("names.services.lookup.get_nationalize_batch")
+    def test_batch_reports_names_that_could_not_be_fetched(self, mock_batch):
+        """
+        Should list names whose upstream call failed under unavailable, and return 503 if nothing else is left.
+        """
+        mock_batch.return_value = None
+        country = Country.objects.create(alpha2_code="US", name="United States of America", region="Americas")
+        name = Name.objects.create(name="anna", refreshed_at=timezone.now())
+        NameCountryProbability.objects.create(name=name, country=country, probability=0.5)
+
+        response = self.client.post(self.url, {"names": ["anna", "zzzz"]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["not_found"], [])
+        self.assertEqual(response.data["unavailable"], ["zzzz"])
+
+        response = self.client.post(self.url, {"names": ["zzzz"]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    def test_batch_compact_results(self):
+        """
+        Should map each name to {alpha2_code: probability} with compact=1.
+        """
+        country = Country.objects.create(alpha2_code="US", name="United States of America", region="Americas")
+        name = Name.objects.create(name="anna", refreshed_at=timezone.now())
+        NameCountryProbability.objects.create(name=name, country=country, probability=0.5)
+
+        response = self.client.post(f"{self.url}?compact=1", {"names": ["anna"]}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"], {"anna": {"US": 0.5}})
+
+    def test_batch_without_names(self):
+        """
+        Should return 400 Bad Request if names are missing.
+        """
+        response = self.client.post(self.url, {}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("error", response.data)
+
+
+class LookupFormatTest(APITestCase):
+    def setUp(self):
+        response_cache.clear()
+        country_registry.clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass123")
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+        self.url = reverse("name-lookup")
+        country = Country.objects.create(alpha2_code="US", name="United States of America", region="Americas")
+        name = Name.objects.create(name="anna", refreshed_at=timezone.now())
+        NameCountryProbability.objects.create(name=name, country=country, probability=0.9)
+
+    def test_compact_lookup(self):
+        """
+        Should return {alpha2_code: probability} with compact=1, from the database and from the response cache.
+        """
+        for _ in range(2):
+            response = self.client.get(self.url, {"name": "anna", "compact": "1"})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.json(), {"US": 0.9})
+
+        full = self.client.get(self.url, {"name": "anna"}).json()
+        self.assertEqual(full["country_probabilities"][0]["country"]["region"], "Americas")
+
+    def test_selected_country_fields(self):
+        """
+        Should return only the requested country fields, plus alpha2_code, projecting a cached response once.
+        """
+        project_payload.cache_clear()
+        for _ in range(3):
+            response = self.client.get(self.url, {"name": "anna", "fields": "region"})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(
+                response.json()["country_probabilities"],
+                [{"country": {"alpha2_code": "US", "region": "Americas"}, "probability": 0.9}],
+            )
+        # The first lookup renders from the database, the next ones project the cached response
+        info = project_payload.cache_info()
+        self.assertEqual((info.misses, info.hits), (1, 1))
+
+    def test_schema_documents_both_result_shapes(self):
+        """
+        Should document lookup and batch results as either the full or the compact shape.
+        """
+        schemas = SchemaGenerator().get_schema(request=None, public=True)["components"]["schemas"]
+
+        self.assertEqual(schemas["CompactName"]["additionalProperties"]["type"], "number")
+        refs = {
+            name: [option["$ref"].rsplit("/", 1)[1] for option in schemas[name]["oneOf"]]
+            for name in ("NameLookupResult", "NameBatchResult")
+        }
+        self.assertEqual(refs["NameLookupResult"], ["Name", "CompactName"])
+        self.assertEqual(refs["NameBatchResult"], ["NameBatchResponse", "NameCompactBatchResponse"])
+        compact_results = schemas["NameCompactBatchResponse"]["properties"]["results"]
+        self.assertEqual(compact_results["additionalProperties"]["$ref"], "#/components/schemas/CompactName")
+
+    def test_unknown_field(self):
+        """
+        Should return 400 Bad Request for fields that countries do not have.
+        """
+        response = self.client.get(self.url, {"name": "anna", "fields": "region,password"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("error", response.data)
+
+
+class PopularNamesViewTest(APITestCase):
+    def setUp(self):
+        country_registry.clear()
+        request_counter.clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass123")
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+        self.url = reverse("popular-names")
+
+        country = Country.objects.create(alpha2_code="US", name="United States of America", region="Americas")
+        for name, probability, request_count in [("anna", 0.1, 5), ("bob", 0.6, 3), ("carl", 0.9, 1)]:
+            name_obj = Name.objects.create(name=name, request_count=request_count)
+            NameCountryProbability.objects.create(
+                name=name_obj, country=country, probability=probability, request_count=request_count
+            )
+
+    def test_names_ordered_by_request_count(self):
+        """
+        Should page through the leaderboard with limit and offset.
+        """
+        self.assertEqual(self.client.get(self.url, {"country": "us"}).data, ["anna", "bob", "carl"])
+        response = self.client.get(self.url, {"country": "us", "limit": 1, "offset": 1})
+        self.assertEqual(response.data, ["bob"])
+
+    def test_min_probability_filter(self):
+        """
+        Should skip names below the requested probability.
+        """
+        response = self.client.get(self.url, {"country": "US", "min_probability": 0.5})
+        self.assertEqual(response.data, ["bob", "carl"])
+
+    def test_lookup_updates_leaderboard(self):
+        """
+        Should move a name up the leaderboard as it is requested.
+        """
+        with patch("names.services.lookup.get_nationalize_data") as mock_get_nationalize:
+            mock_get_nationalize.return_value = [{"country_id": "US", "probability": 0.9}]
+            for _ in range(5):
+                response_cache.clear()
+                Name.objects.filter(name="carl").update(refreshed_at=timezone.now() - timedelta(days=2))
+                self.client.get(reverse("name-lookup"), {"name": "carl"})
+        request_counter.flush()
+
+        self.assertEqual(self.client.get(self.url, {"country": "us", "limit": 1}).data, ["carl"])
+
+    def test_cache_hits_are_counted(self):
+        """
+        Should count response cache hits and write all counts in one flush.
+        """
+        Name.objects.filter(name="carl").update(refreshed_at=timezone.now())
+        for _ in range(3):
+            self.client.get(reverse("name-lookup"), {"name": "Carl"})
+        carl = Name.objects.get(name="carl")
+        self.assertEqual(carl.request_count, 1)
+
+        # Savepoint, one UPDATE per table, release
+        with self.assertNumQueries(4):
+            self.assertEqual(request_counter.flush(), 1)
+
+        carl.refresh_from_db()
+        self.assertEqual(carl.request_count, 4)
+        self.assertEqual(self.client.get(self.url, {"country": "us"}).data, ["anna", "carl", "bob"])
+
+    def test_invalid_limit(self):
+        """
+        Should return 400 Bad Request for an out-of-range limit.
+        """
+        response = self.client.get(self.url, {"country": "us", "limit": 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("error", response.data)
+
+
+class NameExportViewTest(APITestCase):
+    def setUp(self):
+        country_registry.clear()
+        self.user = User.objects.create_user(username="analyst", password="testpass123", is_staff=True)
+        self.authorization = f"Bearer {RefreshToken.for_user(self.user).access_token}"
+        self.client.credentials(HTTP_AUTHORIZATION=self.authorization)
+        self.url = reverse("name-export")
+        us = Country.objects.create(alpha2_code="US", name="United States of America", region="Americas")
+        gb = Country.objects.create(alpha2_code="GB", name="United Kingdom", region="Europe")
+        anna = Name.objects.create(name="anna", refreshed_at=timezone.now() - timedelta(days=3))
+        bob = Name.objects.create(name="bob", refreshed_at=timezone.now())
+        NameCountryProbability.objects.create(name=anna, country=us, probability=0.6)
+        NameCountryProbability.objects.create(name=anna, country=gb, probability=0.1)
+        NameCountryProbability.objects.create(name=bob, country=us, probability=0.8)
+
+    def export(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        return [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+
+    def test_export_streams_all_predictions(self):
+        """
+        Should stream one JSON line per name and country.
+        """
+        rows = self.export()
+        self.assertEqual(
+            [(row["name"], row["country"]) for row in rows], [("anna", "US"), ("anna", "GB"), ("bob", "US")]
+        )
+        self.assertEqual(rows[2]["probability"], 0.8)
+
+    def test_export_filters(self):
+        """
+        Should filter rows by country, minimum probability and refresh time.
+        """
+        self.assertEqual(len(self.export(country="us")), 2)
+        self.assertEqual(len(self.export(min_probability=0.5)), 2)
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        self.assertEqual([row["name"] for row in self.export(updated_since=since)], ["bob"])
+
+    async def test_export_streams_asynchronously_under_asgi(self):
+        """
+        Should stream the export through an async iterator when served over ASGI, instead of collecting it first.
+        """
+        response = await self.async_client.get(self.url, headers={"Authorization": self.authorization})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        rows = [json.loads(line) for line in b"".join(chunks).splitlines()]
+        self.assertEqual(
+            [(row["name"], row["country"]) for row in rows], [("anna", "US"), ("anna", "GB"), ("bob", "US")]
+        )
+
+    def test_export_requires_staff(self):
+        """
+        Should return 403 Forbidden for users who are not staff.
+        """
+        self.user.is_staff = False
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class RequestCountFlushTest(TransactionTestCase):
+    def setUp(self):
+        country = Country.objects.create(alpha2_code="US", name="United States of America", region="Americas")
+        for name in ("anna", "bob", "carl"):
+            name_obj = Name.objects.create(name=name, request_count=3)
+            NameCountryProbability.objects.create(name=name_obj, country=country, probability=0.5, request_count=3)
+
+    def test_concurrent_flushes_add_up(self):
+        """
+        Should lock rows in the same order in every flush, so that overlapping flushes with
+        different increments neither deadlock nor lose counts.
+        """
+        names = ["anna", "bob", "carl"]
+        errors = []
+
+        def flush(order):
+            try:
+                for _ in range(20):
+                    count_requests({name: by for by, name in enumerate(order, start=1)})
+            except DatabaseError as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=flush, args=(order,)) for order in (names, names[::-1])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(Name.objects.get(name="bob").request_count, 3 + 20 * 2 * 2)
+        self.assertEqual(NameCountryProbability.objects.get(name__name="bob").request_count, 3 + 20 * 2 * 2)
+
+
+class ConditionalRequestTest(APITestCase):
+    def setUp(self):
+        response_cache.clear()
+        negative_cache.clear()
+        country_registry.clear()
+        request_counter.clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass123")
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+
+        country = Country.objects.create(alpha2_code="US", name="United States of America", region="Americas")
+        self.anna = Name.objects.create(name="anna", refreshed_at=timezone.now() - timedelta(hours=1))
+        NameCountryProbability.objects.create(name=self.anna, country=country, probability=0.5, request_count=1)
+
+    def test_lookup_revalidation_returns_304(self):
+        """
+        Should send validators and a max-age up to the end of the soft TTL, and answer a current ETag
+        with 304 from the response cache or from the name row alone.
+        """
+        url = reverse("name-lookup")
+        response = self.client.get(url, {"name": "anna"})
+        etag = response["ETag"]
+
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertIn("Last-Modified", response)
+        self.assertIn("private", response["Cache-Control"])
+        self.assertAlmostEqual(int(response["Cache-Control"].split("max-age=")[1]), 23 * 60 * 60, delta=5)
+        self.assertEqual(self.client.get(url, {"name": "anna"}, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Another worker: the name row only, no predictions loaded
+        response_cache.clear()
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {"name": "anna"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+        response_cache.clear()
+        Name.objects.filter(pk=self.anna.pk).update(refreshed_at=timezone.now())
+        response = self.client.get(url, {"name": "anna"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_popular_names_revalidation_returns_304(self):
+        """
+        Should tag the leaderboard by content and answer an unchanged one with 304.
+        """
+        url = reverse("popular-names")
+        response = self.client.get(url, {"country": "US"})
+        self.assertIn("max-age=60", response["Cache-Control"])
+
+        response = self.client.get(url, {"country": "US"}, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+@override_settings(NAMES_REFRESH_MODE="stale-while-revalidate")
+class StaleWhileRevalidateTest(APITestCase):
+    def setUp(self):
+        response_cache.clear()
+        negative_cache.clear()
+        country_registry.clear()
+        request_counter.clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass123")
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+        self.url = reverse("name-lookup")
+
+        country = Country.objects.create(alpha2_code="US", name="United States of America", region="Americas")
+        self.name = Name.objects.create(name="anna")
+        NameCountryProbability.objects.create(name=self.name, country=country, probability=0.5)
+
+    def age_name(self, days):
+        Name.objects.filter(pk=self.name.pk).update(refreshed_at=timezone.now() - timedelta(days=days))
+
+    @patch("names.services.lookup.get_nationalize_data")
+    def test_stale_name_is_served_and_queued(self, mock_get_nationalize):
+        """
+        Should serve stale predictions without calling upstream and queue a background refresh.
+        """
+        self.age_name(2)
+
+        response = self.client.get(self.url, {"name": "anna"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["country_probabilities"][0]["probability"], 0.5)
+        mock_get_nationalize.assert_not_called()
+        self.assertTrue(NameRefreshTask.objects.filter(name=self.name).exists())
+
+    @patch("names.services.lookup.get_nationalize_batch")
+    def test_refresh_worker_drains_queue(self, mock_batch):
+        """
+        Should refresh queued names in one upstream batch and empty the queue.
+        """
+        self.age_name(2)
+        self.client.get(self.url, {"name": "anna"})
+        mock_batch.return_value = {"anna": [{"country_id": "US", "probability": 0.8}]}
+
+        call_command("refresh_worker", "--once", stdout=StringIO())
+
+        mock_batch.assert_called_once_with(["anna"])
+        self.assertFalse(NameRefreshTask.objects.exists())
+        self.assertEqual(NameCountryProbability.objects.get(name=self.name).probability, 0.8)
+        self.name.refresh_from_db()
+        self.assertTrue(is_fresh(self.name))
+
+    @patch("names.services.lookup.get_nationalize_data")
+    def test_name_past_hard_ttl_is_refreshed_synchronously(self, mock_get_nationalize):
+        """
+        Should block on the upstream refresh once the hard TTL has passed.
+        """
+        self.age_name(30)
+        mock_get_nationalize.return_value = [{"country_id": "US", "probability": 0.8}]
+
+        response = self.client.get(self.url, {"name": "anna"})
+
+        self.assertEqual(response.data["country_probabilities"][0]["probability"], 0.8)
+        self.assertFalse(NameRefreshTask.objects.exists())
+
+
+class QuotaDegradationTest(APITestCase):
+    def setUp(self):
+        response_cache.clear()
+        negative_cache.clear()
+        country_registry.clear()
+        request_counter.clear()
+        nationalize_quota.cache.delete(nationalize_quota.state_key)
+        self.addCleanup(nationalize_quota.cache.delete, nationalize_quota.state_key)
+        self.user = User.objects.create_user(username="testuser", password="testpass123")
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+        self.url = reverse("name-lookup")
+
+        country = Country.objects.create(alpha2_code="US", name="United States of America", region="Americas")
+        self.name = Name.objects.create(name="anna", refreshed_at=timezone.now() - timedelta(days=30))
+        NameCountryProbability.objects.create(name=self.name, country=country, probability=0.5)
+
+    @patch("names.services.lookup.get_nationalize_data")
+    def test_low_quota_serves_stale_predictions(self, mock_get_nationalize):
+        """
+        Should serve stale predictions and queue the refresh instead of calling upstream when the quota is low.
+        """
+        nationalize_quota.cache.set(nationalize_quota.state_key, (5, 100))
+
+        response = self.client.get(self.url, {"name": "anna"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["country_probabilities"][0]["probability"], 0.5)
+        mock_get_nationalize.assert_not_called()
+        self.assertTrue(NameRefreshTask.objects.filter(name=self.name).exists())
+
+    @patch("names.services.external_apis.nationalize_client.session.get")
+    def test_refresh_worker_gives_way_to_interactive_lookups(self, mock_http_get):
+        """
+        Should keep queued names queued without calling upstream while only the interactive reserve is left.
+        """
+        nationalize_quota.cache.set(nationalize_quota.state_key, (5, 100))
+        NameRefreshTask.objects.create(name=self.name)
+
+        call_command("refresh_worker", "--once", stdout=StringIO())
+
+        mock_http_get.assert_not_called()
+        self.assertTrue(NameRefreshTask.objects.filter(name=self.name).exists())
+
+    @patch("names.services.lookup.get_nationalize_data")
+    def test_upstream_failure_serves_stale_predictions(self, mock_get_nationalize):
+        """
+        Should fall back to stale predictions when nationalize.io cannot be reached.
+        """
+        mock_get_nationalize.return_value = None
+
+        response = self.client.get(self.url, {"name": "anna"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["country_probabilities"][0]["probability"], 0.5)
@@ -1,12 +1,33 @@
+from django.conf import settings
 from django.urls import path
-from .views import NameLookupView, PopularNamesView
+from .views import (
+    NameBatchLookupView,
+    NameExportView,
+    NameLookupView,
+    NameSuggestView,
+    PopularNamesView,
+    metrics_view,
+)
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
 
+if settings.NAMES_ASYNC_VIEWS:
+    # Served over ASGI: lookups await the upstream APIs instead of blocking a worker
+    from .async_views import AsyncNameBatchLookupView as NameBatchLookupView
+    from .async_views import AsyncNameLookupView as NameLookupView
+
+if settings.NAMES_SNAPSHOT_PATH:
+    # Read-only node: lookups come from the export_snapshot file instead of the database
+    from .snapshot_views import SnapshotNameLookupView as NameLookupView
+
 
 urlpatterns = [
     path("names/predict/", NameLookupView.as_view(), name="name-prediction"),
     path("names/lookup/", NameLookupView.as_view(), name="name-lookup"),
+    path("names/batch/", NameBatchLookupView.as_view(), name="name-batch-lookup"),
+    path("names/suggest/", NameSuggestView.as_view(), name="name-suggest"),
+    path("names/export/", NameExportView.as_view(), name="name-export"),
     path("popular-names/", PopularNamesView.as_view(), name="popular-names"),
+    path("metrics", metrics_view, name="metrics"),
     path("schema/", SpectacularAPIView.as_view(), name="schema"),
     path("docs/", SpectacularSwaggerView.as_view(url_name="schema"), name="swagger-ui"),
     path("redoc/", SpectacularRedocView.as_view(url_name="schema"), name="redoc"),
@@ -1,28 +1,119 @@
-from datetime import timedelta
-from django.utils import timezone
-from django.db.models import Count
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.crypto import constant_time_compare
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 
-from .models import Name, Country, NameCountryProbability
-from .serializers import NameSerializer
-from names.services.external_apis import get_nationalize_data, get_country_details
+from .models import Name
+from .serializers import (
+    NAME_BATCH_RESPONSE,
+    NAME_LOOKUP_RESPONSE,
+    NameBatchRequestSerializer,
+    NameExportQuerySerializer,
+    NameSuggestQuerySerializer,
+    LookupFormatSerializer,
+    PopularNamesQuerySerializer,
+    compact_data,
+    name_data,
+)
+from .authentication import DenylistJWTAuthentication, StatelessJWTAuthentication
+from .renderers import FastJSONRenderer
+from names.db_router import replica_reads
+from names.services.cache import negative_cache, response_cache
+from names.services.country_registry import country_registry
+from names.services.lookup import (
+    fresh_refreshed_at,
+    is_fresh,
+    is_servable_stale,
+    refresh_name,
+    refresh_names,
+    remaining_ttl,
+    names_with_predictions,
+)
+from names.services.counters import count_request
+from names.services.export import andjson_chunks, export_queryset, ndjson_chunks
+from names.services.http_cache import (
+    conditional_payload_response,
+    is_conditional,
+    lookup_cache_headers,
+    lookup_not_modified,
+)
+from names.services.metrics import render_latest, timed
+from names.services.normalization import is_valid_name, normalize_name
+from names.services.popularity import top_names
+from names.services.refresh_queue import enqueue_refresh
+from names.services.suggest import suggest_index
+
+
+NO_DATA = {"error": "No country data found for this name."}
+UPSTREAM_UNAVAILABLE = {"error": "Country data is temporarily unavailable, try again later."}
+INVALID_NAME = {"error": "Invalid 'name' query parameter."}
+
+FORMAT_PARAMETERS = [
+    OpenApiParameter(
+        name="compact", required=False, type=bool, location=OpenApiParameter.QUERY,
+        description="Return only {alpha2_code: probability}.",
+    ),
+    OpenApiParameter(
+        name="fields", required=False, type=str, location=OpenApiParameter.QUERY,
+        description="Comma-separated country fields to return, e.g. name,region. alpha2_code is always included.",
+    ),
+]
+
+
+def partition_batch(keys, names, failed):
+    """
+    Split batch keys into names with predictions to serve, names without predictions
+    and names without predictions whose refresh failed (`failed`), in request order.
+    Names whose refresh failed are still served from stale predictions if they have any.
+    """
+    results, not_found, unavailable = [], [], []
+    for key in keys:
+        if names[key].country_probabilities.all():
+            results.append(names[key])
+        elif key in failed:
+            unavailable.append(key)
+        else:
+            not_found.append(key)
+    return results, not_found, unavailable
+
+
+class ReplicaAuthenticationMixin:
+    """
+    Load the authenticated user from the read replica, if one is configured.
+    Requests answered from the response cache then make no query on the primary.
+    """
+
+    def perform_authentication(self, request):
+        with replica_reads():
+            request.user
 
 
 @extend_schema(
     parameters=[
         OpenApiParameter(name="name", required=True, type=str, location=OpenApiParameter.QUERY),
-    ]
+        *FORMAT_PARAMETERS,
+    ],
+    responses=NAME_LOOKUP_RESPONSE,
 )
-class NameLookupView(APIView):
+class NameLookupView(ReplicaAuthenticationMixin, APIView):
     """
     GET /names/?name=<name>
 
     Returns the most likely countries associated with the given name.
+    `compact=1` or `fields=` trim the response, see LookupFormatSerializer.
     Data is cached for 24 hours. On cache miss, it fetches from external APIs.
+    Serialized responses of fresh names are kept in the response cache and served
+    without touching the database. Names without data are remembered for NAMES_NEGATIVE_TTL
+    in the negative cache; upstream failures are answered with stale data if there is any, else with 503.
+    In stale-while-revalidate mode, or while the nationalize.io quota is low, stale names are served
+    as is and refreshed by the background worker.
+    Responses carry an ETag and Last-Modified from the name's refresh time and a max-age up to the end
+    of its freshness; revalidations of a current copy get a 304 without loading the predictions.
     """
     permission_classes = [IsAuthenticated]
 
@@ -30,67 +121,148 @@ class NameLookupView(APIView):
         name_param = request.query_params.get("name")
         if not name_param:
             return Response({"error": "Missing 'name' query parameter."}, status=status.HTTP_400_BAD_REQUEST)
+        name = normalize_name(name_param)
+        if not is_valid_name(name):
+            return Response(INVALID_NAME, status=status.HTTP_400_BAD_REQUEST)
+        fmt = LookupFormatSerializer(data=request.query_params)
+        if not fmt.is_valid():
+            return Response({"error": fmt.errors}, status=status.HTTP_400_BAD_REQUEST)
 
-        name_obj, created = Name.objects.get_or_create(name=name_param.lower())
+        cached = response_cache.get(name)
+        if cached is not None:
+            count_request([name])
+            version, payload, compact_payload = cached
+            response = lookup_not_modified(request, version)
+            if response is None:
+                body = fmt.shape_payload(payload, compact_payload)
+                response = lookup_cache_headers(HttpResponse(body, content_type="application/json"), version)
+            return response
 
-        if not created and name_obj.last_accessed_at > timezone.now() - timedelta(days=1):
-            serializer = NameSerializer(name_obj)
-            return Response(serializer.data)
+        # Names without data are not counted, they never reach a leaderboard
+        payload = negative_cache.get(name)
+        if payload is not None:
+            return HttpResponse(payload, status=status.HTTP_404_NOT_FOUND, content_type="application/json")
 
-        name_obj.request_count += 1
-        name_obj.save()
+        if is_conditional(request):
+            # Revalidation of a fresh name: one indexed read instead of loading and rendering its predictions
+            refreshed_at = fresh_refreshed_at(name)
+            response = lookup_not_modified(request, refreshed_at.timestamp()) if refreshed_at else None
+            if response is not None:
+                count_request([name])
+                return response
 
-        country_data = get_nationalize_data(name_param)
-        if not country_data:
-            return Response({"error": "No country data found for this name."}, status=status.HTTP_404_NOT_FOUND)
+        name_obj, created = names_with_predictions().get_or_create(name=name)
+        count_request([name_obj.name])
 
-        for entry in country_data:
-            code = entry["country_id"]
-            probability = entry["probability"]
+        if not created and is_fresh(name_obj):
+            return self.cached_response(name_obj, fmt)
 
-            country = Country.objects.filter(alpha2_code=code).first()
-            if not country:
-                c_data = get_country_details(code)
-                if not c_data:
-                    continue
-
-                country = Country.objects.create(
-                    alpha2_code=code,
-                    name=c_data["name"]["official"],
-                    common_name=c_data["name"].get("common", ""),
-                    region=c_data.get("region", ""),
-                    subregion=c_data.get("subregion", ""),
-                    capital=c_data.get("capital", [""])[0],
-                    latitude=c_data.get("latlng", [None, None])[0],
-                    longitude=c_data.get("latlng", [None, None])[1],
-                    flag_png=c_data.get("flags", {}).get("png", ""),
-                    flag_svg=c_data.get("flags", {}).get("svg", ""),
-                    coat_of_arms_png=c_data.get("coatOfArms", {}).get("png", ""),
-                    coat_of_arms_svg=c_data.get("coatOfArms", {}).get("svg", ""),
-                    borders=",".join(c_data.get("borders", [])),
-                    independent=c_data.get("independent", None),
-                )
-
-            NameCountryProbability.objects.update_or_create(
-                name=name_obj,
-                country=country,
-                defaults={"probability": probability},
+        if not created and is_servable_stale(name_obj):
+            enqueue_refresh([name_obj])
+            return lookup_cache_headers(Response(fmt.shape_name(name_obj)), name_obj.refreshed_at.timestamp())
+
+        has_stale_data = not created and bool(name_obj.country_probabilities.all())
+        if refresh_name(name_obj, name, has_stale_data) is None:
+            # Stale predictions beat an error while nationalize.io is unreachable or out of quota
+            if has_stale_data:
+                return lookup_cache_headers(Response(fmt.shape_name(name_obj)), name_obj.refreshed_at.timestamp())
+            return Response(UPSTREAM_UNAVAILABLE, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        return self.cached_response(names_with_predictions().get(pk=name_obj.pk), fmt)
+
+    @staticmethod
+    def cached_response(name_obj, fmt):
+        """
+        Serialize a fresh name and store the rendered full and compact JSON, with its data version,
+        in the response cache. A name without predictions gets a 404 that is stored in the negative cache instead.
+        """
+        if not name_obj.country_probabilities.all():
+            negative_cache.set(name_obj.name, FastJSONRenderer().render(NO_DATA), ttl=remaining_ttl(name_obj))
+            return Response(NO_DATA, status=status.HTTP_404_NOT_FOUND)
+
+        with timed("serialize"):
+            data = name_data(name_obj)
+            payload = FastJSONRenderer().render(data)
+            compact_payload = FastJSONRenderer().render(compact_data(name_obj))
+        version = name_obj.refreshed_at.timestamp()
+        response_cache.set(name_obj.name, (version, payload, compact_payload), ttl=remaining_ttl(name_obj))
+        return lookup_cache_headers(Response(fmt.shape(data)), version)
+
+
+@extend_schema(request=NameBatchRequestSerializer, responses=NAME_BATCH_RESPONSE, parameters=FORMAT_PARAMETERS)
+class NameBatchLookupView(ReplicaAuthenticationMixin, APIView):
+    """
+    POST /names/batch/
+
+    Looks up many names in one request. Fresh names are served from the database,
+    the remaining ones are deduplicated and fetched from nationalize.io in multi-name chunks.
+    Takes the `compact` and `fields` query parameters of the single lookup.
+    Names without predictions are listed under not_found, names that nationalize.io could not be asked about
+    under unavailable; a batch with nothing but unavailable names gets a 503.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = NameBatchRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({"error": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        fmt = LookupFormatSerializer(data=request.query_params)
+        if not fmt.is_valid():
+            return Response({"error": fmt.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        keys = list(dict.fromkeys(serializer.validated_data["names"]))
+
+        names = {
+            n.name: n
+            for n in names_with_predictions().filter(name__in=keys)
+        }
+        stale = [key for key in keys if key not in names or not is_fresh(names[key])]
+
+        revalidate = {key for key in stale if key in names and is_servable_stale(names[key])}
+        if revalidate:
+            enqueue_refresh([names[key] for key in revalidate])
+            stale = [key for key in stale if key not in revalidate]
+
+        failed = set()
+        if stale:
+            missing = [key for key in stale if key not in names]
+            Name.objects.bulk_create([Name(name=key) for key in missing], ignore_conflicts=True)
+            fetched = refresh_names(list(Name.objects.filter(name__in=stale)))
+            failed = {key for key in stale if key not in fetched}
+
+            names.update(
+                (n.name, n)
+                for n in names_with_predictions().filter(name__in=stale)
             )
 
-        serializer = NameSerializer(name_obj)
-        return Response(serializer.data)
+        count_request(keys)
+
+        results, not_found, unavailable = partition_batch(keys, names, failed)
+        if unavailable and not results and not not_found:
+            return Response(UPSTREAM_UNAVAILABLE, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        with timed("serialize"):
+            data = fmt.shape_results(results)
+        return Response({"results": data, "not_found": not_found, "unavailable": unavailable})
 
 
 @extend_schema(
     parameters=[
         OpenApiParameter(name="country", required=True, type=str, location=OpenApiParameter.QUERY),
+        OpenApiParameter(name="limit", required=False, type=int, location=OpenApiParameter.QUERY),
+        OpenApiParameter(name="offset", required=False, type=int, location=OpenApiParameter.QUERY),
+        OpenApiParameter(name="min_probability", required=False, type=float, location=OpenApiParameter.QUERY),
     ]
 )
-class PopularNamesView(APIView):
+class PopularNamesView(ReplicaAuthenticationMixin, APIView):
     """
-    GET /popular-names/?country=<alpha2_code>
+    GET /popular-names/?country=<alpha2_code>&limit=5&offset=0&min_probability=0
 
-    Returns top 5 most requested names for a given country.
+    Returns the most requested names for a given country (top 5 by default).
+    Served from the per-country leaderboard index, so the cost grows with limit + offset only.
+    Leaderboards tolerate replication lag and are read from the read replica, if one is configured.
+    Clients may keep them for NAMES_HTTP_CACHE_POPULAR_MAX_AGE seconds and revalidate them by ETag.
     """
     permission_classes = [IsAuthenticated]
 
@@ -99,14 +271,98 @@ class PopularNamesView(APIView):
         if not country_code:
             return Response({"error": "Missing 'country' query parameter."}, status=status.HTTP_400_BAD_REQUEST)
 
-        country = Country.objects.filter(alpha2_code__iexact=country_code).first()
-        if not country:
-            return Response({"error": "Country not found."}, status=status.HTTP_404_NOT_FOUND)
+        params = PopularNamesQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response({"error": params.errors}, status=status.HTTP_400_BAD_REQUEST)
 
-        top_names = (
-            Name.objects.filter(country_probabilities__country=country)
-            .annotate(link_count=Count("id"))
-            .order_by("-request_count")[:5]
+        with replica_reads():
+            country = country_registry.get(country_code)
+            if not country:
+                return Response({"error": "Country not found."}, status=status.HTTP_404_NOT_FOUND)
+
+            names = top_names(country.pk, **params.validated_data)
+        return conditional_payload_response(
+            request, FastJSONRenderer().render(names), Response(names), settings.NAMES_HTTP_CACHE["POPULAR_MAX_AGE"]
         )
 
-        return Response([name.name for name in top_names])
+
+@extend_schema(
+    parameters=[
+        OpenApiParameter(name="q", required=True, type=str, location=OpenApiParameter.QUERY),
+        OpenApiParameter(name="limit", required=False, type=int, location=OpenApiParameter.QUERY),
+    ],
+    responses={200: {"type": "array", "items": {"type": "string"}}},
+)
+class NameSuggestView(APIView):
+    """
+    GET /names/suggest/?q=<prefix>&limit=10
+
+    Autocompletes a name: known names starting with the normalized query, most requested first,
+    then names with similar spelling. Served from the in-memory suggest index, without a database query.
+    """
+    authentication_classes = [StatelessJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        params = NameSuggestQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response({"error": params.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(suggest_index.get().suggest(params.validated_data["q"], params.validated_data["limit"]))
+
+
+@extend_schema(
+    parameters=[
+        OpenApiParameter(name="country", required=False, type=str, location=OpenApiParameter.QUERY),
+        OpenApiParameter(name="min_probability", required=False, type=float, location=OpenApiParameter.QUERY),
+        OpenApiParameter(name="updated_since", required=False, type=str, location=OpenApiParameter.QUERY),
+    ],
+    responses={(200, "application/x-ndjson"): {"type": "string"}},
+)
+class NameExportView(ReplicaAuthenticationMixin, APIView):
+    """
+    GET /names/export/?country=<alpha2_code>&min_probability=0&updated_since=<ISO 8601>
+
+    Streams every prediction as newline-delimited JSON, one line per name and country, for staff users.
+    With updated_since, only names refreshed since then are sent, with all their predictions,
+    so that incremental syncs can replace the predictions of each name they receive.
+    Rows are streamed from a server-side cursor on the read replica, if one is configured,
+    through an async iterator when served over ASGI.
+    """
+    # Staff status is checked against the database in every NAMES_AUTH mode
+    authentication_classes = [DenylistJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        params = NameExportQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response({"error": params.errors}, status=status.HTTP_400_BAD_REQUEST)
+        filters = dict(params.validated_data)
+
+        with replica_reads():
+            country_code = filters.pop("country", None)
+            if country_code:
+                country = country_registry.get(country_code)
+                if not country:
+                    return Response({"error": "Country not found."}, status=status.HTTP_404_NOT_FOUND)
+                filters["country_pk"] = country.pk
+
+            rows = export_queryset(**filters)
+            # The rows are read after the view returns: pin the database chosen now
+            rows = rows.using(rows.db)
+        chunks = andjson_chunks(rows) if isinstance(request._request, ASGIRequest) else ndjson_chunks(rows)
+        return StreamingHttpResponse(chunks, content_type="application/x-ndjson")
+
+
+def metrics_view(request):
+    """
+    GET /metrics
+
+    Prometheus metrics of this deployment. Requires `Authorization: Bearer <METRICS_TOKEN>` if a token is set.
+    """
+    token = settings.NAMES_METRICS_TOKEN
+    if token and not constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+
+    payload, content_type = render_latest()
+    return HttpResponse(payload, content_type=content_type)